@@ -0,0 +1,84 @@
+"""
+Signer.generate_w microbenchmark for the ai type, where building and
+encrypting the payload is the whole CPU cost of a solve: the original
+path (static fields rebuilt as a dict literal, RSA cipher built per call)
+vs generate_w (shared static dicts, cipher cached on Signer).
+
+PoW is pinned to 0 bits so only the payload work is measured.
+
+Usage:
+    python benchmarks/bench_generate_w.py
+    python benchmarks/bench_generate_w.py --calls 20000
+"""
+import sys, os, time, json, random, argparse, binascii
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Crypto.Cipher import PKCS1_v1_5
+
+from geetest_solver.sign import Signer, W_STATIC, lotParser
+
+
+def static_fields():
+    """The static fields, rebuilt as a dict literal on every call like the original."""
+    return {
+        "biht": "1426265548", "device_id": "",
+        "em": {"cp": 0, "ek": "11", "nt": 0, "ph": 0, "sc": 0, "si": 0, "wd": 1},
+        "gee_guard": {"roe": {"auh": "3", "aup": "3", "cdc": "3", "egp": "3",
+                              "res": "3", "rew": "3", "sep": "3", "snh": "3"}},
+        "ep": "123", "geetest": "captcha", "lang": "zh",
+    }
+
+
+def legacy_generate_w(data, captcha_id):
+    """The original ai path of generate_w."""
+    lot_number = data['lot_number']
+    pow_detail = data['pow_detail']
+    base = {"y1qk": "TWZc"} | {
+        **Signer.generate_pow(lot_number, captcha_id, pow_detail['hashfunc'], pow_detail['version'],
+                              pow_detail['bits'], pow_detail['datetime'], ""),
+        **lotParser.get_dict(lot_number),
+        **static_fields(),
+        "lot_number": lot_number,
+    }
+    raw_input = json.dumps(base)
+    random_uid = Signer.rand_uid()
+    enc_key = binascii.hexlify(PKCS1_v1_5.new(Signer.encryptor_pubkey).encrypt(random_uid.encode())).decode()
+    return binascii.hexlify(Signer.encrypt_symmetrical_1(raw_input, random_uid)).decode() + enc_key
+
+
+assert static_fields() == W_STATIC
+
+
+def make_challenges(count, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "lot_number": "%032x" % rng.getrandbits(128),
+        "pt": "1",
+        "pow_detail": {"hashfunc": "md5", "version": "1", "bits": 0, "datetime": "2024-01-01T00:00:00.000000+08:00"},
+    } for _ in range(count)]
+
+
+def rate(label, fn, challenges, baseline=None):
+    start = time.perf_counter()
+    for data in challenges:
+        fn(data)
+    elapsed = time.perf_counter() - start
+    per_second = len(challenges) / elapsed
+    extra = f"  {per_second / baseline:6.1f}x" if baseline else ""
+    print(f"{label:16s} {per_second:10,.0f} calls/s  {elapsed / len(challenges) * 1e6:7.1f} us/call{extra}")
+    return per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Signer.generate_w benchmark (ai)")
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    challenges = make_challenges(args.calls)
+    base = rate("legacy", lambda d: legacy_generate_w(d, "54088bb07d2df3c46b79f80300b0abbe"), challenges)
+    rate("generate_w", lambda d: Signer.generate_w(d, "54088bb07d2df3c46b79f80300b0abbe", "ai"), challenges, base)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+GobangSolver benchmark: boards/second of the original per-line Python search,
+the table-driven NumPy solver, and GobangSolver.solve_batch.
+
+Usage:
+    python benchmarks/bench_gobang.py
+    python benchmarks/bench_gobang.py --boards 20000 --size 5
+"""
+import sys, os, time, random, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geetest_solver.gobang import GobangSolver
+
+
+class LegacyGobangSolver:
+    """The solver as it was before the precomputed line tables."""
+
+    def __init__(self, ques):
+        self.board = ques
+        self.n = len(ques)
+
+    def find_four_in_line(self):
+        for line in self._iterate_lines():
+            elements = [self.board[r][c] for r, c in line]
+            freq = {}
+            for num in elements:
+                freq[num] = freq.get(num, 0) + 1
+            if self.n - 1 not in freq.values() or freq.get(0) == self.n - 1:
+                continue
+            correct_num = next(num for num, cnt in freq.items() if cnt == self.n - 1)
+            try:
+                zero_idx = elements.index(0)
+            except ValueError:
+                continue
+            fill_pos = line[zero_idx]
+            exclude_set = set(line)
+            for r in range(self.n):
+                for c in range(self.n):
+                    if (r, c) not in exclude_set and self.board[r][c] == correct_num:
+                        return [[r, c], [fill_pos[0], fill_pos[1]]]
+
+    _iterate_lines = GobangSolver._iterate_lines
+
+
+def make_boards(count, n, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = [[rng.randint(1, 4) for _ in range(n)] for _ in range(n)]
+        value, r = rng.randint(1, 4), rng.randrange(n)
+        board[r] = [value] * n
+        board[r][rng.randrange(n)] = 0
+        boards.append(board)
+    return boards
+
+
+def rate(label, fn, count, baseline=None):
+    start = time.perf_counter()
+    results = fn()
+    per_second = count / (time.perf_counter() - start)
+    extra = f"  {per_second / baseline:6.1f}x" if baseline else ""
+    print(f"{label:24s} {per_second:12,.0f} boards/s{extra}")
+    return results, per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GobangSolver benchmark")
+    parser.add_argument("--boards", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=5)
+    args = parser.parse_args()
+
+    boards = make_boards(args.boards, args.size)
+    GobangSolver._line_table(args.size)  # built once per size, exclude from the timings
+
+    legacy, base = rate("legacy", lambda: [LegacyGobangSolver(b).find_four_in_line() for b in boards], args.boards)
+    single, _ = rate("find_four_in_line", lambda: [GobangSolver(b).find_four_in_line() for b in boards], args.boards, base)
+    batch, _ = rate("solve_batch", lambda: GobangSolver.solve_batch(boards), args.boards, base)
+    print(f"identical results: {legacy == single == batch}")
+
+
+if __name__ == "__main__":
+    main()
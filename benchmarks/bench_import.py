@@ -0,0 +1,63 @@
+"""
+Import-time benchmark: how long ``from geetest_solver import GeetestSolver``
+takes in a fresh interpreter, measured with ``python -X importtime``, and
+which heavy dependencies it drags in.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 10 --top 15
+    python benchmarks/bench_import.py --stmt "from geetest_solver.slide import SlideSolver"
+"""
+import sys, os, re, argparse, subprocess, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies only some risk types need; none should load on package import
+HEAVY = ["cv2", "numpy", "requests", "onnxruntime", "ddddocr"]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(stmt):
+    """Run ``stmt`` under -X importtime, return ({module: cumulative_us}, total_us, loaded heavy modules)."""
+    probe = f"{stmt}; import sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    cumulative, total = {}, 0
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, indent, module = int(m[1]), int(m[2]), m[3], m[4]
+        cumulative[module] = cum_us
+        if len(indent) == 1:  # top-level import
+            total += cum_us
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative, total, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Package import-time benchmark")
+    parser.add_argument("--stmt", type=str, default="from geetest_solver import GeetestSolver")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to average over")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    totals, last = [], None
+    for _ in range(args.runs):
+        cumulative, total, loaded = measure(args.stmt)
+        totals.append(total)
+        last = (cumulative, loaded)
+
+    cumulative, loaded = last
+    print(f"Statement: {args.stmt}")
+    print(f"Import time: median {statistics.median(totals) / 1000:.1f} ms, "
+          f"min {min(totals) / 1000:.1f} ms over {args.runs} runs")
+    print(f"Heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+    print(f"\nSlowest modules (cumulative, last run):")
+    for module, us in sorted(cumulative.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
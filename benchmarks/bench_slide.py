@@ -0,0 +1,80 @@
+"""
+Slide matcher latency: the original 3-channel full-image matcher vs the
+single-channel, band-restricted coarse-to-fine SlideSolver, on synthetic
+slide captchas. Also reports how often both agree and hit the true offset.
+
+Usage:
+    python benchmarks/bench_slide.py
+    python benchmarks/bench_slide.py --samples 200 --repeat 5
+"""
+import sys, os, time, argparse, statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+
+from geetest_solver.slide import SlideSolver
+from synthetic import make_slide
+
+
+def legacy(puzzle_piece, background):
+    """find_puzzle_piece_position as it was before the fast engine (annotation included)."""
+    background = background.copy()
+    edge_puzzle_piece = cv2.Canny(puzzle_piece, 100, 200)
+    edge_background = cv2.Canny(background, 100, 200)
+    edge_puzzle_piece_rgb = cv2.cvtColor(edge_puzzle_piece, cv2.COLOR_GRAY2RGB)
+    edge_background_rgb = cv2.cvtColor(edge_background, cv2.COLOR_GRAY2RGB)
+    res = cv2.matchTemplate(edge_background_rgb, edge_puzzle_piece_rgb, cv2.TM_CCOEFF_NORMED)
+    _, _, _, top_left = cv2.minMaxLoc(res)
+    h, w = edge_puzzle_piece.shape[:2]
+    center_x, center_y = top_left[0] + w // 2, top_left[1] + h // 2
+    cv2.rectangle(background, top_left, (top_left[0] + w, top_left[1] + h), (0, 0, 255), 2)
+    cv2.line(background, (center_x, 0), (center_x, edge_background_rgb.shape[0]), (0, 255, 0), 2)
+    cv2.line(background, (0, center_y), (edge_background_rgb.shape[1], center_y), (0, 255, 0), 2)
+    return center_x - 41
+
+
+def time_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slide matcher latency benchmark")
+    parser.add_argument("--samples", type=int, default=100, help="Synthetic captchas")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per captcha (median is kept)")
+    args = parser.parse_args()
+
+    old_ms, new_ms = [], []
+    agree = old_hits = new_hits = 0
+    for seed in range(args.samples):
+        slice_png, bg_png, expected = make_slide(seed)
+        solver = SlideSolver(slice_png, bg_png)
+
+        old, t_old = time_ms(lambda: legacy(solver.puzzle_piece, solver.background), args.repeat)
+        new, t_new = time_ms(solver.find_puzzle_piece_position, args.repeat)
+        old_ms.append(t_old)
+        new_ms.append(t_new)
+        agree += old == new
+        old_hits += abs(old - expected) <= 3
+        new_hits += abs(new - expected) <= 3
+
+    def row(name, ms, hits):
+        ms = sorted(ms)
+        print(f"{name:8s} p50 {statistics.median(ms):6.3f} ms   p95 {ms[int(len(ms) * .95) - 1]:6.3f} ms   "
+              f"hit rate {hits}/{args.samples}")
+
+    print(f"Per-solve matching latency over {args.samples} captchas (decode excluded):")
+    row("legacy", old_ms, old_hits)
+    row("fast", new_ms, new_hits)
+    print(f"speedup  {statistics.median(old_ms) / statistics.median(new_ms):.2f}x (p50), "
+          f"same answer as legacy on {agree}/{args.samples}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Offline per-stage benchmark: times every CPU stage of a solve separately on
+recorded (or synthetic) /load payloads and assets, with no network involved.
+
+Stages: asset decode, ddddocr detection, ORB matching, slide matching,
+gobang, PoW, LotParser and encrypt_w. Each reports p50/p95/p99 latency and
+throughput; ``--json`` writes the same numbers plus environment details so
+runs of different releases can be diffed with ``--compare``.
+
+Usage:
+    python benchmarks/bench_stages.py
+    python benchmarks/bench_stages.py --fixtures fixtures/ --iterations 200
+    python benchmarks/bench_stages.py --stages slide pow --json before.json
+    python benchmarks/bench_stages.py --json after.json --compare before.json
+    python benchmarks/bench_stages.py --json - | jq .stages   # table goes to stderr
+"""
+import sys, os, time, json, math, platform, argparse, subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+import fixtures
+from geetest_solver.sign import Signer, lotParser, W_HEAD, W_STATIC
+
+STAGES = ["decode", "detection", "orb", "slide", "gobang", "pow", "lot_parser", "encrypt_w"]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+def measure(fn, inputs, iterations, warmup=3):
+    """Call ``fn`` on ``inputs`` round-robin ``iterations`` times; per-call seconds."""
+    for i in range(min(warmup, iterations)):
+        fn(inputs[i % len(inputs)])
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "n": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1e3,
+        "p50_ms": percentile(ordered, 50) * 1e3,
+        "p95_ms": percentile(ordered, 95) * 1e3,
+        "p99_ms": percentile(ordered, 99) * 1e3,
+        "max_ms": ordered[-1] * 1e3,
+        "throughput_per_s": len(ordered) / sum(ordered),
+    }
+
+
+def stage_inputs(stage, challenges):
+    """(callable, inputs) for ``stage``, or None when no fixture exercises it."""
+    by_type = {}
+    for risk_type, data, assets in challenges:
+        by_type.setdefault("gobang" if risk_type == "winlinze" else risk_type, []).append((data, assets))
+
+    if stage == "decode":
+        images = [content for _, _, assets in challenges for content in assets.values()]
+        return (lambda b: cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_UNCHANGED)), images
+
+    if stage == "detection" and by_type.get("icon"):
+        from geetest_solver.dddd_server import dddd_service
+        return dddd_service.detection, [assets[data["imgs"]] for data, assets in by_type["icon"]]
+
+    if stage == "orb" and by_type.get("icon"):
+        # Boxes come from one detection pass up front so only matching is timed
+        from geetest_solver.icon import IconSolver
+        from geetest_solver.dddd_server import dddd_service
+        solvers = []
+        for data, assets in by_type["icon"]:
+            solver = IconSolver(data["imgs"], data["ques"], assets)
+            solvers.append((solver, dddd_service.detection(solver.captcha_img)))
+        return (lambda s: s[0]._score_matrix(s[0]._crops(s[1]))), solvers
+
+    if stage == "slide" and by_type.get("slide"):
+        from geetest_solver.slide import SlideSolver
+        pairs = [(assets[data["slice"]], assets[data["bg"]]) for data, assets in by_type["slide"]]
+        return (lambda p: SlideSolver(*p).find_puzzle_piece_position()), pairs
+
+    if stage == "gobang" and by_type.get("gobang"):
+        from geetest_solver.gobang import GobangSolver
+        return (lambda q: GobangSolver(q).find_four_in_line()), [data["ques"] for data, _ in by_type["gobang"]]
+
+    payloads = [data for _, data, _ in challenges]
+    if stage == "pow":
+        def pow_(data):
+            detail = data["pow_detail"]
+            Signer.generate_pow(data["lot_number"], fixtures.DEMO_CAPTCHA_ID, detail["hashfunc"],
+                                detail["version"], detail["bits"], detail["datetime"], "")
+        return pow_, payloads
+
+    if stage == "lot_parser":
+        return lotParser.get_dict, [data["lot_number"] for data in payloads]
+
+    if stage == "encrypt_w":
+        raw = [json.dumps(W_HEAD | lotParser.get_dict(data["lot_number"]) | W_STATIC | {"lot_number": data["lot_number"]})
+               for data in payloads]
+        return (lambda r: Signer.encrypt_w(r, "1")), raw
+    return None
+
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline per-stage solver benchmark")
+    parser.add_argument("--fixtures", help="Fixture directory (see fixtures.py); synthetic challenges if omitted")
+    parser.add_argument("--count", type=int, default=10, help="Synthetic challenges per type")
+    parser.add_argument("--pow-bits", type=int, default=12,
+                        help="PoW difficulty of the synthetic payloads (0 skips the pow stage)")
+    parser.add_argument("--iterations", type=int, default=100, help="Timed calls per stage")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--json", help="Write results as JSON to this path ('-' for stdout)")
+    parser.add_argument("--compare", help="Earlier --json output to print p50/throughput deltas against")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        challenges = fixtures.load(args.fixtures)
+        source = os.path.abspath(args.fixtures)
+    else:
+        challenges = fixtures.synthetic(args.count, pow_bits=args.pow_bits)
+        source = "synthetic"
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["stages"]
+
+    # With the report on stdout the table goes to stderr, so the JSON stays parseable
+    out = sys.stderr if args.json == "-" else sys.stdout
+    results = {}
+    print(f"{'stage':12s} {'n':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'ops/s':>10s}", file=out)
+    for stage in args.stages:
+        if stage == "pow" and not any(data["pow_detail"]["bits"] for _, data, _ in challenges):
+            print(f"{stage:12s} skipped (0-bit difficulty, nothing to search; see --pow-bits)", file=out)
+            continue
+        job = stage_inputs(stage, challenges)
+        if job is None:
+            print(f"{stage:12s} skipped (no fixture of that type)", file=out)
+            continue
+        fn, inputs = job
+        stats = results[stage] = summarize(measure(fn, inputs, args.iterations))
+        line = (f"{stage:12s} {stats['n']:6d} {stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} "
+                f"{stats['p99_ms']:9.3f} {stats['throughput_per_s']:10,.0f}")
+        if stage in baseline:
+            line += (f"  p50 {stats['p50_ms'] / baseline[stage]['p50_ms'] - 1:+.0%}"
+                     f"  ops/s {stats['throughput_per_s'] / baseline[stage]['throughput_per_s'] - 1:+.0%}")
+        print(line, file=out)
+
+    if args.json:
+        report = {"environment": environment(), "fixtures": source, "iterations": args.iterations,
+                  "stages": results}
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Recorded /load payloads and their static assets for the offline benchmarks.
+
+A fixture directory holds one ``<risk_type>_<n>.json`` per challenge
+(``{"risk_type": ..., "data": <the /load data>}``) and every asset it
+references under ``assets/<path>``, so solvers see exactly the bytes
+GeeTest served.
+
+Usage:
+    # record live challenges (needs network access to GeeTest)
+    python benchmarks/fixtures.py record fixtures/ --types slide icon gobang ai --count 10
+
+    # write the synthetic set instead (fully offline)
+    python benchmarks/fixtures.py synthetic fixtures/ --count 10
+"""
+import sys, os, json, glob, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geetest_solver.sign import Signer
+
+DEMO_CAPTCHA_ID = "54088bb07d2df3c46b79f80300b0abbe"
+RISK_TYPES = ["slide", "icon", "gobang", "ai"]
+
+
+def save(directory, name, risk_type, data, assets):
+    os.makedirs(directory, exist_ok=True)
+    for path, content in assets.items():
+        target = os.path.join(directory, "assets", path.lstrip("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+    with open(os.path.join(directory, f"{name}.json"), "w") as f:
+        json.dump({"risk_type": risk_type, "data": data}, f, indent=1)
+
+
+def load(directory):
+    """Return ``[(risk_type, data, {path: bytes})]`` for every fixture in ``directory``."""
+    fixtures = []
+    for file in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(file) as f:
+            record = json.load(f)
+        assets = {}
+        for path in Signer.asset_paths(record["data"], record["risk_type"]):
+            with open(os.path.join(directory, "assets", path.lstrip("/")), "rb") as f:
+                assets[path] = f.read()
+        fixtures.append((record["risk_type"], record["data"], assets))
+    return fixtures
+
+
+def synthetic(count, types=RISK_TYPES, pow_bits=0):
+    """The same ``[(risk_type, data, assets)]`` shape, generated by ``synthetic.make_load``."""
+    from synthetic import make_load
+    return [(risk_type, *make_load(risk_type, seed, pow_bits)) for risk_type in types for seed in range(count)]
+
+
+def record(directory, types, count, captcha_id=DEMO_CAPTCHA_ID):
+    from geetest_solver import GeetestSolver
+    from geetest_solver.assets import asset_fetcher
+    for risk_type in types:
+        for n in range(count):
+            solver = GeetestSolver(captcha_id, risk_type)
+            data = solver.load_captcha()
+            assets = asset_fetcher.fetch_all(Signer.asset_paths(data, risk_type))
+            save(directory, f"{risk_type}_{n}", risk_type, data, assets)
+            print(f"recorded {risk_type}_{n} ({sum(map(len, assets.values()))} asset bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or generate benchmark fixtures")
+    parser.add_argument("mode", choices=["record", "synthetic"])
+    parser.add_argument("directory")
+    parser.add_argument("--types", nargs="+", default=RISK_TYPES, choices=RISK_TYPES)
+    parser.add_argument("--count", type=int, default=10, help="Challenges per type")
+    parser.add_argument("--captcha-id", default=DEMO_CAPTCHA_ID)
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args.directory, args.types, args.count, args.captcha_id)
+    else:
+        for i, (risk_type, data, assets) in enumerate(synthetic(args.count, args.types)):
+            save(args.directory, f"{risk_type}_{i % args.count}", risk_type, data, assets)
+        print(f"wrote {args.count * len(args.types)} synthetic fixtures to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+End-to-end load generator: drives N concurrent GeetestSolver.solve() loops
+against the local stand-in server (mock_server.py) and reports solves per
+second, latency percentiles and CPU seconds per solve of this process
+(thread and async modes).
+
+Without ``--url`` the mock server is spawned as a subprocess, so its own
+CPU use stays out of the per-solve figure.
+
+Usage:
+    python benchmarks/loadgen.py --types slide gobang ai --concurrency 8 --solves 400
+    python benchmarks/loadgen.py --mode async --concurrency 64 --duration 30 --latency-ms 80
+    python benchmarks/loadgen.py --fail-ratio 0.3 --prefetch --hedge-after 0.5
+    python benchmarks/loadgen.py --url http://127.0.0.1:8931 --json run.json
+    python benchmarks/loadgen.py --mode service --workers 4 --max-queue 16 --concurrency 32 --duration 30
+
+``--mode service`` starts the HTTP solve service (geetest_solver/server.py)
+in front of the mock server and sends ``POST /solve`` requests to it instead
+of calling the solver in this process; 503/504 answers and connection
+errors count as failures. The solves run in the service's worker processes
+there, so no CPU per solve is reported.
+"""
+import sys, os, time, json, itertools, threading, subprocess, argparse, asyncio, urllib.request, urllib.error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock_server
+from bench_stages import percentile
+from geetest_solver import GeetestSolver, AsyncGeetestSolver
+from geetest_solver.server import SolveService, serve
+
+
+def spawn_server(args):
+    """Start mock_server.py on a free port; returns (process, url)."""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py"),
+               "--port", "0", "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+               "--fail-ratio", str(args.fail_ratio), "--pow-bits", str(args.pow_bits), "--count", str(args.count)]
+    if args.fixtures:
+        command += ["--fixtures", args.fixtures]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError("mock server failed to start")
+    return process, line.split()[-1]
+
+
+class Recorder:
+    def __init__(self, total, deadline):
+        self.total = total
+        self.deadline = deadline
+        self.started = itertools.count()
+        self.latencies = []
+        self.failures = {}
+        self.lock = threading.Lock()
+
+    def next(self) -> bool:
+        """Claim the next solve; False once --solves or --duration is used up."""
+        if self.deadline is not None:
+            return time.perf_counter() < self.deadline
+        return next(self.started) < self.total
+
+    def record(self, seconds, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies.append(seconds)
+            else:
+                name = type(error).__name__
+                self.failures[name] = self.failures.get(name, 0) + 1
+
+
+def run_threads(args, recorder, risk_types):
+    def worker(n):
+        risk_type = risk_types[n % len(risk_types)]
+        while recorder.next():
+            solver = GeetestSolver(args.captcha_id, risk_type)
+            start = time.perf_counter()
+            try:
+                solver.solve(max_retries=args.max_retries, hedge_after=args.hedge_after, prefetch=args.prefetch,
+                             max_parallel=args.max_parallel)
+                recorder.record(time.perf_counter() - start)
+            except Exception as e:
+                recorder.record(time.perf_counter() - start, e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+async def run_async(args, recorder, risk_types):
+    async def worker(n):
+        risk_type = risk_types[n % len(risk_types)]
+        while recorder.next():
+            start = time.perf_counter()
+            try:
+                async with AsyncGeetestSolver(args.captcha_id, risk_type) as solver:
+                    await solver.solve(max_retries=args.max_retries)
+                recorder.record(time.perf_counter() - start)
+            except Exception as e:
+                recorder.record(time.perf_counter() - start, e)
+
+    await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+
+
+class HTTPStatus(Exception):
+    pass
+
+
+def start_service(args, url):
+    """SolveService on a free port, its workers pointed at the mock server at ``url``; returns (service, http)."""
+    service = SolveService(workers=args.workers, threads=args.threads, max_queue=args.max_queue, default_deadline=args.deadline,
+                           max_retries=args.max_retries, hedge_after=args.hedge_after, prefetch=args.prefetch,
+                           preload_models="icon" in args.types, initializer=mock_server.point_solvers_at,
+                           initargs=(url,))
+    http = serve(service, port=0)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    return service, http
+
+
+def post_solve(service_url, captcha_id, risk_type):
+    body = json.dumps({"captcha_id": captcha_id, "risk_type": risk_type}).encode()
+    request = urllib.request.Request(f"{service_url}/solve", body, {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as res:
+            res.read()
+    except urllib.error.HTTPError as e:
+        raise HTTPStatus(e.code) from None
+
+
+def run_service(args, recorder, risk_types, service_url):
+    def worker(n):
+        risk_type = risk_types[n % len(risk_types)]
+        while recorder.next():
+            start = time.perf_counter()
+            try:
+                post_solve(service_url, args.captcha_id, risk_type)
+                recorder.record(time.perf_counter() - start)
+            except HTTPStatus as e:
+                with recorder.lock:
+                    recorder.failures[f"HTTP {e}"] = recorder.failures.get(f"HTTP {e}", 0) + 1
+                if str(e) == "503":
+                    time.sleep(0.05)  # shed: back off briefly, as a client honouring Retry-After would
+            except OSError as e:  # URLError, connection reset, socket timeout: keep this client going
+                recorder.record(time.perf_counter() - start, e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end solves against the mock GeeTest server")
+    parser.add_argument("--url", help="Running mock_server.py; spawned with the options below if omitted")
+    mock_server.add_arguments(parser)
+    parser.add_argument("--types", nargs="+", default=["slide", "gobang", "ai"],
+                        help="Risk types, assigned to workers round-robin")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--solves", type=int, default=200, help="Total solves (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of --solves")
+    parser.add_argument("--mode", choices=["thread", "async", "service"], default="thread")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--hedge-after", type=float, help="solve(hedge_after=...) in thread mode")
+    parser.add_argument("--prefetch", action="store_true", help="solve(prefetch=True) in thread mode")
+    parser.add_argument("--max-parallel", type=int, default=2, help="solve(max_parallel=...) in thread mode")
+    parser.add_argument("--workers", type=int, default=2, help="Solver processes in service mode")
+    parser.add_argument("--threads", type=int, default=4, help="Solves per process in service mode")
+    parser.add_argument("--max-queue", type=int, default=64, help="Service queue depth before 503s")
+    parser.add_argument("--deadline", type=float, default=30, help="Service per-request deadline in seconds")
+    parser.add_argument("--captcha-id", default="54088bb07d2df3c46b79f80300b0abbe")
+    parser.add_argument("--json", help="Write the summary as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = spawn_server(args)
+    try:
+        # One warm-up solve per type: imports, models and the asset cache are not part of the steady state
+        if args.mode == "service":
+            service, http = start_service(args, url)
+            for risk_type in args.types:
+                post_solve(http.url, args.captcha_id, risk_type)
+        else:
+            mock_server.point_solvers_at(url)
+            for risk_type in args.types:
+                GeetestSolver(args.captcha_id, risk_type).solve(max_retries=args.max_retries)
+
+        deadline = time.perf_counter() + args.duration if args.duration else None
+        recorder = Recorder(args.solves, deadline)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        if args.mode == "thread":
+            run_threads(args, recorder, args.types)
+        elif args.mode == "service":
+            run_service(args, recorder, args.types, http.url)
+        else:
+            asyncio.run(run_async(args, recorder, args.types))
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+        with urllib.request.urlopen(f"{url}/mock/stats") as res:
+            server_stats = json.load(res)
+        if args.mode == "service":
+            summary_service = service.stats()
+            http.shutdown()
+            service.close()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies = sorted(recorder.latencies)
+    solved = len(latencies)
+    summary = {
+        "mode": args.mode, "types": args.types, "concurrency": args.concurrency,
+        "solves": solved, "failures": recorder.failures, "wall_s": wall,
+        "solves_per_s": solved / wall,
+        "cpu_s_per_solve": cpu / solved if solved and args.mode != "service" else None,
+        "latency_ms": {f"p{q}": percentile(latencies, q) * 1e3 for q in (50, 95, 99)} if solved else {},
+        "server": server_stats,
+    }
+    if args.mode == "service":
+        summary["service"] = summary_service
+    print(f"{solved} solves in {wall:.1f}s ({summary['solves_per_s']:.1f}/s), "
+          f"{sum(recorder.failures.values())} failed {recorder.failures or ''}")
+    if solved:
+        lat = summary["latency_ms"]
+        print(f"latency p50 {lat['p50']:.1f} ms  p95 {lat['p95']:.1f} ms  p99 {lat['p99']:.1f} ms")
+        if summary["cpu_s_per_solve"] is not None:
+            print(f"cpu per solve {summary['cpu_s_per_solve'] * 1e3:.1f} ms")
+    if args.mode == "service":
+        print(f"service: responses={summary_service['responses']} restarts={summary_service['restarts']}")
+    print(f"server: verify={server_stats['verify']} success={server_stats['success']} "
+          f"fail={server_stats['fail']} rejected={server_stats['rejected']}")
+
+    if args.json:
+        if args.json == "-":
+            json.dump(summary, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as f:
+                json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Local stand-in for the GeeTest v4 API, for load tests that must not touch
+(or get rate-limited by) the real service.
+
+Serves ``/load`` (JSONP, a fresh lot_number per call), ``/verify`` and the
+static assets of a fixture set (see fixtures.py; synthetic by default).
+Every ``/verify`` decrypts ``w`` with the server's own RSA key and checks
+the lot number, the lot fields, the PoW and that the solver fields for the
+risk type are present. Bad ``w`` values get an error response and are
+counted per reason in ``/mock/stats``.
+
+The solver must encrypt for this server's key, fetched from ``/mock/pubkey``:
+
+    Signer.use_public_key(RSA.import_key(pem))
+
+Usage:
+    python benchmarks/mock_server.py --port 8931
+    python benchmarks/mock_server.py --fixtures fixtures/ --latency-ms 80 --jitter-ms 40 --fail-ratio 0.1 --pow-bits 12
+"""
+import sys, os, json, time, random, threading, binascii, argparse, mimetypes, uuid, urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Crypto.Cipher import AES, PKCS1_v1_5
+from Crypto.PublicKey import RSA
+from Crypto.Util.Padding import unpad
+
+import fixtures
+from geetest_solver import GeetestSolver, pow as pow_
+from geetest_solver.assets import asset_fetcher
+from geetest_solver.sign import Signer, lotParser
+
+# Fields /verify requires in the decrypted w, besides the pow/lot ones
+ANSWER_FIELDS = {
+    "slide": ("setLeft", "userresponse", "passtime"),
+    "icon": ("userresponse", "passtime"),
+    "gobang": ("userresponse",),
+    "winlinze": ("userresponse",),
+}
+
+
+class InvalidW(Exception):
+    pass
+
+
+class MockGeetest:
+    """
+    Challenge state and /verify checks, independent of the HTTP layer.
+
+    Args:
+        challenges: ``[(risk_type, data, assets)]`` templates, e.g. from ``fixtures.load``
+        latency_ms: Delay added to every /load and /verify
+        jitter_ms: Uniform random extra delay on top of ``latency_ms``
+        fail_ratio: Share of valid answers still answered with ``result: fail``
+        pow_bits: PoW difficulty handed out in pow_detail
+        ttl: Seconds a lot_number stays valid for /verify
+    """
+
+    def __init__(self, challenges, latency_ms: float = 0, jitter_ms: float = 0, fail_ratio: float = 0.0,
+                 pow_bits: int = 0, ttl: float = 60):
+        pow_.zero_digits(pow_bits)  # reject unsatisfiable difficulties up front
+        self.templates = {}
+        self.assets = {}
+        for risk_type, data, assets in challenges:
+            self.templates.setdefault(risk_type, []).append(data)
+            self.assets.update(assets)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_ratio = fail_ratio
+        self.pow_bits = pow_bits
+        self.ttl = ttl
+        self.key = RSA.generate(1024)
+        self._decryptor = PKCS1_v1_5.new(self.key)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {"load": 0, "verify": 0, "success": 0, "fail": 0, "assets": 0}
+        self.rejected = {}
+
+    def public_pem(self) -> bytes:
+        return self.key.public_key().export_key()
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+    def _count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def load(self, captcha_id: str, risk_type: str) -> dict:
+        """The /load response body, or an error body for unknown risk types."""
+        self._count("load")
+        templates = self.templates.get(risk_type)
+        if not templates:
+            return {"status": "error", "code": "-50004", "msg": f"risk_type {risk_type!r} not available"}
+
+        data = dict(random.choice(templates))
+        data["lot_number"] = uuid.uuid4().hex
+        data["pow_detail"] = {"version": "1", "bits": self.pow_bits, "hashfunc": "md5",
+                              "datetime": time.strftime("%Y-%m-%dT%H:%M:%S.000000+08:00")}
+        data["payload"] = uuid.uuid4().hex
+        data["process_token"] = uuid.uuid4().hex
+        data["pt"] = "1"
+        now = time.time()
+        with self.lock:
+            self.pending = {lot: state for lot, state in self.pending.items() if state["expires"] > now}
+            self.pending[data["lot_number"]] = {"captcha_id": captcha_id, "risk_type": risk_type,
+                                                "data": data, "expires": now + self.ttl}
+        return {"status": "success", "data": data}
+
+    def verify(self, params: dict) -> dict:
+        """The /verify response body for the query ``params``."""
+        self._count("verify")
+        with self.lock:
+            state = self.pending.pop(params.get("lot_number"), None)
+        try:
+            if state is None or state["expires"] < time.time():
+                raise InvalidW("unknown or expired lot_number")
+            if params.get("captcha_id") != state["captcha_id"]:
+                raise InvalidW("captcha_id mismatch")
+            self.check_w(params.get("w", ""), state)
+        except InvalidW as e:
+            reason = str(e)
+            with self.lock:
+                self.rejected[reason] = self.rejected.get(reason, 0) + 1
+            return {"status": "error", "code": "-50005", "msg": f"illegal w: {reason}"}
+
+        data = state["data"]
+        if random.random() < self.fail_ratio:
+            self._count("fail")
+            return {"status": "success", "data": {"lot_number": data["lot_number"], "result": "fail", "fail_count": 1}}
+        self._count("success")
+        return {"status": "success", "data": {
+            "lot_number": data["lot_number"],
+            "result": "success",
+            "seccode": {
+                "captcha_id": state["captcha_id"],
+                "lot_number": data["lot_number"],
+                "pass_token": uuid.uuid4().hex,
+                "gen_time": str(int(time.time())),
+                "captcha_output": uuid.uuid4().hex,
+            },
+        }}
+
+    def decrypt_w(self, w: str) -> dict:
+        """Reverse Signer.encrypt_w for pt=1: hex(AES-CBC(payload)) + hex(RSA(aes key))."""
+        key_hex = self.key.size_in_bytes() * 2
+        try:
+            encrypted = binascii.unhexlify(w)
+        except (binascii.Error, ValueError):
+            raise InvalidW("w is not hex")
+        if len(w) <= key_hex:
+            raise InvalidW("w too short")
+        try:
+            aes_key = self._decryptor.decrypt(encrypted[-key_hex // 2:], None)
+        except ValueError:  # larger than our modulus, i.e. encrypted for another key
+            aes_key = None
+        if aes_key is None or len(aes_key) != 16:
+            raise InvalidW("rsa part does not decrypt")
+        try:
+            raw = unpad(AES.new(aes_key, AES.MODE_CBC, b"0000000000000000").decrypt(encrypted[:-key_hex // 2]),
+                        AES.block_size)
+            return json.loads(raw)
+        except ValueError:
+            raise InvalidW("aes part does not decrypt")
+
+    def check_w(self, w: str, state: dict):
+        payload = self.decrypt_w(w)
+        data = state["data"]
+        lot_number = data["lot_number"]
+        if payload.get("lot_number") != lot_number:
+            raise InvalidW("lot_number mismatch")
+        for key, value in lotParser.get_dict(lot_number).items():
+            if payload.get(key) != value:
+                raise InvalidW("lot fields mismatch")
+
+        detail = data["pow_detail"]
+        pow_string = (f"{detail['version']}|{detail['bits']}|{detail['hashfunc']}|{detail['datetime']}|"
+                      f"{state['captcha_id']}|{lot_number}||")
+        pow_msg, pow_sign = payload.get("pow_msg", ""), payload.get("pow_sign", "")
+        if not pow_msg.startswith(pow_string) or not pow_.is_valid(pow_msg, pow_sign, detail["hashfunc"], detail["bits"]):
+            raise InvalidW("invalid pow")
+
+        missing = [f for f in ANSWER_FIELDS.get(state["risk_type"], ()) if f not in payload]
+        if missing:
+            raise InvalidW(f"missing {','.join(missing)}")
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"uptime": time.time() - self.started, **self.counters, "rejected": dict(self.rejected),
+                    "pending": len(self.pending)}
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockGeetestServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_jsonp(self, callback: str, obj: dict):
+        self._send(f"{callback}({json.dumps(obj)})".encode(), "application/javascript")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        mock = self.server.mock
+
+        if url.path == "/load":
+            mock.delay()
+            self._send_jsonp(params.get("callback", "callback"),
+                             mock.load(params.get("captcha_id", ""), params.get("risk_type", "")))
+        elif url.path == "/verify":
+            mock.delay()
+            self._send_jsonp(params.get("callback", "callback"), mock.verify(params))
+        elif url.path.startswith("/static/") and url.path[len("/static/"):] in mock.assets:
+            path = url.path[len("/static/"):]
+            mock._count("assets")
+            self._send(mock.assets[path], mimetypes.guess_type(path)[0] or "application/octet-stream")
+        elif url.path == "/mock/pubkey":
+            self._send(mock.public_pem(), "application/x-pem-file")
+        elif url.path == "/mock/stats":
+            self._send(json.dumps(mock.stats()).encode(), "application/json")
+        else:
+            self._send(b'{"error": "not found"}', "application/json", 404)
+
+
+class MockGeetestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, mock: MockGeetest, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _MockHandler)
+        self.mock = mock
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start(mock: MockGeetest, host: str = "127.0.0.1", port: int = 0) -> MockGeetestServer:
+    """Serve ``mock`` from a daemon thread; returns the server (``.url``, ``.shutdown()``)."""
+    server = MockGeetestServer(mock, host, port)
+    threading.Thread(target=server.serve_forever, name="mock-geetest", daemon=True).start()
+    return server
+
+
+def point_solvers_at(url: str):
+    """Route /load, /verify and static assets to ``url`` and encrypt w for its key."""
+    GeetestSolver.BASE_URL = url
+    asset_fetcher.base_url = f"{url}/static/"
+    with urllib.request.urlopen(f"{url}/mock/pubkey") as res:
+        Signer.use_public_key(RSA.import_key(res.read()))
+
+
+def add_arguments(parser):
+    parser.add_argument("--fixtures", help="Fixture directory (see fixtures.py); synthetic challenges if omitted")
+    parser.add_argument("--count", type=int, default=5, help="Synthetic challenges per type")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--fail-ratio", type=float, default=0.0)
+    parser.add_argument("--pow-bits", type=int, default=0)
+
+
+def from_args(args) -> MockGeetest:
+    challenges = fixtures.load(args.fixtures) if args.fixtures else fixtures.synthetic(args.count)
+    return MockGeetest(challenges, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                       fail_ratio=args.fail_ratio, pow_bits=args.pow_bits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local GeeTest v4 stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8931)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockGeetestServer(from_args(args), args.host, args.port)
+    # First line is machine-readable so loadgen.py can spawn the server on port 0
+    print(f"listening on {server.url}", flush=True)
+    print(f"  GEETEST_API_URL={server.url} GEETEST_STATIC_URL={server.url}/static/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
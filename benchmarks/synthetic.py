@@ -0,0 +1,127 @@
+"""
+Deterministic synthetic GeeTest-like images for the offline benchmarks.
+
+GeeTest assets can't be redistributed or fetched offline, so these mimic
+their structure closely enough to exercise the same code paths: a textured
+340x200 background with a darkened, outlined puzzle hole plus the matching
+RGBA piece, icon captchas with their RGBA question icons, gobang boards, and
+/load payloads referencing them.
+"""
+import cv2
+import numpy as np
+
+BG_SIZE = (200, 340)  # h, w
+PIECE = 62            # square body of the piece, plus a knob on the right
+
+
+def _texture(rng, h, w):
+    img = np.zeros((h, w, 3), np.float32)
+    for scale in (61, 21, 7):
+        noise = rng.random((h, w, 3)).astype(np.float32)
+        img += cv2.GaussianBlur(noise, (scale, scale), 0) * (scale / 30)
+    img = cv2.normalize(img, None, 40, 220, cv2.NORM_MINMAX)
+    for _ in range(6):
+        center = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+        color = tuple(int(c) for c in rng.integers(30, 230, 3))
+        cv2.circle(img, center, int(rng.integers(10, 45)), color, -1)
+    return cv2.GaussianBlur(img, (5, 5), 0).astype(np.uint8)
+
+
+def _piece_mask():
+    size = PIECE + 20
+    mask = np.zeros((size, size), np.uint8)
+    cv2.rectangle(mask, (0, 10), (PIECE - 1, PIECE + 9), 255, -1)
+    cv2.circle(mask, (PIECE + 8, 10 + PIECE // 2), 11, 255, -1)
+    cv2.circle(mask, (PIECE // 2, 10), 9, 255, -1)
+    return mask
+
+
+def make_slide(seed: int):
+    """Return (slice_png_bytes, bg_png_bytes, expected_setLeft)."""
+    rng = np.random.default_rng(seed)
+    h, w = BG_SIZE
+    bg = _texture(rng, h, w)
+    mask = _piece_mask()
+    mh, mw = mask.shape
+    x = int(rng.integers(70, w - mw - 5))
+    y = int(rng.integers(5, h - mh - 5))
+
+    piece = np.zeros((mh, mw, 4), np.uint8)
+    piece[..., :3] = bg[y:y + mh, x:x + mw]
+    piece[..., 3] = mask
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    cv2.drawContours(piece, contours, -1, (235, 235, 235, 255), 2)
+
+    # The hole: darkened area with a light rim
+    roi = bg[y:y + mh, x:x + mw]
+    roi[mask > 0] = (roi[mask > 0] * 0.35).astype(np.uint8)
+    cv2.drawContours(roi, contours, -1, (200, 200, 200), 1)
+
+    slice_png = cv2.imencode(".png", piece)[1].tobytes()
+    bg_png = cv2.imencode(".png", bg)[1].tobytes()
+    return slice_png, bg_png, x + mw // 2 - 41
+
+
+def make_icon(seed: int, n: int = 3):
+    """
+    Return (captcha_jpg_bytes, [question_png_bytes], boxes): n dark RGBA
+    question icons, each drawn light, scaled and rotated somewhere on a
+    300x200 blurred background (boxes are their x1, y1, x2, y2).
+    """
+    rng = np.random.default_rng(seed)
+    bg = cv2.GaussianBlur((rng.random((200, 300, 3)) * 255).astype(np.uint8), (41, 41), 0)
+    icons, boxes = [], []
+    for k in range(n):
+        icon = np.zeros((40, 40, 4), np.uint8)
+        cv2.fillPoly(icon, [rng.integers(4, 36, (5, 2)).astype(np.int32)], (0, 0, 0, 255))
+        cv2.circle(icon, tuple(int(v) for v in rng.integers(8, 32, 2)), 6, (0, 0, 0, 255), 2)
+        icons.append(cv2.imencode(".png", icon)[1].tobytes())
+
+        x = 20 + k * (260 // n) + int(rng.integers(0, 20))
+        y = 30 + int(rng.integers(0, 110))
+        rotation = cv2.getRotationMatrix2D((24, 24), float(rng.uniform(-30, 30)), 1)
+        mask = cv2.warpAffine(cv2.resize(icon[..., 3], (48, 48)), rotation, (48, 48))
+        bg[y:y + 48, x:x + 48][mask > 0] = (235, 235, 235)
+        boxes.append([x, y, x + 48, y + 48])
+    return cv2.imencode(".jpg", bg, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes(), icons, boxes
+
+
+def make_gobang(seed: int, n: int = 5):
+    """A random n x n board with one row that is a single move from n-in-a-row."""
+    rng = np.random.default_rng(seed)
+    board = rng.integers(1, 5, (n, n)).tolist()
+    value, row = int(rng.integers(1, 5)), int(rng.integers(0, n))
+    board[row] = [value] * n
+    board[row][int(rng.integers(0, n))] = 0
+    return board
+
+
+def make_load(risk_type: str, seed: int, pow_bits: int = 0):
+    """
+    A /load ``data`` payload shaped like GeeTest's for ``risk_type``, plus the
+    ``{path: bytes}`` assets it references.
+    """
+    rng = np.random.default_rng(seed)
+    lot_number = "".join(f"{int(v):x}" for v in rng.integers(0, 16, 32))
+    data = {
+        "lot_number": lot_number,
+        "captcha_type": risk_type,
+        "pt": "1",
+        "pow_detail": {"version": "1", "bits": pow_bits, "datetime": "2024-01-01T00:00:00.000000+08:00",
+                       "hashfunc": "md5"},
+        "payload": "", "process_token": "", "payload_protocol": 1,
+    }
+    assets = {}
+    prefix = f"captcha_v4/synthetic/{risk_type}/{lot_number}"
+    if risk_type == "slide":
+        slice_png, bg_png, _ = make_slide(seed)
+        data["slice"], data["bg"] = f"{prefix}/slice.png", f"{prefix}/bg.png"
+        assets = {data["slice"]: slice_png, data["bg"]: bg_png}
+    elif risk_type == "icon":
+        captcha_jpg, icons, _ = make_icon(seed)
+        data["imgs"] = f"{prefix}/img.jpg"
+        data["ques"] = [f"{prefix}/ques_{i}.png" for i in range(len(icons))]
+        assets = {data["imgs"]: captcha_jpg, **dict(zip(data["ques"], icons))}
+    elif risk_type in ("gobang", "winlinze"):
+        data["ques"] = make_gobang(seed)
+    return data, assets
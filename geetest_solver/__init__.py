@@ -1,3 +1,7 @@
 from .solver import GeetestSolver
+from .async_solver import AsyncGeetestSolver, solve_async
+from .metrics import Instrumentation, HistogramAggregator
+from .pool import TokenPool
 
-__all__ = ["GeetestSolver"]
\ No newline at end of file
+__all__ = ["GeetestSolver", "AsyncGeetestSolver", "solve_async", "Instrumentation", "HistogramAggregator",
+           "TokenPool"]
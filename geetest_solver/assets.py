@@ -0,0 +1,82 @@
+"""
+Shared downloader for static.geetest.com assets (slide pieces, backgrounds, icons).
+
+All solvers fetch through one keep-alive ``requests.Session`` so the TLS
+handshake is paid once per pooled connection instead of once per image, and
+``fetch_all`` downloads every asset of a challenge concurrently. Assets
+already in ``cache.asset_cache`` are served without a network round trip.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import AssetCache, asset_cache
+
+STATIC_URL = os.environ.get("GEETEST_STATIC_URL", "https://static.geetest.com/")
+
+
+class AssetFetcher:
+    """
+    Args:
+        base_url: Prefix for relative asset paths
+        max_workers: Concurrent downloads (also the per-host connection pool size)
+        timeout: Per-request timeout in seconds
+        cache: Cache consulted before and filled after every download (None disables it)
+    """
+
+    def __init__(self, base_url: str = STATIC_URL, max_workers: int = 16, timeout: float = 10,
+                 cache: Optional[AssetCache] = asset_cache):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geetest-assets")
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return self.base_url + path.lstrip("/")
+
+    def fetch(self, path: str) -> bytes:
+        """Download one asset, given as a path relative to ``base_url`` or a full URL."""
+        if self.cache is not None:
+            data = self.cache.get(path)
+            if data is not None:
+                return data
+        return self._download(path)
+
+    def _download(self, path: str) -> bytes:
+        response = self.session.get(self.url(path), timeout=self.timeout)
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.put(path, response.content)
+        return response.content
+
+    def fetch_all(self, paths: Iterable[str]) -> Dict[str, bytes]:
+        """Download all ``paths`` concurrently, returning ``{path: bytes}``."""
+        paths = list(dict.fromkeys(paths))
+        result = {}
+        if self.cache is not None:
+            for path in paths:
+                data = self.cache.get(path)
+                if data is not None:
+                    result[path] = data
+        missing = [path for path in paths if path not in result]
+        if len(missing) <= 1:
+            result.update((path, self._download(path)) for path in missing)
+        else:
+            result.update(zip(missing, self.executor.map(self._download, missing)))
+        return {path: result[path] for path in paths}
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+asset_fetcher = AssetFetcher()
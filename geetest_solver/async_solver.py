@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import random
+from concurrent.futures import Executor
+from typing import Optional
+
+from curl_cffi.requests import AsyncSession
+
+from . import capture, metrics
+from .exceptions import LowConfidenceError
+from .sign import Signer
+from .solver import _SolverBase
+
+
+class AsyncGeetestSolver(_SolverBase):
+    """
+    asyncio counterpart of GeetestSolver (a sibling class, not a subclass).
+
+    /load, /verify and the static asset downloads go through a curl_cffi
+    AsyncSession, retries back off with asyncio.sleep, and the CPU-bound part
+    of a solve (PoW, OpenCV, ONNX) runs in ``executor`` (the loop's default
+    thread pool when None), so a single event loop can keep many solves in
+    flight at once.
+    """
+
+    def __init__(self, captcha_id: str, risk_type: str, debug: bool = False,
+                 executor: Optional[Executor] = None, instrumentation: Optional[metrics.Instrumentation] = None,
+                 **kwargs):
+        super().__init__(captcha_id, risk_type, debug=debug, instrumentation=instrumentation, **kwargs)
+        self.executor = executor
+
+    def _create_session(self, **kwargs):
+        return AsyncSession(impersonate="chrome124", **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.session.close()
+
+    async def load_captcha(self):
+        with metrics.span("load"):
+            res = await self.session.get("/load", params=self._load_params())
+        data = self.format_response(res.text)
+        self._log(f"Loaded captcha: type={data.get('captcha_type', 'N/A')}, lot={data.get('lot_number', 'N/A')[:12]}...")
+        return data
+
+    async def _fetch_asset(self, path: str) -> bytes:
+        from .assets import asset_fetcher
+        from .cache import asset_cache
+        data = asset_cache.get(path)
+        if data is not None:
+            return data
+        res = await self.session.get(asset_fetcher.url(path), timeout=10)
+        res.raise_for_status()
+        asset_cache.put(path, res.content)
+        return res.content
+
+    async def fetch_assets(self, data: dict) -> dict:
+        """Download every static asset of the challenge concurrently."""
+        paths = Signer.asset_paths(data, self.risk_type)
+        if not paths:
+            return {}
+        with metrics.span("assets"):
+            contents = await asyncio.gather(*(self._fetch_asset(path) for path in paths))
+        return dict(zip(paths, contents))
+
+    async def submit_captcha(self, data: dict) -> dict:
+        # run_in_executor doesn't carry contextvars over, the stage spans inside need them
+        pow_future = None
+        if Signer.asset_paths(data, self.risk_type):
+            # PoW doesn't need the images: search while they download, generate_w joins it
+            pow_future = Signer.submit_pow(data, self.captcha_id)
+        try:
+            assets = await self.fetch_assets(data)
+        except BaseException:
+            if pow_future is not None:
+                Signer.cancel_pow(pow_future)
+            raise
+        loop = asyncio.get_running_loop()
+        with capture.capture_buffer.session(data["lot_number"], risk_type=self.risk_type, captcha_id=self.captcha_id):
+            capture.add("load", data)
+            w = await loop.run_in_executor(self.executor, contextvars.copy_context().run, Signer.generate_w,
+                                           data, self.captcha_id, self.risk_type, assets, pow_future)
+
+        self.callback = self.random()
+        with metrics.span("verify"):
+            res = await self.session.get("/verify", params=self._verify_params(data, w))
+        return self._captured(self._parse_verify(self.format_response(res.text), data), data)
+
+    @staticmethod
+    async def _async_backoff():
+        with metrics.span("retry_sleep"):
+            await asyncio.sleep(random.uniform(0.5, 1.5))
+
+    async def solve(self, max_retries: int = 5) -> dict:
+        """
+        Solve the captcha with retry logic, without blocking the event loop.
+
+        Args:
+            max_retries: Maximum number of attempts before giving up (default: 5)
+
+        Returns:
+            dict: The seccode dict on success
+
+        Raises:
+            Exception: If all retries are exhausted
+        """
+        for attempt in range(1, max_retries + 1):
+            with metrics.bind(self.instrumentation, risk_type=self.risk_type, attempt=attempt):
+                try:
+                    self._fresh_challenge()
+                    data = await self.load_captcha()
+                    self.lot_number = data["lot_number"]
+                    result = await self.submit_captcha(data)
+
+                    if isinstance(result, dict) and result.get("result") == "fail":
+                        fail_count = result.get("fail_count", "?")
+                        self._log(f"Attempt {attempt}/{max_retries}: FAIL (server fail_count={fail_count})")
+                        metrics.event("attempt", result="fail")
+                        if attempt < max_retries:
+                            await self._async_backoff()
+                            continue
+                        raise Exception(f"Exceeded {max_retries} retries. Last result: fail (fail_count={fail_count})")
+
+                    self._log(f"Attempt {attempt}/{max_retries}: SUCCESS")
+                    metrics.event("attempt", result="success")
+                    return result
+
+                except LowConfidenceError as e:
+                    # Answer would most likely fail: refresh straight away, skipping /verify and the back-off
+                    self._log(f"Attempt {attempt}/{max_retries}: {e}, refreshing challenge")
+                    metrics.event("attempt", result="low_confidence")
+                    if attempt < max_retries:
+                        continue
+                    raise
+
+                except KeyError as e:
+                    self._log(f"Attempt {attempt}/{max_retries}: KeyError - {e}")
+                    metrics.event("attempt", result="error")
+                    if attempt < max_retries:
+                        await self._async_backoff()
+                        continue
+                    raise
+
+                except Exception as e:
+                    if "not implemented" in str(e).lower():
+                        raise
+                    self._log(f"Attempt {attempt}/{max_retries}: Error - {e}")
+                    metrics.event("attempt", result="error")
+                    if attempt < max_retries:
+                        await self._async_backoff()
+                        continue
+                    raise
+
+
+async def solve_async(captcha_id: str, risk_type: str, max_retries: int = 5, **kwargs) -> dict:
+    """One-shot helper: solve a single captcha on the running event loop."""
+    async with AsyncGeetestSolver(captcha_id, risk_type, **kwargs) as solver:
+        return await solver.solve(max_retries=max_retries)
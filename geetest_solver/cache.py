@@ -0,0 +1,157 @@
+"""
+Content-addressed cache for static.geetest.com assets.
+
+GeeTest serves a finite set of backgrounds and icons, so the same images come
+back over and over. Two tiers:
+
+* memory: an LRU of raw bytes keyed by asset path, and an LRU of decoded
+  numpy arrays keyed by (content hash, imread flags) so identical content
+  under different paths is only decoded once
+* disk (optional): raw bytes stored by content hash, plus a path -> hash index,
+  so a restarted worker still skips the download
+
+Decoded arrays are shared between callers and therefore returned read-only.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class _LRU:
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self.items), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class AssetCache:
+    """
+    Args:
+        max_items: Capacity of each in-memory LRU (raw bytes and decoded arrays)
+        disk_dir: Directory for the on-disk tier; None disables it
+    """
+
+    def __init__(self, max_items: int = 512, disk_dir: Optional[str] = None):
+        self._raw = _LRU(max_items)
+        self._decoded = _LRU(max_items)
+        self._lock = threading.Lock()
+        self.disk_dir = disk_dir
+        self.disk_hits = self.disk_writes = 0
+        if disk_dir:
+            os.makedirs(os.path.join(disk_dir, "objects"), exist_ok=True)
+            os.makedirs(os.path.join(disk_dir, "paths"), exist_ok=True)
+
+    def _index_file(self, path: str) -> str:
+        return os.path.join(self.disk_dir, "paths", hashlib.sha1(path.encode("utf-8")).hexdigest())
+
+    def _object_file(self, digest: str) -> str:
+        return os.path.join(self.disk_dir, "objects", digest)
+
+    def get(self, path: str) -> Optional[bytes]:
+        """Raw bytes for ``path`` from memory, then disk; None on a miss."""
+        with self._lock:
+            data = self._raw.get(path)
+        if data is not None or not self.disk_dir:
+            return data
+
+        try:
+            with open(self._index_file(path)) as f:
+                digest = f.read().strip()
+            with open(self._object_file(digest), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if content_hash(data) != digest:
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._raw.put(path, data)
+        return data
+
+    def put(self, path: str, data: bytes):
+        with self._lock:
+            self._raw.put(path, data)
+        if not self.disk_dir:
+            return
+
+        digest = content_hash(data)
+        object_file = self._object_file(digest)
+        try:
+            if not os.path.exists(object_file):
+                # Write-then-rename so concurrent workers never read a partial file
+                tmp = f"{object_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, object_file)
+            tmp = f"{self._index_file(path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(digest)
+            os.replace(tmp, self._index_file(path))
+        except OSError:
+            return
+        with self._lock:
+            self.disk_writes += 1
+
+    def decode(self, data: bytes, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """``cv2.imdecode`` with the result memoised by content hash (read-only array)."""
+        key = (content_hash(data), flags)
+        with self._lock:
+            img = self._decoded.get(key)
+        if img is not None:
+            return img
+
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+        if img is not None:
+            img.setflags(write=False)
+            with self._lock:
+                self._decoded.put(key, img)
+        return img
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "raw": self._raw.stats(),
+                "decoded": self._decoded.stats(),
+                "disk": {"enabled": bool(self.disk_dir), "hits": self.disk_hits, "writes": self.disk_writes},
+            }
+
+    def clear(self):
+        """Drop the in-memory tiers (the disk tier is left alone)."""
+        with self._lock:
+            self._raw.items.clear()
+            self._decoded.items.clear()
+
+
+asset_cache = AssetCache(
+    max_items=int(os.environ.get("GEETEST_ASSET_CACHE_ITEMS", "512")),
+    disk_dir=os.environ.get("GEETEST_ASSET_CACHE_DIR") or None,
+)
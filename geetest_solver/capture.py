@@ -0,0 +1,213 @@
+"""
+Bounded capture of solve inputs and intermediate results, written to disk
+only for solves that /verify rejected.
+
+While a challenge is being solved (``capture_buffer.session(...)``), the
+solvers attach what they saw and decided with ``capture.add(name, value)``:
+raw asset bytes, decoded/processed images (numpy arrays, kept by reference
+and only PNG-encoded when written), boxes, scores and the submitted answer.
+The last ``capacity`` sessions stay in an in-memory ring buffer. When
+/verify answers ``fail`` the session is queued for a background writer,
+subject to ``sample_rate`` and a disk ``quota``; successful ones just age
+out. Nothing touches the disk on the solve path.
+
+Enabled by ``GEETEST_CAPTURE=1`` (or ``GEEKED_DEBUG=1``); when disabled
+``add`` is a single ContextVar lookup.
+
+Environment:
+    GEETEST_CAPTURE_DIR       output directory (default: ./geetest_captures)
+    GEETEST_CAPTURE_SIZE      sessions kept in memory (default: 32)
+    GEETEST_CAPTURE_SAMPLE    share of failed sessions written, 0..1 (default: 1)
+    GEETEST_CAPTURE_QUOTA_MB  stop writing once the directory holds this much (default: 256)
+"""
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Optional
+
+# Entry (dict) of the session running in this context, or None
+_current = contextvars.ContextVar("geetest_capture", default=None)
+
+
+def add(name: str, value: Any):
+    """Attach ``value`` to the capture session of the current context (no-op outside one)."""
+    entry = _current.get()
+    if entry is not None:
+        entry["items"][name] = value
+
+
+class CaptureBuffer:
+    """
+    Args:
+        directory: Where failed sessions are written, one sub-directory each
+        capacity: Sessions kept in memory
+        sample_rate: Share of failed sessions that get written
+        quota_bytes: Total size of ``directory`` above which nothing more is written
+        enabled: False turns ``session`` into a no-op
+    """
+
+    def __init__(self, directory: str = "geetest_captures", capacity: int = 32, sample_rate: float = 1.0,
+                 quota_bytes: int = 256 << 20, enabled: bool = True):
+        self.directory = directory
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.quota_bytes = quota_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()  # lot_number -> entry
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._disk_bytes = None  # scanned on the writer thread before the first write
+        self.counters = {"sessions": 0, "flushed": 0, "written": 0, "sampled_out": 0, "over_quota": 0,
+                         "evicted": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls) -> "CaptureBuffer":
+        return cls(
+            directory=os.environ.get("GEETEST_CAPTURE_DIR", "geetest_captures"),
+            capacity=int(os.environ.get("GEETEST_CAPTURE_SIZE", "32")),
+            sample_rate=float(os.environ.get("GEETEST_CAPTURE_SAMPLE", "1")),
+            quota_bytes=int(float(os.environ.get("GEETEST_CAPTURE_QUOTA_MB", "256")) * (1 << 20)),
+            enabled=os.environ.get("GEETEST_CAPTURE", "0") == "1" or os.environ.get("GEEKED_DEBUG", "0") == "1",
+        )
+
+    @contextmanager
+    def session(self, lot_number: str, **meta):
+        """Capture everything ``add``-ed in this context under ``lot_number``."""
+        if not self.enabled:
+            yield None
+            return
+        entry = {"lot_number": lot_number, "started": time.time(), "meta": meta, "items": {}}
+        with self._lock:
+            self._entries[lot_number] = entry
+            self.counters["sessions"] += 1
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.counters["evicted"] += 1
+        token = _current.set(entry)
+        try:
+            yield entry
+        finally:
+            _current.reset(token)
+
+    def flush(self, lot_number: str, reason: str = "fail", **meta):
+        """Queue the session for writing (if sampled); returns immediately."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.pop(lot_number, None)
+            if entry is None:
+                return
+            self.counters["flushed"] += 1
+            if random.random() >= self.sample_rate:
+                self.counters["sampled_out"] += 1
+                return
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="geetest-capture", daemon=True)
+                self._writer.start()
+        entry["meta"].update(meta, reason=reason)
+        self._queue.put(entry)
+
+    def discard(self, lot_number: str):
+        """Drop a session that needs no capture (e.g. it passed)."""
+        with self._lock:
+            self._entries.pop(lot_number, None)
+
+    def join(self):
+        """Block until every queued session is written (tests, shutdown)."""
+        self._queue.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "buffered": len(self._entries), "queued": self._queue.qsize(),
+                    "disk_bytes": self._disk_bytes}
+
+    # -- background writer -------------------------------------------------
+
+    def _write_loop(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                self._write(entry)
+            except Exception:
+                with self._lock:
+                    self.counters["errors"] += 1
+            finally:
+                self._queue.task_done()
+
+    def _directory_size(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _write(self, entry: dict):
+        if self._disk_bytes is None:
+            self._disk_bytes = self._directory_size()
+        if self._disk_bytes >= self.quota_bytes:
+            with self._lock:
+                self.counters["over_quota"] += 1
+            return
+
+        files, meta = {}, {}
+        for name, value in entry["items"].items():
+            self._collect(_safe(name), value, files, meta)
+        size = sum(len(content) for content in files.values())
+        if self._disk_bytes + size > self.quota_bytes:
+            with self._lock:
+                self.counters["over_quota"] += 1
+            return
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(entry["started"]))
+        target = os.path.join(self.directory, f"{stamp}_{entry['meta'].get('risk_type', 'unknown')}_{entry['lot_number'][:12]}")
+        os.makedirs(target, exist_ok=True)
+        for name, content in files.items():
+            with open(os.path.join(target, name), "wb") as f:
+                f.write(content)
+        body = json.dumps({"lot_number": entry["lot_number"], "started": entry["started"], **entry["meta"],
+                           "items": meta}, indent=1, default=str).encode()
+        with open(os.path.join(target, "capture.json"), "wb") as f:
+            f.write(body)
+        self._disk_bytes += size + len(body)
+        with self._lock:
+            self.counters["written"] += 1
+
+    def _collect(self, name: str, value: Any, files: dict, meta: dict):
+        """Split a captured value into files (bytes, images) and JSON metadata."""
+        if isinstance(value, (bytes, bytearray)):
+            files[f"{name}.bin" if "." not in name else name] = bytes(value)
+        elif _is_image(value):
+            import cv2
+            files[f"{name}.png"] = cv2.imencode(".png", value)[1].tobytes()
+        elif type(value).__module__ == "numpy":
+            meta[name] = value.tolist()
+        elif isinstance(value, dict) and value and all(isinstance(v, (bytes, bytearray)) for v in value.values()):
+            for key, content in value.items():
+                files[f"{name}_{_safe(os.path.basename(str(key)))}"] = bytes(content)
+        elif isinstance(value, (list, tuple)) and value and all(_is_image(v) for v in value):
+            for i, img in enumerate(value):
+                self._collect(f"{name}_{i}", img, files, meta)
+        else:
+            meta[name] = value
+
+
+def _is_image(value: Any) -> bool:
+    return type(value).__module__ == "numpy" and getattr(value, "ndim", 0) >= 2 and value.dtype == "uint8"
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)[:80]
+
+
+capture_buffer = CaptureBuffer.from_env()
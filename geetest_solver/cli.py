@@ -0,0 +1,224 @@
+"""
+Command line entry point (``geetest-solver`` / ``python -m geetest_solver``).
+
+``batch`` reads jobs as JSONL, one object per line::
+
+    {"captcha_id": "54088bb07d2df3c46b79f80300b0abbe", "risk_type": "slide", "proxy": "http://...", "id": "any"}
+
+and writes one JSONL result per job as soon as it finishes (completion
+order, not input order; ``line`` and ``id`` tie results back to jobs).
+At most ``--concurrency`` jobs are solved at once and input is only read
+as workers free up, so a slow consumer of the output throttles reading
+instead of letting jobs pile up in memory. A throughput / latency summary
+goes to stderr at the end.
+
+``serve`` runs the HTTP solve service (see server.py).
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from .solver import GeetestSolver
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _Batch:
+    def __init__(self, args, output):
+        self.args = args
+        self.output = output
+        # Bounded: the reader blocks once every worker is busy and one job is waiting for each
+        self.jobs = queue.Queue(maxsize=args.concurrency)
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = {}
+
+    def _solve(self, solvers: dict, job: dict):
+        captcha_id = job.get("captcha_id") or self.args.captcha_id
+        risk_type = job.get("risk_type") or self.args.risk_type
+        if not captcha_id or not risk_type:
+            raise ValueError("job needs captcha_id and risk_type")
+        key = (captcha_id, risk_type, job.get("proxy"))
+        solver = solvers.get(key)
+        if solver is None:
+            kwargs = {"proxy": job["proxy"]} if job.get("proxy") else {}
+            solver = solvers[key] = GeetestSolver(captcha_id, risk_type, debug=self.args.debug, **kwargs)
+        try:
+            return solver.solve(max_retries=self.args.max_retries, hedge_after=self.args.hedge_after,
+                                prefetch=self.args.prefetch)
+        except Exception:
+            solvers.pop(key).session.close()  # start the next job for this key on a fresh session
+            raise
+
+    def _worker(self):
+        solvers = {}  # one solver (and session) per (captcha_id, risk_type, proxy) for this thread
+        try:
+            while True:
+                item = self.jobs.get()
+                if item is None:
+                    return
+                line, job = item
+                result = {"line": line}
+                if isinstance(job, dict) and "id" in job:
+                    result["id"] = job["id"]
+                start = time.perf_counter()
+                try:
+                    if not isinstance(job, dict):
+                        raise ValueError(job)
+                    seccode = self._solve(solvers, job)
+                    result.update(status="ok", seccode=seccode)
+                except Exception as e:
+                    result.update(status="error", error=f"{type(e).__name__}: {e}")
+                seconds = time.perf_counter() - start
+                result["seconds"] = round(seconds, 3)
+                with self.lock:
+                    if result["status"] == "ok":
+                        self.latencies.append(seconds)
+                    else:
+                        name = result["error"].split(":", 1)[0]
+                        self.errors[name] = self.errors.get(name, 0) + 1
+                    self.output.write(json.dumps(result) + "\n")
+                    self.output.flush()
+        finally:
+            for solver in solvers.values():
+                solver.session.close()
+
+    def run(self, lines) -> dict:
+        workers = [threading.Thread(target=self._worker, name=f"geetest-batch-{i}", daemon=True)
+                   for i in range(self.args.concurrency)]
+        for worker in workers:
+            worker.start()
+        start = time.perf_counter()
+        interrupted = False
+        try:
+            for number, text in enumerate(lines, 1):
+                if not text.strip():
+                    continue
+                try:
+                    job = json.loads(text)
+                except ValueError as e:
+                    job = f"invalid JSON: {e}"
+                self.jobs.put((number, job))
+        except KeyboardInterrupt:
+            interrupted = True  # stop reading; jobs already queued still finish
+        for _ in workers:
+            self.jobs.put(None)
+        for worker in workers:
+            worker.join()
+        return self.summary(time.perf_counter() - start, interrupted)
+
+    def summary(self, wall: float, interrupted: bool) -> dict:
+        latencies = sorted(self.latencies)
+        summary = {
+            "jobs": len(latencies) + sum(self.errors.values()), "solved": len(latencies),
+            "failed": sum(self.errors.values()), "errors": self.errors, "wall_s": round(wall, 3),
+            "solves_per_s": round(len(latencies) / wall, 3) if wall else 0.0,
+        }
+        if latencies:
+            summary["latency_s"] = {"mean": round(sum(latencies) / len(latencies), 3),
+                                    **{f"p{q}": round(_percentile(latencies, q), 3) for q in (50, 95, 99)},
+                                    "max": round(latencies[-1], 3)}
+        if interrupted:
+            summary["interrupted"] = True
+        return summary
+
+
+def batch(args) -> int:
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        summary = _Batch(args, output).run(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    if args.summary_json:
+        with open(args.summary_json, "w") as f:
+            json.dump(summary, f, indent=2)
+    line = (f"[batch] {summary['solved']}/{summary['jobs']} solved in {summary['wall_s']:.1f}s "
+            f"({summary['solves_per_s']:.2f}/s)")
+    if "latency_s" in summary:
+        lat = summary["latency_s"]
+        line += f", latency p50 {lat['p50']:.2f}s p95 {lat['p95']:.2f}s p99 {lat['p99']:.2f}s"
+    if summary["errors"]:
+        line += f", errors {summary['errors']}"
+    print(line, file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+def serve(args) -> int:
+    from .server import SolveService, serve as build_server
+    solver_kwargs = {"proxy": args.proxy} if args.proxy else {}
+    service = SolveService(workers=args.workers, threads=args.threads, max_queue=args.max_queue, default_deadline=args.deadline,
+                           max_deadline=args.max_deadline, kill_grace=args.kill_grace, max_retries=args.max_retries,
+                           hedge_after=args.hedge_after, prefetch=args.prefetch,
+                           preload_models=not args.no_preload, **solver_kwargs)
+    server = build_server(service, args.host, args.port)
+    print(f"[serve] {args.workers}x{args.threads} solvers, listening on {server.url} (POST /solve, GET /metrics)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="geetest-solver", description="GeeTest v4 solver")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("batch", help="Solve JSONL jobs concurrently, streaming JSONL results")
+    p.add_argument("input", nargs="?", default="-", help="JSONL job file (default: stdin)")
+    p.add_argument("-o", "--output", default="-", help="JSONL result file (default: stdout)")
+    p.add_argument("-c", "--concurrency", type=int, default=4, help="Jobs solved at once")
+    p.add_argument("--captcha-id", help="Default for jobs without captcha_id")
+    p.add_argument("--risk-type", help="Default for jobs without risk_type")
+    p.add_argument("--max-retries", type=int, default=5)
+    p.add_argument("--hedge-after", type=float, help="Passed to solve()")
+    p.add_argument("--prefetch", action="store_true", help="Passed to solve()")
+    p.add_argument("--summary-json", help="Also write the summary to this file")
+    p.add_argument("--debug", action="store_true", help="Verbose solver logging (to stdout, so needs -o)")
+    p.set_defaults(func=batch)
+
+    p = commands.add_parser("serve", help="HTTP solve service (POST /solve) on a pool of solver processes")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Solver processes")
+    p.add_argument("-t", "--threads", type=int, default=4, help="Solves each process runs at once")
+    p.add_argument("--max-queue", type=int, default=64, help="Waiting requests before new ones get 503")
+    p.add_argument("--deadline", type=float, default=30, help="Default per-request deadline in seconds")
+    p.add_argument("--max-deadline", type=float, default=120, help="Cap on a request's own deadline")
+    p.add_argument("--kill-grace", type=float, default=10,
+                   help="Seconds a worker may run past a deadline before it is replaced")
+    p.add_argument("--max-retries", type=int, default=5)
+    p.add_argument("--hedge-after", type=float, help="Passed to solve()")
+    p.add_argument("--prefetch", action="store_true", help="Passed to solve()")
+    p.add_argument("--proxy", help="Proxy for every solver session")
+    p.add_argument("--no-preload", action="store_true", help="Load the icon models on first icon solve instead")
+    p.set_defaults(func=serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if min(getattr(args, name, 1) for name in ("concurrency", "workers", "threads")) < 1:
+        build_parser().error("--concurrency, --workers and --threads must be at least 1")
+    if getattr(args, "debug", False) and args.output == "-":
+        build_parser().error("--debug logs to stdout and would mix into the results: use it with -o FILE")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
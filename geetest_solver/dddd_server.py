@@ -1,5 +1,34 @@
+"""
+Icon detection / classification models.
+
+``dddd_service`` is what the solvers use. By default it loads the models in
+process on first use; when ``GEETEST_DDDD_SERVER`` is set (``unix:/path.sock``
+or ``http://host:port``) it is instead a ``RemoteDdddService`` talking to a
+shared inference server started with::
+
+    python -m geetest_solver.dddd_server --unix /tmp/dddd.sock --batch-size 8
+
+so many solver processes share one copy of the models.
+"""
+import argparse
+import hashlib
+import http.client
+import json
 import os
 import pathlib
+import platform
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Union
+
+import cv2
+import numpy as np
 
 
 root_dir = pathlib.Path(__file__).resolve().parent
@@ -7,29 +36,533 @@ onnx_path = os.path.join(root_dir, 'models', 'geetest_v4_icon.onnx')
 charsets_path = os.path.join(root_dir, 'models', 'charsets.json')
 
 
+def det_model_path() -> str:
+    """ddddocr's bundled YOLOX detection model."""
+    import ddddocr
+    return os.path.join(os.path.dirname(ddddocr.__file__), 'common_det.onnx')
+
+
+def _cpu_signature() -> str:
+    """Machine type plus CPU feature flags where the OS exposes them (Linux)."""
+    flags = ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = next((line for line in f if line.startswith("flags")), "")
+    except OSError:
+        pass
+    return f"{platform.machine()}:{hashlib.sha256(flags.encode()).hexdigest()[:8]}"
+
+
+class SessionConfig:
+    """
+    onnxruntime session options for the detector and classifier.
+
+    By default onnxruntime gives every session one intra-op thread per core,
+    and idle threads spin, so N solver processes on one machine run N times
+    as many busy threads as there are cores; cap ``intra_op_threads`` (e.g.
+    cores / processes) and turn ``spinning`` off there. With ``cache_dir``
+    the optimized graph is written once and later starts load it with graph
+    optimization disabled. The file is keyed by the model file, onnxruntime
+    version, machine type and optimization level, since ``all`` can bake in
+    CPU-specific layouts.
+
+    Args:
+        intra_op_threads: Threads per operator (0 = onnxruntime default)
+        inter_op_threads: Threads for independent operators in ``parallel`` mode (0 = default)
+        optimization: Graph optimization level: ``disable``, ``basic``, ``extended`` or ``all``
+        execution_mode: ``sequential`` or ``parallel``
+        spinning: Whether idle intra-op threads busy-wait for work
+        cache_dir: Where optimized graphs are saved and reused (None = re-optimize at every start)
+    """
+
+    LEVELS = {"disable": "ORT_DISABLE_ALL", "basic": "ORT_ENABLE_BASIC", "extended": "ORT_ENABLE_EXTENDED",
+              "all": "ORT_ENABLE_ALL"}
+    MODES = {"sequential": "ORT_SEQUENTIAL", "parallel": "ORT_PARALLEL"}
+
+    def __init__(self, intra_op_threads: int = 0, inter_op_threads: int = 0, optimization: str = "all",
+                 execution_mode: str = "sequential", spinning: bool = True, cache_dir: Optional[str] = None):
+        if optimization not in self.LEVELS:
+            raise ValueError(f"optimization must be one of {', '.join(self.LEVELS)}")
+        if execution_mode not in self.MODES:
+            raise ValueError(f"execution_mode must be one of {', '.join(self.MODES)}")
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.optimization = optimization
+        self.execution_mode = execution_mode
+        self.spinning = spinning
+        self.cache_dir = cache_dir
+
+    @classmethod
+    def from_env(cls) -> "SessionConfig":
+        return cls(
+            intra_op_threads=int(os.environ.get("GEETEST_ORT_INTRA_THREADS", "0")),
+            inter_op_threads=int(os.environ.get("GEETEST_ORT_INTER_THREADS", "0")),
+            optimization=os.environ.get("GEETEST_ORT_OPTIMIZATION", "all"),
+            execution_mode=os.environ.get("GEETEST_ORT_EXECUTION_MODE", "sequential"),
+            spinning=os.environ.get("GEETEST_ORT_SPINNING", "1") == "1",
+            cache_dir=os.environ.get("GEETEST_ORT_CACHE_DIR") or None,
+        )
+
+    def options(self, optimization: Optional[str] = None):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.graph_optimization_level = getattr(onnxruntime.GraphOptimizationLevel,
+                                                   self.LEVELS[optimization or self.optimization])
+        options.execution_mode = getattr(onnxruntime.ExecutionMode, self.MODES[self.execution_mode])
+        if not self.spinning:
+            options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+            options.add_session_config_entry("session.inter_op.allow_spinning", "0")
+        return options
+
+    def _cache_file(self, model_path: str) -> str:
+        import onnxruntime
+        stat = os.stat(model_path)
+        key = f"{os.path.abspath(model_path)}|{stat.st_size}|{stat.st_mtime_ns}|{onnxruntime.__version__}|" \
+              f"{_cpu_signature()}|{self.optimization}"
+        name = pathlib.Path(model_path).stem
+        return os.path.join(self.cache_dir, f"{name}.{hashlib.sha256(key.encode()).hexdigest()[:16]}.onnx")
+
+    def session(self, model_path: str):
+        """CPU ``InferenceSession`` for ``model_path``, through the optimized-graph cache when enabled."""
+        import onnxruntime
+        providers = ['CPUExecutionProvider']
+        if self.cache_dir is None or self.optimization == "disable":
+            return onnxruntime.InferenceSession(model_path, self.options(), providers=providers)
+
+        cached = self._cache_file(model_path)
+        if os.path.exists(cached):
+            try:
+                return onnxruntime.InferenceSession(cached, self.options("disable"), providers=providers)
+            except Exception:
+                pass  # unreadable (e.g. truncated by a crash); re-optimize over it
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        options = self.options()
+        options.log_severity_level = 3  # the "hardware specific optimizations" warning; the cache key covers it
+        tmp = f"{cached}.{os.getpid()}.tmp"
+        options.optimized_model_filepath = tmp
+        session = onnxruntime.InferenceSession(model_path, options, providers=providers)
+        if os.path.exists(tmp):
+            os.replace(tmp, cached)  # atomic, so concurrent workers never load a partial file
+        return session
+
+
+class YoloxDetector:
+    """
+    ddddocr's detection model run on onnxruntime directly.
+
+    Pre/post-processing mirror ``ddddocr``'s ``get_bbox`` so the boxes are
+    identical to ``DdddOcr(det=True).detection``, but images may be passed
+    decoded and several can go through one ``detect_batch`` call: stacked into
+    one tensor when the model has a dynamic batch axis, back to back on the
+    same session otherwise (the stock model is exported with batch size 1).
+    """
+
+    INPUT_SIZE = (416, 416)
+    STRIDES = (8, 16, 32)
+
+    def __init__(self, model_path: Optional[str] = None, config: Optional[SessionConfig] = None):
+        self.session = (config or SessionConfig.from_env()).session(model_path or det_model_path())
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+
+        # Anchor grid of the YOLOX head, identical for every image
+        grids, strides = [], []
+        for stride in self.STRIDES:
+            hsize, wsize = self.INPUT_SIZE[0] // stride, self.INPUT_SIZE[1] // stride
+            xv, yv = np.meshgrid(np.arange(wsize), np.arange(hsize))
+            grid = np.stack((xv, yv), 2).reshape(1, -1, 2)
+            grids.append(grid)
+            strides.append(np.full((*grid.shape[:2], 1), stride))
+        self._grids = np.concatenate(grids, 1)
+        self._strides = np.concatenate(strides, 1)
+
+    @staticmethod
+    def _decode(img: Union[bytes, np.ndarray]) -> np.ndarray:
+        if isinstance(img, np.ndarray):
+            return img
+        return cv2.imdecode(np.frombuffer(img, np.uint8), cv2.IMREAD_COLOR)
+
+    def preprocess(self, img: np.ndarray):
+        padded_img = np.full((self.INPUT_SIZE[0], self.INPUT_SIZE[1], 3), 114, dtype=np.uint8)
+        r = min(self.INPUT_SIZE[0] / img.shape[0], self.INPUT_SIZE[1] / img.shape[1])
+        h, w = int(img.shape[0] * r), int(img.shape[1] * r)
+        # Resize straight into the padded canvas (input is uint8 BGR, so no dtype conversion)
+        cv2.resize(img, (w, h), dst=padded_img[:h, :w], interpolation=cv2.INTER_LINEAR)
+        return np.ascontiguousarray(padded_img.transpose((2, 0, 1)), dtype=np.float32), r
+
+    @staticmethod
+    def _nms(boxes, scores, nms_thr):
+        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+        order = scores.argsort()[::-1]
+        keep = []
+        while order.size > 0:
+            i = order[0]
+            keep.append(i)
+            xx1 = np.maximum(x1[i], x1[order[1:]])
+            yy1 = np.maximum(y1[i], y1[order[1:]])
+            xx2 = np.minimum(x2[i], x2[order[1:]])
+            yy2 = np.minimum(y2[i], y2[order[1:]])
+            w = np.maximum(0.0, xx2 - xx1 + 1)
+            h = np.maximum(0.0, yy2 - yy1 + 1)
+            inter = w * h
+            ovr = inter / (areas[i] + areas[order[1:]] - inter)
+            order = order[np.where(ovr <= nms_thr)[0] + 1]
+        return keep
+
+    def postprocess(self, output: np.ndarray, ratio: float, shape, nms_thr=0.45, score_thr=0.1) -> List[List[int]]:
+        """Boxes for one image from its (1, anchors, 6) model output."""
+        output[..., :2] = (output[..., :2] + self._grids) * self._strides
+        output[..., 2:4] = np.exp(output[..., 2:4]) * self._strides
+        predictions = output[0]
+
+        boxes = predictions[:, :4]
+        scores = predictions[:, 4:5] * predictions[:, 5:]
+        boxes_xyxy = np.ones_like(boxes)
+        boxes_xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2.
+        boxes_xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2.
+        boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2.
+        boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2.
+        boxes_xyxy /= ratio
+
+        cls_inds = scores.argmax(1)
+        cls_scores = scores[np.arange(len(cls_inds)), cls_inds]
+        valid = cls_scores > score_thr
+        if not valid.any():
+            return []
+        valid_boxes = boxes_xyxy[valid]
+        keep = self._nms(valid_boxes, cls_scores[valid], nms_thr)
+
+        h, w = shape[:2]
+        result = []
+        for b in valid_boxes[keep].tolist():
+            result.append([
+                0 if b[0] < 0 else int(b[0]),
+                0 if b[1] < 0 else int(b[1]),
+                int(w) if b[2] > w else int(b[2]),
+                int(h) if b[3] > h else int(b[3]),
+            ])
+        return result
+
+    def detect(self, img: Union[bytes, np.ndarray]) -> List[List[int]]:
+        return self.detect_batch([img])[0]
+
+    def detect_batch(self, imgs: List[Union[bytes, np.ndarray]]) -> List[List[List[int]]]:
+        decoded = [self._decode(img) for img in imgs]
+        tensors, ratios = zip(*(self.preprocess(img) for img in decoded))
+
+        if self.dynamic_batch and len(tensors) > 1:
+            outputs = self.session.run(None, {self.input_name: np.stack(tensors)})[0]
+            outputs = [outputs[i:i + 1] for i in range(len(tensors))]
+        else:
+            outputs = [self.session.run(None, {self.input_name: t[None]})[0] for t in tensors]
+
+        return [self.postprocess(out, r, img.shape) for out, r, img in zip(outputs, ratios, decoded)]
+
+
+class DetectionBatcher:
+    """
+    Queue in front of a ``detect_batch`` callable, drained by one inference thread.
+
+    Requests are collected for up to ``max_wait_ms`` after the first one
+    arrives (or until ``max_batch`` are queued), handed to ``detect_batch``
+    together, and each caller gets its own boxes back via a Future.
+
+    Only a detection model with a dynamic batch axis turns that into one
+    stacked run. The stock ddddocr model has a fixed batch size of 1, so
+    ``YoloxDetector.detect_batch`` runs the collected images back to back:
+    no throughput gain, just concurrent callers serialized on one thread
+    (plus up to ``max_wait_ms`` of extra latency).
+    """
+
+    def __init__(self, detect_batch: Callable[[list], list], max_batch: int = 8, max_wait_ms: float = 2.0):
+        self.detect_batch = detect_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = self.images = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="dddd-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, img) -> Future:
+        future = Future()
+        self._queue.put((img, future))
+        return future
+
+    def detection(self, img) -> List[List[int]]:
+        return self.submit(img).result()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            batch = [(img, future) for img, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.images += len(batch)
+            try:
+                results = self.detect_batch([img for img, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), boxes in zip(batch, results):
+                    future.set_result(boxes)
+
+
 class DdddService:
-    def __init__(self):
+    """
+    Args:
+        batch_size: Above 1, detection goes through a ``DetectionBatcher`` collecting up to this
+            many images (only stacked into one run for a dynamic-batch model, see there);
+            1 runs detection inline on the calling thread
+        max_wait_ms: How long the batcher waits for more images after the first one
+        config: onnxruntime options for both models (default: ``SessionConfig.from_env()``)
+    """
+
+    def __init__(self, batch_size: int = 1, max_wait_ms: float = 2.0, config: Optional[SessionConfig] = None):
         import ddddocr
-        self.det = ddddocr.DdddOcr(det=True, show_ad=False)
+        config = config or SessionConfig.from_env()
+        self.det = YoloxDetector(config=config)
         self.cnn = ddddocr.DdddOcr(det=False, ocr=False,
                                    show_ad=False,
                                    import_onnx_path=onnx_path,
                                    charsets_path=charsets_path)
+        # ddddocr builds its session with default options; swap in one with ours (ddddocr >= 1.6 layout)
+        engine = getattr(self.cnn, "ocr_engine", None)
+        if engine is not None and hasattr(engine, "session"):
+            engine.session = config.session(onnx_path)
+        else:
+            print("[dddd_server] ddddocr has no ocr_engine.session (needs ddddocr >= 1.6), "
+                  "the classifier keeps its default onnxruntime options", file=sys.stderr)
+        self.batcher = DetectionBatcher(self.det.detect_batch, batch_size, max_wait_ms) if batch_size > 1 else None
 
     def detection(self, img):
-        return self.det.detection(img)
+        """Bounding boxes ``[x1, y1, x2, y2]`` for encoded image bytes or a decoded BGR array."""
+        if self.batcher is not None:
+            return self.batcher.detection(img)
+        return self.det.detect(img)
 
     def classification(self, img):
         return self.cnn.classification(img)
 
 
+class _InferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_InferenceServerMixin"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, obj, status=200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json({"status": "ok", "uptime": time.time() - self.server.started})
+        elif self.path == "/stats":
+            self._send_json(self.server.stats())
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path not in ("/detection", "/classification"):
+            self._send_json({"error": "not found"}, 404)
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        img = body
+        if self.headers.get("Content-Type") == RemoteDdddService.NDARRAY_TYPE:
+            shape = tuple(int(x) for x in self.headers["X-Shape"].split(","))
+            img = np.frombuffer(body, dtype=np.uint8).reshape(shape)
+
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+        start = time.perf_counter()
+        try:
+            if self.path == "/detection":
+                result = server.service.detection(img)
+            else:
+                result = server.service.classification(img)
+        except Exception as e:
+            with server.lock:
+                server.errors += 1
+            self._send_json({"error": str(e)}, 500)
+            return
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+                server.requests[self.path] = server.requests.get(self.path, 0) + 1
+                server.busy_seconds += time.perf_counter() - start
+        self._send_json({"result": result})
+
+
+class _InferenceServerMixin:
+    daemon_threads = True
+
+    def setup_service(self, service: "DdddService"):
+        self.service = service
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.in_flight = self.errors = 0
+        self.busy_seconds = 0.0
+        self.requests = {}
+
+    def stats(self) -> dict:
+        batcher = self.service.batcher
+        with self.lock:
+            total = sum(self.requests.values())
+            return {
+                "uptime": time.time() - self.started,
+                "in_flight": self.in_flight,
+                "queue_depth": batcher.qsize() if batcher is not None else 0,
+                "requests": dict(self.requests),
+                "errors": self.errors,
+                "avg_latency_ms": self.busy_seconds / total * 1000 if total else 0.0,
+                "batches": batcher.batches if batcher is not None else total,
+                "batched_images": batcher.images if batcher is not None else total,
+            }
+
+
+class InferenceHTTPServer(_InferenceServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class InferenceUnixServer(_InferenceServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects an (host, port) style client address
+        return request, ("unix", 0)
+
+
+def serve(service: "DdddService", unix_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 9090):
+    """Build the inference server (call ``serve_forever()`` on the result)."""
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.unlink(unix_path)
+        server = InferenceUnixServer(unix_path, _InferenceHandler)
+    else:
+        server = InferenceHTTPServer((host, port), _InferenceHandler)
+    server.setup_service(service)
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class RemoteDdddService:
+    """
+    Drop-in ``DdddService`` that forwards to an inference server.
+
+    Args:
+        address: ``unix:/path/to.sock`` or ``http://host:port``
+        timeout: Socket timeout in seconds
+    """
+
+    NDARRAY_TYPE = "application/x-uint8-ndarray"
+
+    def __init__(self, address: str, timeout: float = 30):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.address.startswith("unix:"):
+                conn = _UnixHTTPConnection(self.address[len("unix:"):], self.timeout)
+            else:
+                hostport = self.address.split("://", 1)[-1].rstrip("/")
+                conn = http.client.HTTPConnection(hostport, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        # One retry on a fresh connection covers the server closing an idle keep-alive socket
+        for retry in (False, True):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (ConnectionError, http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if retry:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"Inference server error on {path}: {payload.get('error')}")
+        return payload
+
+    def _post(self, path: str, img):
+        if isinstance(img, np.ndarray):
+            img = np.ascontiguousarray(img, dtype=np.uint8)
+            headers = {"Content-Type": self.NDARRAY_TYPE, "X-Shape": ",".join(map(str, img.shape))}
+            body = img.tobytes()
+        else:
+            headers = {"Content-Type": "application/octet-stream"}
+            body = bytes(img)
+        return self._request("POST", path, body, headers)["result"]
+
+    def detection(self, img):
+        return self._post("/detection", img)
+
+    def classification(self, img):
+        return self._post("/classification", img)
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def stats(self) -> dict:
+        return self._request("GET", "/stats")
+
+
 # Lazy-loaded singleton instance for icon.py to import
 _dddd_service_instance = None
+_dddd_service_lock = threading.Lock()
 
 def _get_dddd_service():
     global _dddd_service_instance
-    if _dddd_service_instance is None:
-        _dddd_service_instance = DdddService()
+    with _dddd_service_lock:
+        if _dddd_service_instance is None and os.environ.get("GEETEST_DDDD_SERVER"):
+            _dddd_service_instance = RemoteDdddService(os.environ["GEETEST_DDDD_SERVER"])
+        elif _dddd_service_instance is None:
+            _dddd_service_instance = DdddService(
+                batch_size=int(os.environ.get("GEETEST_DET_BATCH_SIZE", "1")),
+                max_wait_ms=float(os.environ.get("GEETEST_DET_MAX_WAIT_MS", "2")),
+            )
     return _dddd_service_instance
 
 class _LazyDdddService:
@@ -38,3 +571,28 @@ class _LazyDdddService:
         return getattr(_get_dddd_service(), name)
 
 dddd_service = _LazyDdddService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared ddddocr inference server for geetest_solver workers")
+    parser.add_argument("--unix", type=str, default=None, help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9090)
+    parser.add_argument("--batch-size", type=int, default=8, help="Max images per detection batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="Batching window after the first queued image")
+    args = parser.parse_args()
+
+    server = serve(DdddService(batch_size=args.batch_size, max_wait_ms=args.max_wait_ms),
+                   unix_path=args.unix, host=args.host, port=args.port)
+    where = f"unix:{args.unix}" if args.unix else f"http://{args.host}:{args.port}"
+    print(f"[dddd_server] Serving on {where} (set GEETEST_DDDD_SERVER={where} in solver workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+class LowConfidenceError(Exception):
+    """
+    Raised by a vision solver when its answer is likely wrong.
+
+    ``GeetestSolver.solve`` reacts by loading a fresh challenge right away
+    instead of spending a /verify round trip on an answer that will fail.
+    """
+
+    def __init__(self, confidence: float, threshold: float):
+        super().__init__(f"Low match confidence {confidence:.2f} < {threshold:.2f}")
+        self.confidence = confidence
+        self.threshold = threshold
@@ -1,4 +1,6 @@
-from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
 
 
 class GobangSolver:
@@ -7,24 +9,94 @@ class GobangSolver:
         self.n = len(ques)
 
     def find_four_in_line(self) -> list[list[int]] | None:
-        for line in self._iterate_lines():
-            elements = [self.board[r][c] for r, c in line]
-            freq = self._count_freq(elements)
+        """
+        Find a line that is one move away from n-in-a-row: [[remove_r, remove_c], [fill_r, fill_c]].
+
+        A line qualifies when it has exactly one empty (0) cell and its other
+        n-1 cells share one value; the piece to move is the first cell of that
+        value (row-major) outside the line. Lines are tried in the order of
+        ``_iterate_lines``.
+        """
+        n = self.n
+        if n < 3:
+            # n-1 pieces + an empty cell is only unambiguous from n=3 on
+            return None
 
-            if self.n - 1 not in freq.values() or freq.get(0) == self.n - 1:
+        # A single 5x5 board is faster in plain Python over the cached tables than through NumPy
+        flat = [v for row in self.board for v in row]
+        for line in self._line_lists(n):
+            values = [flat[i] for i in line]
+            if values.count(0) != 1:
+                continue
+            target = values[0] or values[1]
+            if values.count(target) != n - 1:
                 continue
+            members = set(line)
+            for idx, v in enumerate(flat):
+                if v == target and idx not in members:
+                    fill = line[values.index(0)]
+                    return [[idx // n, idx % n], [fill // n, fill % n]]
+        return None
 
-            correct_num = next(num for num, cnt in freq.items() if cnt == self.n - 1)
-            try:
-                zero_idx = elements.index(0)
-            except ValueError:
+    @classmethod
+    def solve_batch(cls, boards: list) -> list:
+        """
+        ``find_four_in_line`` for many boards. Boards of the same size are
+        stacked into one (B, n*n) array and every line of every board is
+        checked with vectorised counts.
+        """
+        results = [None] * len(boards)
+        by_size = {}
+        for idx, board in enumerate(boards):
+            by_size.setdefault(len(board), []).append(idx)
+
+        for n, indices in by_size.items():
+            if n < 3:
                 continue
+            table = cls._line_table(n)
+            flat = np.asarray([boards[i] for i in indices]).reshape(len(indices), n * n)
+            values = flat[:, table]                                         # (B, lines, n)
+
+            top = values.max(axis=-1)                                       # (B, lines)
+            one_empty = (values == 0).sum(axis=-1) == 1
+            rest_equal = np.where(values == 0, top[..., None], values).min(axis=-1) == top
+            # ...and a piece of that value outside the line (board-wide count >= n)
+            movable = (flat[:, None, :] == top[..., None]).sum(axis=-1) >= n
+            valid = one_empty & rest_equal & movable
+
+            found = valid.any(axis=1)
+            first = valid.argmax(axis=1)                                    # first qualifying line per board
+            rows = np.arange(len(indices))
+            lines = table[first]                                            # (B, n)
+            target = top[rows, first]
+            fill = lines[rows, (values[rows, first] != 0).argmin(axis=1)]
+            candidates = flat == target[:, None]
+            np.put_along_axis(candidates, lines, False, axis=1)
+            remove = candidates.argmax(axis=1)
 
-            fill_pos = line[zero_idx]
-            remove_pos = self._find_remove_candidate(correct_num, line)
+            for row in np.flatnonzero(found).tolist():
+                r, f = int(remove[row]), int(fill[row])
+                results[indices[row]] = [[r // n, r % n], [f // n, f % n]]
+        return results
 
-            if remove_pos:
-                return [[remove_pos[0], remove_pos[1]], [fill_pos[0], fill_pos[1]]]
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _line_lists(n: int) -> tuple:
+        return tuple(tuple(line) for line in GobangSolver._line_table(n).tolist())
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _line_table(n: int) -> np.ndarray:
+        """
+        Flat board indices of every full-length line (rows, columns, both
+        diagonals), in ``_iterate_lines`` order; built once per board size.
+        Shorter diagonals can never hold n-1 pieces plus an empty cell.
+        """
+        table = [[r * n + c for r, c in line] for line in GobangSolver(np.zeros((n, n)))._iterate_lines()
+                 if len(line) == n]
+        table = np.array(table, dtype=np.intp)
+        table.setflags(write=False)
+        return table
 
     def _iterate_lines(self):
         for row in range(self.n):
@@ -36,22 +108,8 @@ class GobangSolver:
             yield [(start_row + i, i) for i in range(self.n - start_row)]
         for start_col in range(1, self.n):
             yield [(i, start_col + i) for i in range(self.n - start_col)]
-            
+
         for start_row in range(self.n):
             yield [(start_row - i, i) for i in range(start_row + 1)]
         for start_col in range(1, self.n):
             yield [(self.n - 1 - i, start_col + i) for i in range(self.n - start_col)]
-
-    @staticmethod
-    def _count_freq(elements):
-        freq = {}
-        for num in elements:
-            freq[num] = freq.get(num, 0) + 1
-        return freq
-
-    def _find_remove_candidate(self, target, exclude):
-        exclude_set = set(exclude)
-        for r in range(self.n):
-            for c in range(self.n):
-                if (r, c) not in exclude_set and self.board[r][c] == target:
-                    return r, c
\ No newline at end of file
@@ -1,10 +1,88 @@
 import cv2
 import numpy as np
-import requests
 import random
 import os
-import time
-from typing import List
+from typing import Dict, List, Optional
+
+from .assets import asset_fetcher
+from .cache import asset_cache
+from . import capture, metrics
+from .exceptions import LowConfidenceError
+
+
+def assign_icons(scores: np.ndarray) -> List[int]:
+    """
+    Optimal question -> crop assignment (Hungarian algorithm, maximising the total score).
+
+    Returns the crop index for every question (row), or -1 for questions left
+    over when there are more questions than crops.
+    """
+    n_rows, n_cols = scores.shape
+    if n_rows == 0 or n_cols == 0:
+        return [-1] * n_rows
+    if n_rows > n_cols:
+        by_col = assign_icons(scores.T)
+        result = [-1] * n_rows
+        for c_idx, q_idx in enumerate(by_col):
+            result[q_idx] = c_idx
+        return result
+
+    # Minimise cost = max - score; rows <= cols. 1-based potentials as in the classic O(n^2 m) formulation.
+    cost = scores.max() - scores
+    inf = float("inf")
+    u = [0.0] * (n_rows + 1)
+    v = [0.0] * (n_cols + 1)
+    p = [0] * (n_cols + 1)  # p[j] = row matched to column j
+    way = [0] * (n_cols + 1)
+    for i in range(1, n_rows + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (n_cols + 1)
+        used = [False] * (n_cols + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], inf, 0
+            for j in range(1, n_cols + 1):
+                if not used[j]:
+                    cur = cost[i0 - 1, j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(n_cols + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    result = [-1] * n_rows
+    for j in range(1, n_cols + 1):
+        if p[j]:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+def assignment_confidence(scores: np.ndarray, assignment: List[int]) -> float:
+    """
+    Smallest per-question margin between the assigned crop's score and the
+    best other crop's score. Near zero (or negative) means at least one
+    question was close to ambiguous; 0.0 if any question is unmatched or scored 0.
+    """
+    margins = []
+    for q_idx, c_idx in enumerate(assignment):
+        if c_idx == -1 or scores[q_idx, c_idx] <= 0:
+            return 0.0
+        others = np.delete(scores[q_idx], c_idx)
+        margins.append(scores[q_idx, c_idx] - (others.max() if others.size else 0.0))
+    return float(min(margins)) if margins else 0.0
 
 
 class IconSolver:
@@ -16,21 +94,23 @@ class IconSolver:
     """
 
     DEBUG = os.environ.get("GEEKED_DEBUG", "0") == "1"
+    # Raise LowConfidenceError (-> fresh challenge, no /verify) below this margin; None disables
+    MIN_CONFIDENCE = float(os.environ["GEETEST_ICON_MIN_CONFIDENCE"]) if os.environ.get("GEETEST_ICON_MIN_CONFIDENCE") else None
 
-    def __init__(self, imgs: str, ques: List[str]):
-        self.captcha_bytes = self.load_image(f'https://static.geetest.com/{imgs}')
-        self.captcha_img = cv2.imdecode(
-            np.frombuffer(self.captcha_bytes, dtype=np.uint8), cv2.IMREAD_COLOR
-        )
-        self.ques_urls = [f'https://static.geetest.com/{q}' for q in ques]
-        self.ques_imgs = [self._load_icon(url) for url in self.ques_urls]
-        
-        if self.DEBUG:
-            # Save raw inputs for diagnosis
-            ts = int(time.time())
-            cv2.imwrite(f"debug_captcha_{ts}.jpg", self.captcha_img)
-            for i, qimg in enumerate(self.ques_imgs):
-                cv2.imwrite(f"debug_ques_{ts}_{i}.png", qimg)
+    def __init__(self, imgs: str, ques: List[str], assets: Optional[Dict[str, bytes]] = None):
+        # Pre-fetched bytes keyed by asset path; anything missing is downloaded
+        self.assets = dict(assets or {})
+        self._ques = ques
+        self.captcha_bytes = self._get_asset(imgs)
+        self.captcha_img = asset_cache.decode(self.captcha_bytes, cv2.IMREAD_COLOR)
+        # Feature extraction objects, shared by every icon and crop of this solve
+        self._orb = cv2.ORB_create(nfeatures=500, edgeThreshold=5)
+        self._matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        self._clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+        self.ques_urls = [asset_fetcher.url(q) for q in ques]
+        self.ques_imgs = [self._load_icon(q) for q in ques]
+        # Kept for diagnosis if /verify rejects this solve (see capture.py)
+        capture.add("icon_ques", self.ques_imgs)
 
     @staticmethod
     def _log(msg: str):
@@ -39,85 +119,60 @@ class IconSolver:
 
     @staticmethod
     def load_image(url: str) -> bytes:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.content
-
-    def _load_icon(self, url: str) -> np.ndarray:
-        """Load a question icon from URL and return as grayscale image."""
-        content = self.load_image(url)
-        img = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
-        
-        # Handle PNG with alpha channel
-        if img is not None and len(img.shape) == 3 and img.shape[2] == 4:
-            alpha = img[:, :, 3] / 255.0
-            rgb = img[:, :, :3]
-            # Composite onto white background
-            white_bg = np.ones_like(rgb) * 255
-            composited = (rgb * alpha[:, :, np.newaxis] + white_bg * (1 - alpha[:, :, np.newaxis])).astype(np.uint8)
-            img = composited
-        
-        if img is not None and len(img.shape) == 3:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            # Invert the question icon to match crop polarity (light-on-dark)
-            # Question is black-on-transparent -> black-on-white -> invert -> white-on-black
-            img = cv2.bitwise_not(img)
-            
-        return img
-
-    def _match_score(self, icon: np.ndarray, crop: np.ndarray) -> float:
+        return asset_fetcher.fetch(url)
+
+    def _get_asset(self, path: str) -> bytes:
+        if path not in self.assets:
+            self.assets |= asset_fetcher.fetch_all([path, *self._ques])
+        return self.assets[path]
+
+    def _load_icon(self, path: str) -> np.ndarray:
+        """Load a question icon by asset path and return as grayscale image."""
+        content = self._get_asset(path)
+        img = asset_cache.decode(content, cv2.IMREAD_UNCHANGED)
+        if img is None or img.ndim != 3:
+            return img
+
+        # Question is black-on-transparent -> black-on-white -> invert -> white-on-black,
+        # to match crop polarity (light-on-dark). All in uint8 on fresh buffers (the
+        # decoded array is shared through the asset cache and read-only).
+        gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+        cv2.bitwise_not(gray, dst=gray)
+        if img.shape[2] == 4:
+            # Compositing onto white then inverting == scaling the inverted icon by alpha
+            cv2.multiply(gray, cv2.extractChannel(img, 3), dst=gray, scale=1 / 255)
+        return gray
+
+    def _describe(self, img: np.ndarray) -> Optional[np.ndarray]:
+        """ORB descriptors of one image, or None if it has too few keypoints to match."""
+        try:
+            _, des = self._orb.detectAndCompute(img, None)
+        except Exception as e:
+            self._log(f"Match error: {e}")
+            return None
+        if des is None or len(des) < 2:
+            return None
+        return des
+
+    def _score(self, des1: Optional[np.ndarray], des2: Optional[np.ndarray]) -> float:
         """
-        Compare two images using ORB feature matching.
-        Returns a similarity score (higher is better).
+        Similarity of two described images (higher is better).
+        Simple heuristic: count good matches (distance < 64).
         """
+        if des1 is None or des2 is None:
+            return 0.0
         try:
-            orb = cv2.ORB_create(nfeatures=500, edgeThreshold=5)
-            kp1, des1 = orb.detectAndCompute(icon, None)
-            kp2, des2 = orb.detectAndCompute(crop, None)
-
-            if des1 is None or des2 is None or len(des1) < 2 or len(des2) < 2:
-                return 0.0
-
-            bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-            matches = bf.match(des1, des2)
-            
-            if not matches:
-                return 0.0
-                
-            # Sort matches by distance
-            matches = sorted(matches, key=lambda x: x.distance)
-            
-            # Simple heuristic: count good matches
-            # Filter matches with distance < 25 (very strict) or relative check
-            good_matches = [m for m in matches if m.distance < 64]
-            
-            if not good_matches:
-                return 0.0
-                
-            score = len(good_matches)
-            return float(score)
-            
+            matches = self._matcher.match(des1, des2)
         except Exception as e:
             self._log(f"Match error: {e}")
             return 0.0
+        return float(sum(1 for m in matches if m.distance < 64))
 
-    def find_icon_position(self) -> List[List[float]]:
-        """
-        Find positions of question icons in the captcha image.
-        """
-        from .dddd_server import dddd_service
-        
-        # 1. Detect all icons in the captcha image using ddddocr
-        self._log(f"Running detection on {len(self.captcha_bytes)} bytes...")
-        bboxes = dddd_service.detection(self.captcha_bytes)
-        
+    def _crops(self, bboxes: List[List[int]]) -> List[dict]:
+        """Padded grayscale crop and center of every detected box."""
         h_captcha, w_captcha = self.captcha_img.shape[:2]
-        self._log(f"Captcha image: {w_captcha}x{h_captcha}")
-        self._log(f"Detected {len(bboxes)} bounding boxes: {bboxes}")
-
         captcha_gray = cv2.cvtColor(self.captcha_img, cv2.COLOR_BGR2GRAY)
-        
-        # Extract crops for each bbox
+
         crops = []
         for i, bbox in enumerate(bboxes):
             x1, y1, x2, y2 = bbox
@@ -127,50 +182,67 @@ class IconSolver:
             y1 = max(0, y1 - pad)
             x2 = min(w_captcha, x2 + pad)
             y2 = min(h_captcha, y2 + pad) # Fixed y2
-            
+
             crop = captcha_gray[y1:y2, x1:x2]
             crops.append({'id': i, 'bbox': bbox, 'img': crop, 'center': [(x1+x2)/2, (y1+y2)/2]})
-            
-            if self.DEBUG:
-                ts = int(time.time())
-                cv2.imwrite(f"debug_crop_{ts}_{i}.png", crop)
+
+        capture.add("icon_bboxes", bboxes)
+        capture.add("icon_crops", [crop_data['img'] for crop_data in crops])
+        return crops
+
+    def _score_matrix(self, crops: List[dict]) -> np.ndarray:
+        """(questions x crops) ORB match scores."""
+        # Describe every crop (CLAHE-enhanced for better contrast) and question icon exactly once
+        crop_des = [self._describe(self._clahe.apply(crop_data['img'])) for crop_data in crops]
+        ques_des = [self._describe(q_img) for q_img in self.ques_imgs]
+        return np.array([[self._score(q, c) for c in crop_des] for q in ques_des],
+                        dtype=np.float64).reshape(len(ques_des), len(crop_des))
+
+    def find_icon_position(self) -> List[List[float]]:
+        """
+        Find positions of question icons in the captcha image.
+        """
+        from .dddd_server import dddd_service
+        
+        # 1. Detect all icons in the captcha image using ddddocr (on the array decoded in __init__)
+        self._log(f"Running detection on {self.captcha_img.shape[1]}x{self.captcha_img.shape[0]} image...")
+        with metrics.span("detection"):
+            bboxes = dddd_service.detection(self.captcha_img)
+        
+        h_captcha, w_captcha = self.captcha_img.shape[:2]
+        self._log(f"Captcha image: {w_captcha}x{h_captcha}")
+        self._log(f"Detected {len(bboxes)} bounding boxes: {bboxes}")
+
+        with metrics.span("matching"):
+            crops = self._crops(bboxes)
+
+            # 2. Score every question x crop pair, then assign globally (maximum total score)
+            self.scores = self._score_matrix(crops)
+            self.assignment = assign_icons(self.scores)
+        self.confidence = assignment_confidence(self.scores, self.assignment)
+        capture.add("icon_scores", self.scores)
+        capture.add("icon_assignment", self.assignment)
+        capture.add("icon_confidence", self.confidence)
+        self._log(f"Score matrix (questions x crops):\n{self.scores}")
+        self._log(f"Assignment: {self.assignment}, confidence margin: {self.confidence:.2f}")
+
+        if self.MIN_CONFIDENCE is not None and self.confidence < self.MIN_CONFIDENCE:
+            raise LowConfidenceError(self.confidence, self.MIN_CONFIDENCE)
 
         results = []
-        used_indices = set()
-
-        # 2. Match each question icon to the best available crop
-        for q_idx, q_img in enumerate(self.ques_imgs):
-            best_score = -1.0
-            best_idx = -1
-            
-            self._log(f"Matching question {q_idx+1}/{len(self.ques_imgs)} ({q_img.shape}px)...")
-            
-            for c_idx, crop_data in enumerate(crops):
-                if c_idx in used_indices:
-                    continue
-                
-                # Preprocess crop with CLAHE for better contrast
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                crop_enhanced = clahe.apply(crop_data['img'])
-                    
-                score = self._match_score(q_img, crop_enhanced)
-                self._log(f"  vs crop {c_idx} ({crop_data['img'].shape}px): score={score:.2f}")
-                
-                if score > best_score:
-                    best_score = score
-                    best_idx = c_idx
-            
-            # Require minimum score? For now accept best > 0.
-            if best_idx != -1 and best_score > 0:
-                self._log(f"  => Match! Crop {best_idx} (score={best_score:.2f})")
-                used_indices.add(best_idx)
+        used_indices = {c_idx for q_idx, c_idx in enumerate(self.assignment)
+                        if c_idx != -1 and self.scores[q_idx, c_idx] > 0}
+
+        for q_idx, c_idx in enumerate(self.assignment):
+            if c_idx != -1 and self.scores[q_idx, c_idx] > 0:
+                self._log(f"  Question {q_idx+1} => Crop {c_idx} (score={self.scores[q_idx, c_idx]:.2f})")
                 # Convert to GeeTest coords
-                cx, cy = crops[best_idx]['center']
+                cx, cy = crops[c_idx]['center']
                 gx = cx * (10000 / w_captcha)
                 gy = cy * (10000 / h_captcha)
                 results.append([gx, gy])
             else:
-                self._log(f"  => No match found! Using random fallback.")
+                self._log(f"  Question {q_idx+1} => No match found! Using random fallback.")
                 # Fallback: random unused box or random point
                 if len(used_indices) < len(crops):
                     # Pick random unused crop
@@ -0,0 +1,208 @@
+"""
+Per-stage timing instrumentation for solves.
+
+``GeetestSolver(..., instrumentation=...)`` binds an ``Instrumentation`` to
+each attempt (with ``risk_type`` and ``attempt`` labels) through a context
+variable, and the stages report into whatever is bound:
+
+    load, assets, detection, matching, pow, encrypt, verify, retry_sleep
+
+When nothing is bound ``span()`` returns a shared no-op context manager, so
+the hooks cost one ContextVar lookup per stage.
+
+``HistogramAggregator`` is the built-in sink: per-stage latency histograms
+and event counters, exported in the Prometheus text format.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional, Tuple
+
+# (instrumentation, labels) of the attempt running in this context, or None
+_active = contextvars.ContextVar("geetest_instrumentation", default=None)
+_NOOP = nullcontext()
+
+
+class Instrumentation:
+    """Base sink; override ``on_span`` and/or ``on_event``."""
+
+    def on_span(self, stage: str, seconds: float, labels: dict, error: Optional[BaseException] = None):
+        pass
+
+    def on_event(self, name: str, labels: dict):
+        pass
+
+
+class _Span:
+    __slots__ = ("sink", "stage", "labels", "start")
+
+    def __init__(self, sink: Instrumentation, stage: str, labels: dict):
+        self.sink = sink
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sink.on_span(self.stage, time.perf_counter() - self.start, self.labels, exc)
+        return False
+
+
+def span(stage: str):
+    """Context manager timing ``stage`` into the bound instrumentation (no-op if none)."""
+    active = _active.get()
+    if active is None:
+        return _NOOP
+    return _Span(active[0], stage, active[1])
+
+
+def event(name: str, **labels):
+    """Report a point event (e.g. an attempt's outcome) to the bound instrumentation."""
+    active = _active.get()
+    if active is not None:
+        active[0].on_event(name, {**active[1], **labels})
+
+
+@contextmanager
+def bind(instrumentation: Optional[Instrumentation], **labels):
+    """Route ``span``/``event`` in this context (and contexts copied from it) to ``instrumentation``."""
+    if instrumentation is None:
+        yield
+        return
+    token = _active.set((instrumentation, labels))
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+# Seconds; covers a cached asset hit up to a slow /verify
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "errors")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class HistogramAggregator(Instrumentation):
+    """
+    In-process latency histograms per (stage, labels) and counters per
+    (event, labels).
+
+    Args:
+        buckets: Upper bounds in seconds (cumulative ``le`` buckets in the export)
+        label_names: Labels kept as histogram dimensions; others (e.g. ``attempt``)
+            are dropped to keep the series count bounded
+        prefix: Metric name prefix in the Prometheus export
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, label_names: Tuple[str, ...] = ("risk_type",),
+                 prefix: str = "geetest"):
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = label_names
+        self.prefix = prefix
+        self._histograms: Dict[tuple, _Histogram] = {}
+        self._events: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, name: str, labels: dict) -> tuple:
+        return (name,) + tuple(str(labels.get(label, "")) for label in self.label_names)
+
+    def on_span(self, stage, seconds, labels, error=None):
+        key = self._key(stage, labels)
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(len(self.buckets))
+            hist.counts[slot] += 1
+            hist.sum += seconds
+            hist.count += 1
+            if error is not None:
+                hist.errors += 1
+
+    def on_event(self, name, labels):
+        key = self._key(name, labels) + (str(labels.get("result", "")),)
+        with self._lock:
+            self._events[key] = self._events.get(key, 0) + 1
+
+    def snapshot(self) -> dict:
+        """``{"stages": {stage: {labels..., count, sum, errors, p50, p95, p99}}, "events": [...]}``"""
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum, h.count, h.errors) for key, h in self._histograms.items()]
+            events = dict(self._events)
+
+        stages = []
+        for key, counts, total, count, errors in sorted(histograms):
+            entry = {"stage": key[0], **dict(zip(self.label_names, key[1:])),
+                     "count": count, "sum": total, "errors": errors}
+            for q in (50, 95, 99):
+                entry[f"p{q}"] = self._quantile(counts, count, q / 100)
+            stages.append(entry)
+        return {
+            "stages": stages,
+            "events": [{"event": key[0], **dict(zip(self.label_names, key[1:-1])), "result": key[-1], "count": n}
+                       for key, n in sorted(events.items())],
+        }
+
+    def _quantile(self, counts, count, q) -> Optional[float]:
+        """Upper bucket bound holding the q-quantile (None when it falls in +Inf)."""
+        if not count:
+            return None
+        rank, seen = q * count, 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+    def _labels(self, key: tuple, **extra) -> str:
+        pairs = [(name, value) for name, value in zip(self.label_names, key[1:]) if value]
+        pairs += list(extra.items())
+        return ",".join(f'{name}="{value}"' for name, value in pairs)
+
+    def prometheus(self) -> str:
+        """All series in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum, h.count, h.errors) for key, h in self._histograms.items()]
+            events = dict(self._events)
+
+        name = f"{self.prefix}_stage_duration_seconds"
+        lines = [f"# HELP {name} Duration of each solve stage.", f"# TYPE {name} histogram"]
+        for key, counts, total, count, _ in sorted(histograms):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{{{self._labels(key, stage=key[0], le=repr(bound))}}} {cumulative}")
+            lines.append(f"{name}_bucket{{{self._labels(key, stage=key[0], le='+Inf')}}} {count}")
+            lines.append(f"{name}_sum{{{self._labels(key, stage=key[0])}}} {total}")
+            lines.append(f"{name}_count{{{self._labels(key, stage=key[0])}}} {count}")
+
+        name = f"{self.prefix}_stage_errors_total"
+        lines += [f"# HELP {name} Stages that raised.", f"# TYPE {name} counter"]
+        for key, _, _, _, errors in sorted(histograms):
+            lines.append(f"{name}{{{self._labels(key, stage=key[0])}}} {errors}")
+
+        name = f"{self.prefix}_events_total"
+        lines += [f"# HELP {name} Solve events (attempt outcomes).", f"# TYPE {name} counter"]
+        for key, n in sorted(events.items()):
+            extra = {"event": key[0]}
+            if key[-1]:
+                extra["result"] = key[-1]
+            lines.append(f"{name}{{{self._labels(key[:-1], **extra)}}} {n}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._events.clear()
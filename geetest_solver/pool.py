@@ -0,0 +1,201 @@
+"""
+Pool of pre-solved seccodes, so consumers get a token with a queue pop
+instead of waiting seconds for a solve.
+
+Each (captcha_id, risk_type) gets its own FIFO of tokens, kept at ``size``
+by a fixed set of background refill threads (``concurrency`` solves in
+flight at most, shared across all keys). Tokens are dropped once
+``gen_time + ttl`` has passed.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+from .solver import GeetestSolver
+
+Key = Tuple[str, str]
+
+
+class _Slot:
+    __slots__ = ("size", "tokens", "in_flight", "hits", "misses", "expired", "solved", "errors", "wait_seconds")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tokens = deque()  # (expires_at, seccode), oldest first
+        self.in_flight = 0
+        self.hits = self.misses = self.expired = self.solved = self.errors = 0
+        self.wait_seconds = 0.0
+
+    def deficit(self) -> int:
+        return self.size - len(self.tokens) - self.in_flight
+
+
+class TokenPool:
+    """
+    Args:
+        size: Tokens kept warm per (captcha_id, risk_type)
+        concurrency: Refill threads, i.e. max solves in flight across all keys
+        ttl: Seconds a token stays usable after its ``gen_time``
+        max_retries: Passed to ``solve()`` for every refill
+        error_backoff: Seconds a refill thread pauses after a failed solve
+        solver_factory: ``(captcha_id, risk_type) -> solver``; defaults to
+            ``GeetestSolver(captcha_id, risk_type, **solver_kwargs)``
+    """
+
+    def __init__(self, size: int = 4, concurrency: int = 2, ttl: float = 60, max_retries: int = 5,
+                 error_backoff: float = 1.0, solver_factory: Optional[Callable[[str, str], GeetestSolver]] = None,
+                 **solver_kwargs):
+        self.size = size
+        self.ttl = ttl
+        self.max_retries = max_retries
+        self.error_backoff = error_backoff
+        self.solver_factory = solver_factory or (lambda cid, risk: GeetestSolver(cid, risk, **solver_kwargs))
+        self._slots: Dict[Key, _Slot] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._refill, name=f"geetest-pool-{i}", daemon=True)
+                         for i in range(concurrency)]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, captcha_id: str, risk_type: str, size: Optional[int] = None):
+        """Start keeping ``size`` (default: the pool's) tokens warm for this key."""
+        with self._cond:
+            slot = self._slots.get((captcha_id, risk_type))
+            if slot is None:
+                self._slots[(captcha_id, risk_type)] = _Slot(self.size if size is None else size)
+            elif size is not None:
+                slot.size = size
+            self._cond.notify_all()
+
+    def get(self, captcha_id: str, risk_type: str, timeout: Optional[float] = None) -> dict:
+        """
+        Pop the oldest unexpired seccode for the key, waiting for a refill if
+        the pool is empty. Unknown keys are added on first use.
+
+        Raises:
+            TimeoutError: No token became available within ``timeout`` seconds
+        """
+        key = (captcha_id, risk_type)
+        start = time.monotonic()
+        with self._cond:
+            if key not in self._slots:
+                self._slots[key] = _Slot(self.size)
+                self._cond.notify_all()
+            slot = self._slots[key]
+            waited = False
+            while True:
+                self._purge(slot)
+                if slot.tokens:
+                    _, token = slot.tokens.popleft()
+                    if waited:
+                        slot.misses += 1
+                        slot.wait_seconds += time.monotonic() - start
+                    else:
+                        slot.hits += 1
+                    self._cond.notify_all()  # a refill thread can start on the freed place
+                    return token
+                if self._closed:
+                    raise RuntimeError("TokenPool is closed")
+                remaining = None if timeout is None else timeout - (time.monotonic() - start)
+                if remaining is not None and remaining <= 0:
+                    slot.misses += 1
+                    raise TimeoutError(f"No token for {captcha_id}/{risk_type} within {timeout}s")
+                waited = True
+                self._cond.wait(remaining)
+
+    def _purge(self, slot: _Slot):
+        now = time.time()
+        while slot.tokens and slot.tokens[0][0] <= now:
+            slot.tokens.popleft()
+            slot.expired += 1
+
+    def _expires_at(self, token: dict) -> float:
+        try:
+            return float(token["gen_time"]) + self.ttl
+        except (KeyError, TypeError, ValueError):
+            return time.time() + self.ttl
+
+    def _next_key(self) -> Optional[Key]:
+        """Key with the largest shortfall (after dropping expired tokens), or None if all are full."""
+        best, best_deficit = None, 0
+        for key, slot in self._slots.items():
+            self._purge(slot)
+            if slot.deficit() > best_deficit:
+                best, best_deficit = key, slot.deficit()
+        return best
+
+    def _refill(self):
+        solvers = {}  # one solver (and session) per key for this thread
+        try:
+            while True:
+                with self._cond:
+                    key = self._next_key()
+                    while key is None and not self._closed:
+                        # Wake up in time to replace the next token that expires
+                        expiries = [slot.tokens[0][0] for slot in self._slots.values() if slot.tokens]
+                        self._cond.wait(max(0.05, min(expiries) - time.time()) if expiries else None)
+                        key = self._next_key()
+                    if self._closed:
+                        return
+                    slot = self._slots[key]
+                    slot.in_flight += 1
+
+                token = None
+                try:
+                    if key not in solvers:
+                        solvers[key] = self.solver_factory(*key)
+                    token = solvers[key].solve(max_retries=self.max_retries)
+                except Exception:
+                    solver = solvers.pop(key, None)
+                    if solver is not None:
+                        solver.session.close()  # the next solve for this key starts on a fresh session
+                with self._cond:
+                    slot.in_flight -= 1
+                    if token is not None:
+                        slot.solved += 1
+                        slot.tokens.append((self._expires_at(token), token))
+                    else:
+                        slot.errors += 1
+                    self._cond.notify_all()
+                    if token is None:
+                        # Back off after a failure, but let close() cut the pause short
+                        self._cond.wait_for(lambda: self._closed, timeout=self.error_backoff)
+        finally:
+            for solver in solvers.values():
+                solver.session.close()
+
+    def stats(self) -> dict:
+        """Per-key depth, in-flight solves, hit/miss/expired counts and hit rate, plus totals."""
+        with self._cond:
+            keys = {}
+            for (captcha_id, risk_type), slot in self._slots.items():
+                self._purge(slot)
+                served = slot.hits + slot.misses
+                keys[f"{captcha_id}/{risk_type}"] = {
+                    "depth": len(slot.tokens), "size": slot.size, "in_flight": slot.in_flight,
+                    "hits": slot.hits, "misses": slot.misses, "expired": slot.expired,
+                    "solved": slot.solved, "errors": slot.errors,
+                    "hit_rate": slot.hits / served if served else None,
+                    "avg_miss_wait_ms": slot.wait_seconds / slot.misses * 1000 if slot.misses else 0.0,
+                }
+        hits = sum(k["hits"] for k in keys.values())
+        served = hits + sum(k["misses"] for k in keys.values())
+        return {"keys": keys, "depth": sum(k["depth"] for k in keys.values()),
+                "hit_rate": hits / served if served else None}
+
+    def close(self):
+        """
+        Stop refilling; solves in flight finish in the background and are
+        discarded. Each refill thread closes its solvers' sessions as it exits.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
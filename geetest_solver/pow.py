@@ -0,0 +1,178 @@
+"""
+Proof-of-work search for the ``pow_msg``/``pow_sign`` pair sent to /verify.
+
+The nonce space (16 hex chars) is cut into chunks of ``chunk_size`` nonces,
+each identified by a random 32-bit high half and searched with a counter.
+Low difficulties are searched inline; above ``min_bits`` the chunks are
+fanned out over a process pool and the search stops as soon as any worker
+reports a hit. A ``cancel`` Event stops a search between chunks.
+"""
+import atexit
+import hashlib
+import os
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Optional, Tuple
+
+HASH_FUNCS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+}
+
+# bits % 4 -> max number of leading zero hex digits for which the js accepts the hash
+THRESHOLDS = {1: 7, 2: 3, 3: 1}
+
+
+def zero_digits(bits: int) -> int:
+    """Number of leading '0' hex digits a valid pow_sign needs for ``bits``."""
+    bit_remainder = bits % 4
+    bit_division = bits // 4
+    if bit_remainder and bit_division > THRESHOLDS[bit_remainder]:
+        # The js never accepts a hash for these, it would spin forever
+        raise ValueError(f"Unsatisfiable pow difficulty: bits={bits}")
+    return bit_division
+
+
+# '0000' .. 'ffff' pre-encoded, the low 16 bits of every nonce come from here
+_HEX4 = [b'%04x' % i for i in range(1 << 16)]
+
+
+def ceiling(bits: int) -> bytes:
+    """
+    Largest acceptable digest prefix for ``bits``.
+
+    A hex digest starts with ``n`` zeros iff the raw digest's first
+    ``ceil(n / 2)`` bytes compare ``<=`` this, so the kernel never has to
+    build a hexdigest for a miss.
+    """
+    digits = zero_digits(bits)
+    return b'\x00' * (digits // 2) + (b'\x0f' if digits % 2 else b'')
+
+
+def is_valid(pow_msg: str, pow_sign: str, hash_func: str, bits: int) -> bool:
+    """Server-side check of a pow_msg/pow_sign pair (the nonce is the last 16 chars of pow_msg)."""
+    if hash_func not in HASH_FUNCS or HASH_FUNCS[hash_func](pow_msg.encode()).hexdigest() != pow_sign:
+        return False
+    return pow_sign.startswith('0' * zero_digits(bits))
+
+
+def search(pow_string: str, hash_func: str, bits: int, high: int, start: int, count: int) -> Optional[Tuple[str, str]]:
+    """
+    Scan nonces ``{high:08x}{start:08x}`` .. ``{high:08x}{start+count-1:08x}``.
+
+    The constant ``pow_string`` + upper 12 nonce digits are hashed once per
+    65536 nonces and the hash state is copied for each of the last 4 digits.
+    """
+    limit = ceiling(bits)
+    width = len(limit)
+    prefix = pow_string.encode('utf-8') + b'%08x' % high
+    end = start + count
+
+    for upper in range(start >> 16, ((end - 1) >> 16) + 1):
+        midstate = HASH_FUNCS[hash_func](prefix + _HEX4[upper])
+        copy = midstate.copy
+        lo = max(start, upper << 16) & 0xffff
+        hi = min(end - (upper << 16), 1 << 16)
+        for low in range(lo, hi):
+            h = copy()
+            h.update(_HEX4[low])
+            if h.digest()[:width] <= limit:
+                return f"{high:08x}{upper:04x}{low:04x}", h.hexdigest()
+    return None
+
+
+def _check_cancel(cancel: Optional[threading.Event]):
+    if cancel is not None and cancel.is_set():
+        raise CancelledError("pow search cancelled")
+
+
+class PowEngine:
+    """
+    Parallel PoW search.
+
+    Args:
+        workers: Worker processes (default: ``os.cpu_count()``)
+        min_bits: Difficulties below this are searched inline
+        chunk_size: Nonces per task, i.e. the granularity at which a win stops the other workers
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_bits: int = 16, chunk_size: int = 1 << 16):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_bits = min_bits
+        self.chunk_size = chunk_size
+        self._pool = None
+        self._threads = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            if self._threads is not None:
+                self._threads.shutdown(wait=False, cancel_futures=True)
+                self._threads = None
+
+    def submit(self, fn, *args) -> Future:
+        """
+        Run ``fn(*args)`` (a ``solve`` call, possibly wrapped) on a background
+        thread, so the caller can download and solve images meanwhile.
+        """
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(thread_name_prefix="geetest-pow")
+            return self._threads.submit(fn, *args)
+
+    def solve(self, pow_string: str, hash_func: str, bits: int, cancel: Optional[threading.Event] = None) -> dict:
+        """
+        Raises:
+            CancelledError: ``cancel`` was set before a hit was found
+        """
+        if hash_func not in HASH_FUNCS:
+            raise ValueError(f"Unsupported pow hash function: {hash_func}")
+        zero_digits(bits)
+
+        if self.workers <= 1 or bits < self.min_bits:
+            found = None
+            while found is None:
+                _check_cancel(cancel)
+                found = search(pow_string, hash_func, bits, random.getrandbits(32), 0, self.chunk_size)
+        else:
+            found = self._solve_parallel(pow_string, hash_func, bits, cancel)
+
+        nonce, hashed_value = found
+        return {'pow_msg': pow_string + nonce, 'pow_sign': hashed_value}
+
+    def _solve_parallel(self, pow_string: str, hash_func: str, bits: int,
+                        cancel: Optional[threading.Event]) -> Tuple[str, str]:
+        pool = self._get_pool()
+
+        def submit():
+            return pool.submit(search, pow_string, hash_func, bits, random.getrandbits(32), 0, self.chunk_size)
+
+        # Two chunks per worker keeps every process busy while results come back
+        pending = {submit() for _ in range(self.workers * 2)}
+        try:
+            while True:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    found = future.result()
+                    if found is not None:
+                        return found
+                    _check_cancel(cancel)
+                    pending.add(submit())
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+pow_engine = PowEngine()
+atexit.register(pow_engine.close)
@@ -0,0 +1,468 @@
+"""
+HTTP solve service: ``POST /solve`` on a prefork pool of solver processes.
+
+    python -m geetest_solver serve --port 8080 --workers 4 --max-queue 64
+
+Worker processes are started once (forked from a forkserver that has the
+solver imported) and keep their models and curl_cffi sessions warm across
+requests; each runs ``threads`` solves at once, since a solve mostly waits
+on the network. The front end is a stdlib ``ThreadingHTTPServer``; each request
+goes into a queue bounded at ``max_queue`` and is answered 503 when that
+is full, so overload sheds instead of piling up latency. Every request has
+a deadline (``"deadline"`` seconds in the body, capped at ``max_deadline``):
+the client gets 504 once it passes, a job that expired while queued is
+never started, and a solve still running ``kill_grace`` seconds after the
+deadline gets its process killed and replaced.
+
+Endpoints:
+    POST /solve     {"captcha_id": ..., "risk_type": ..., "deadline": 30}
+                    200 {"status": "ok", "seccode": {...}, "queue_ms": .., "solve_ms": ..}
+                    400 bad request, 502 solve failed, 503 queue full, 504 deadline exceeded
+    GET  /health    worker count
+    GET  /stats     queue depth, busy slots, restarts, responses per status
+    GET  /metrics   Prometheus text: per-stage histograms reported by the workers
+                    (see metrics.py), queue wait, request outcomes, pool gauges
+"""
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+
+from .metrics import HistogramAggregator, Instrumentation
+
+
+class _Recorder(Instrumentation):
+    """Collects a worker's spans and events for one request, to replay in the parent."""
+
+    def __init__(self):
+        self.spans, self.events = [], []
+
+    def on_span(self, stage, seconds, labels, error=None):
+        self.spans.append((stage, seconds, labels, None if error is None else type(error).__name__))
+
+    def on_event(self, name, labels):
+        self.events.append((name, labels))
+
+
+def _worker_main(conn, options: dict, initializer: Optional[Callable], initargs: Tuple):
+    """
+    Solver process: answers ``(job_id, captcha_id, risk_type, deadline)`` jobs
+    on ``options["threads"]`` threads until it receives None.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is handled by the parent
+    # Split the cores between the processes instead of each onnxruntime session taking all of them
+    for name, value in options["ort_env"].items():
+        os.environ.setdefault(name, value)
+    from .solver import GeetestSolver
+    if initializer is not None:
+        initializer(*initargs)
+    if options["preload_models"]:
+        from .dddd_server import _get_dddd_service
+        _get_dddd_service()
+    send_lock = threading.Lock()
+    local = threading.local()  # warm solver (and session) per (captcha_id, risk_type) and thread
+
+    def reply(*message):
+        with send_lock:
+            conn.send(message)
+
+    def handle(job_id, captcha_id, risk_type, deadline):
+        if time.time() >= deadline:
+            reply(job_id, "expired", None, [], [])
+            return
+        solvers = local.__dict__.setdefault("solvers", {})
+        recorder = _Recorder()
+        key = (captcha_id, risk_type)
+        try:
+            solver = solvers.get(key)
+            if solver is None:
+                solver = solvers[key] = GeetestSolver(captcha_id, risk_type, **options["solver_kwargs"])
+            solver.instrumentation = recorder
+            seccode = solver.solve(max_retries=options["max_retries"], hedge_after=options["hedge_after"],
+                                   prefetch=options["prefetch"])
+            reply(job_id, "ok", seccode, recorder.spans, recorder.events)
+        except Exception as e:
+            solvers.pop(key, None)
+            reply(job_id, "error", f"{type(e).__name__}: {e}", recorder.spans, recorder.events)
+
+    reply("ready")
+    with ThreadPoolExecutor(options["threads"], thread_name_prefix="geetest-solve") as executor:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                return
+            if job is None:
+                return
+            executor.submit(handle, *job)
+
+
+class _Job:
+    __slots__ = ("id", "captcha_id", "risk_type", "deadline", "enqueued", "started", "future", "replied")
+
+    def __init__(self, job_id: int, captcha_id: str, risk_type: str, deadline: float):
+        self.id = job_id
+        self.captcha_id = captcha_id
+        self.risk_type = risk_type
+        self.deadline = deadline  # time.time() based, shared with the worker processes
+        self.enqueued = time.perf_counter()
+        self.started = None
+        self.future = Future()
+        self.replied = threading.Event()  # the worker answered (or died); independent of the client giving up
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.pending = {}  # job id -> _Job sent to this process
+        self.dead = False
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def _resolve(future: Future, result=None, error: Optional[BaseException] = None):
+    """Complete ``future`` unless the request handler already gave up on (cancelled) it."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class SolveService:
+    """
+    Pool of solver processes fed from one bounded queue.
+
+    Args:
+        workers: Solver processes
+        threads: Solves each process runs at once (they mostly wait on the network)
+        max_queue: Requests waiting for a free solve slot before new ones are shed
+        default_deadline: Seconds allowed per request when it names none
+        max_deadline: Upper bound on a request's own deadline
+        kill_grace: Seconds a solve may overrun its deadline before its process is replaced
+        max_retries, hedge_after, prefetch: Passed to ``solve()``
+        preload_models: Load the icon models in each worker at start. Unless set in the
+            environment, each worker's onnxruntime sessions get cores / workers intra-op
+            threads, without spinning when there are several workers (see ``SessionConfig``)
+        initializer: Called with ``initargs`` in each worker before it takes jobs
+        start_method: multiprocessing start method (default: forkserver where available)
+        **solver_kwargs: Passed to ``GeetestSolver`` (e.g. ``proxy``)
+    """
+
+    def __init__(self, workers: int = 2, threads: int = 4, max_queue: int = 64, default_deadline: float = 30,
+                 max_deadline: float = 120, kill_grace: float = 10, max_retries: int = 5,
+                 hedge_after: Optional[float] = None, prefetch: bool = False, preload_models: bool = True,
+                 initializer: Optional[Callable] = None, initargs: Tuple = (), start_method: Optional[str] = None,
+                 **solver_kwargs):
+        self.threads = threads
+        self.default_deadline = default_deadline
+        self.max_deadline = max_deadline
+        self.kill_grace = kill_grace
+        self.metrics = HistogramAggregator()
+        self.restarts = 0
+        self.responses = {}
+        self.busy = 0
+        ort_env = {"GEETEST_ORT_INTRA_THREADS": str(max(1, (os.cpu_count() or 1) // workers))}
+        if workers > 1:
+            ort_env["GEETEST_ORT_SPINNING"] = "0"
+        self._options = {"threads": threads, "max_retries": max_retries, "hedge_after": hedge_after,
+                         "prefetch": prefetch, "preload_models": preload_models, "solver_kwargs": solver_kwargs,
+                         "ort_env": ort_env}
+        self._initializer = (initializer, initargs)
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            self._ctx.set_forkserver_preload(["geetest_solver.solver"])
+        self._jobs = queue.Queue(maxsize=max_queue)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._replace_lock = threading.Lock()
+        self._closed = False
+
+        self._workers = [self._spawn() for _ in range(workers)]
+        for index, worker in enumerate(self._workers):
+            self._start(index, worker)
+        # One dispatcher per solve slot, so a worker never has more than ``threads`` jobs
+        self._dispatchers = [threading.Thread(target=self._dispatch, args=(i // threads,),
+                                              name=f"geetest-serve-{i}", daemon=True)
+                             for i in range(workers * threads)]
+        for thread in self._dispatchers:
+            thread.start()
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child, self._options, *self._initializer), daemon=True)
+        process.start()
+        child.close()
+        return _Worker(process, parent)
+
+    def _start(self, index: int, worker: _Worker):
+        """Wait for the worker's start-up, then read its replies on a thread."""
+        try:
+            worker.conn.recv()
+        except EOFError:
+            raise RuntimeError(f"solver worker exited during start-up (exit code {worker.process.exitcode})") from None
+        threading.Thread(target=self._read, args=(index, worker), name="geetest-serve-reader", daemon=True).start()
+
+    def _read(self, index: int, worker: _Worker):
+        while True:
+            try:
+                job_id, status, result, spans, events = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            for stage, seconds, labels, error in spans:
+                self.metrics.on_span(stage, seconds, labels, None if error is None else RuntimeError(error))
+            for name, labels in events:
+                self.metrics.on_event(name, labels)
+            job = worker.pending.pop(job_id, None)
+            if job is None:
+                continue
+            if status == "ok":
+                _resolve(job.future, result)
+            elif status == "expired":
+                _resolve(job.future, error=DeadlineExceeded("deadline exceeded while queued"))
+            else:
+                _resolve(job.future, error=RuntimeError(result))
+            job.replied.set()
+
+        worker.dead = True
+        for job in list(worker.pending.values()):
+            _resolve(job.future, error=RuntimeError("solver worker died"))
+            job.replied.set()
+        worker.pending.clear()
+        # Replace a crashed process now rather than when the next job finds it dead
+        self._replace(index, worker)
+
+    def _replace(self, index: int, worker: _Worker):
+        """Kill ``worker`` (its other jobs fail) and start a fresh process in its place."""
+        with self._replace_lock:
+            if self._closed or self._workers[index] is not worker:
+                return  # shutting down, or another thread already replaced it
+            worker.process.kill()
+            worker.process.join()
+            worker.conn.close()
+            with self._lock:
+                self.restarts += 1
+            while not self._closed:
+                fresh = self._spawn()
+                try:
+                    self._start(index, fresh)
+                except RuntimeError:
+                    time.sleep(1)
+                    continue
+                self._workers[index] = fresh
+                return
+
+    def submit(self, captcha_id: str, risk_type: str, deadline: Optional[float] = None) -> _Job:
+        """
+        Queue a solve; ``job.future`` resolves to the seccode.
+
+        Raises:
+            queue.Full: ``max_queue`` requests are already waiting
+        """
+        seconds = min(self.default_deadline if deadline is None else deadline, self.max_deadline)
+        job = _Job(next(self._ids), captcha_id, risk_type, time.time() + seconds)
+        self._jobs.put_nowait(job)
+        return job
+
+    def _dispatch(self, index: int):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if job.future.done():  # the client gave up while it was queued
+                continue
+            if time.time() >= job.deadline:
+                _resolve(job.future, error=DeadlineExceeded("deadline exceeded while queued"))
+                continue
+            job.started = time.perf_counter()
+            self.metrics.on_span("queue_wait", job.started - job.enqueued, {"risk_type": job.risk_type})
+
+            worker = self._workers[index]
+            with self._lock:
+                self.busy += 1
+            try:
+                worker.pending[job.id] = job
+                try:
+                    with worker.send_lock:
+                        worker.conn.send((job.id, job.captcha_id, job.risk_type, job.deadline))
+                except OSError:
+                    worker.dead = True
+                # Past the deadline the client has its 504; give the solve a grace period, then replace the process.
+                # A dead worker's reader has already failed its pending jobs and won't answer this one.
+                replied = not worker.dead and job.replied.wait(max(0.0, job.deadline - time.time()) + self.kill_grace)
+                if not replied or worker.dead:
+                    worker.pending.pop(job.id, None)
+                    _resolve(job.future, error=DeadlineExceeded("deadline exceeded") if not worker.dead
+                             else RuntimeError("solver worker died"))
+                    self._replace(index, worker)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+    def record(self, status: int, risk_type: str = "", seconds: Optional[float] = None):
+        """Count a response (and time it, when it reached the solve stage)."""
+        with self._lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+        self.metrics.on_event("request", {"risk_type": risk_type, "result": str(status)})
+        if seconds is not None:
+            self.metrics.on_span("request", seconds, {"risk_type": risk_type},
+                                 None if status == 200 else RuntimeError(status))
+
+    def stats(self) -> dict:
+        with self._lock:
+            responses = {str(code): n for code, n in sorted(self.responses.items())}
+            restarts, busy = self.restarts, self.busy
+        return {
+            "workers": sum(w.process.is_alive() for w in self._workers),
+            "slots": len(self._workers) * self.threads,
+            "busy": busy,
+            "queue_depth": self._jobs.qsize(),
+            "max_queue": self._jobs.maxsize,
+            "restarts": restarts,
+            "responses": responses,
+        }
+
+    def prometheus(self) -> str:
+        stats = self.stats()
+        lines = [self.metrics.prometheus().rstrip("\n")]
+        for name, kind, help_, value in (
+            ("workers", "gauge", "Live solver processes.", stats["workers"]),
+            ("slots", "gauge", "Solves the pool runs at once.", stats["slots"]),
+            ("slots_busy", "gauge", "Solve slots working on a request.", stats["busy"]),
+            ("queue_depth", "gauge", "Requests waiting for a free solve slot.", stats["queue_depth"]),
+            ("worker_restarts_total", "counter", "Solver processes killed and replaced.", stats["restarts"]),
+        ):
+            lines += [f"# HELP geetest_server_{name} {help_}", f"# TYPE geetest_server_{name} {kind}",
+                      f"geetest_server_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        """Stop the workers; requests still queued fail."""
+        self._closed = True
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                _resolve(job.future, error=RuntimeError("service closed"))
+        for _ in self._dispatchers:
+            self._jobs.put(None)
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=2)
+            if worker.process.is_alive():
+                worker.process.kill()
+
+
+class _SolveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "SolveHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, obj, status=200, headers: dict = None):
+        self._send(json.dumps(obj).encode(), "application/json", status, headers)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._send_json({"status": "ok", "workers": service.stats()["workers"]})
+        elif self.path == "/stats":
+            self._send_json(service.stats())
+        elif self.path == "/metrics":
+            self._send(service.prometheus().encode(), "text/plain; version=0.0.4")
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path != "/solve":
+            self._send_json({"error": "not found"}, 404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            captcha_id, risk_type = body["captcha_id"], body["risk_type"]
+            deadline = body.get("deadline")
+            if not (isinstance(captcha_id, str) and isinstance(risk_type, str)):
+                raise TypeError("captcha_id and risk_type must be strings")
+            if deadline is not None and not (isinstance(deadline, (int, float)) and deadline > 0):
+                raise TypeError("deadline must be a positive number of seconds")
+        except (ValueError, KeyError, TypeError) as e:
+            service.record(400)
+            self._send_json({"status": "error", "error": f"bad request: {e}"}, 400)
+            return
+
+        start = time.perf_counter()
+        try:
+            job = service.submit(captcha_id, risk_type, deadline)
+        except queue.Full:
+            service.record(503, risk_type)
+            self._send_json({"status": "error", "error": "queue full"}, 503, {"Retry-After": "1"})
+            return
+
+        try:
+            seccode = job.future.result(timeout=max(0.0, job.deadline - time.time()))
+        except (FutureTimeout, DeadlineExceeded):
+            job.future.cancel()  # skipped by the dispatcher if still queued
+            service.record(504, risk_type, time.perf_counter() - start)
+            self._send_json({"status": "error", "error": "deadline exceeded"}, 504)
+            return
+        except Exception as e:
+            service.record(502, risk_type, time.perf_counter() - start)
+            self._send_json({"status": "error", "error": str(e)}, 502)
+            return
+
+        seconds = time.perf_counter() - start
+        service.record(200, risk_type, seconds)
+        queue_ms = (job.started - job.enqueued) * 1000 if job.started else 0.0
+        self._send_json({"status": "ok", "seccode": seccode, "queue_ms": round(queue_ms, 1),
+                         "solve_ms": round(seconds * 1000 - queue_ms, 1)})
+
+
+class SolveHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: SolveService):
+        super().__init__(address, _SolveHandler)
+        self.service = service
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve(service: SolveService, host: str = "127.0.0.1", port: int = 8080) -> SolveHTTPServer:
+    """Build the HTTP front end for ``service`` (call ``serve_forever()`` on the result)."""
+    return SolveHTTPServer((host, port), service)
@@ -1,18 +1,17 @@
+import contextvars
+from concurrent.futures import Future
 import random
-import hashlib
 import urllib.parse
 import binascii
 import json
 import re
-import requests
+import threading
 
-from Crypto.Cipher import AES
+from Crypto.Cipher import AES, PKCS1_v1_5
 from Crypto.Util.Padding import pad
 from Crypto.PublicKey.RSA import construct
-from Crypto.Cipher import PKCS1_v1_5
-from .slide import SlideSolver
-from .gobang import GobangSolver
-from .icon import IconSolver
+from . import capture, metrics
+from .pow import pow_engine
 
 class LotParser:
     def __init__(self):
@@ -73,12 +72,93 @@ class LotParser:
 lotParser = LotParser()  # doesn't need to calculate the lot and lot_res every time, so were gonna cache it
 
 
+def _solve_slide(data: dict, assets: dict) -> dict:
+    from .slide import SlideSolver
+    with metrics.span("matching"):
+        left = SlideSolver(
+            assets[data['slice']],
+            assets[data['bg']]
+        ).find_puzzle_piece_position() + random.uniform(0, .5)
+    return {
+        "passtime": random.randint(600, 1200),  # time in ms it took to solve
+        "setLeft": left,
+        "userresponse": left / 1.0059466666666665 + 2  # 1.0059466666666665 = .8876 * 340 / 300
+    }
+
+
+def _solve_gobang(data: dict, assets: dict) -> dict:
+    from .gobang import GobangSolver
+    with metrics.span("matching"):
+        return {
+            "userresponse": GobangSolver(data["ques"]).find_four_in_line()
+        }
+
+
+def _solve_icon(data: dict, assets: dict) -> dict:
+    from .icon import IconSolver
+    return {
+        "passtime": random.randint(600, 1200),  # time in ms it took to solve
+        "userresponse": IconSolver(data["imgs"], data["ques"], assets).find_icon_position()
+    }
+
+
+# risk_type -> builder for the solver-specific fields of the w payload (None = nothing to solve).
+# Builders import their solver on first use, so e.g. ai captchas never load cv2/numpy.
+RISK_SOLVERS = {
+    "ai": None,
+    "invisible": None,
+    "slide": _solve_slide,
+    "winlinze": _solve_gobang,
+    "gobang": _solve_gobang,
+    "icon": _solve_icon,
+}
+
+
+# Parts of the w payload that are the same for every challenge.
+W_HEAD = {"y1qk": "TWZc"}
+W_STATIC = {
+    "biht": "1426265548",  # static
+    "device_id": "",  # why is this empty!!
+    "em": {  # save to have this static (see em.js)
+        "cp": 0,  # checkCallPhantom
+        "ek": "11",  # checkErrorKeys "11" as value is also fine
+        "nt": 0,  # checkNightmare
+        "ph": 0,  # checkPhantom
+        "sc": 0,  # checkSeleniumMarker
+        "si": 0,  # checkScriptFn
+        "wd": 1,  # checkWebDriver
+    },
+    "gee_guard": {
+        "roe": {  # "3" = no | "1" = yes
+            "auh": "3",  # HEADCHR_UA            | regex(/HeadlessChrome/) in UserAgent
+            "aup": "3",  # PHANTOM_UA            | regex(/PhantomJS/) in UserAgent
+            "cdc": "3",  # CDC                   | cdc check
+            "egp": "3",  # PHANTOM_LANGUAGE      | language header !== undefined
+            "res": "3",  # SELENIUM_DRIVER       | 35 selenium checks 💀
+            "rew": "3",  # WEBDRIVER             | webDriver check
+            "sep": "3",  # PHANTOM_PROPERTIES    | phantomJS check
+            "snh": "3",  # HEADCHR_PERMISSIONS   | checks browser version etc.
+        }
+    },
+    "ep": "123",  # static
+    "geetest": "captcha",  # static
+    "lang": "zh",  # static
+}
+
+
 class Signer:
     encryptor_pubkey = construct((
         int("00C1E3934D1614465B33053E7F48EE4EC87B14B95EF88947713D25EECBFF7E74C7977D02DC1D9451F79DD5D1C10C29ACB6A9B4D6FB7D0A0279B6719E1772565F09AF627715919221AEF91899CAE08C0D686D748B20A3603BE2318CA6BC2B59706592A9219D0BF05C9F65023A21D2330807252AE0066D59CEEFA5F2748EA80BAB81".lower(),
             16),
         int("10001", 16))
     )
+    _rsa_cipher = PKCS1_v1_5.new(encryptor_pubkey)  # stateless apart from the key, so built once
+
+    @classmethod
+    def use_public_key(cls, key):
+        """Encrypt w for another RSA public key (e.g. a local stand-in server's) from now on."""
+        cls.encryptor_pubkey = key
+        cls._rsa_cipher = PKCS1_v1_5.new(key)
 
     @staticmethod
     def rand_uid():
@@ -99,8 +179,7 @@ class Signer:
     @staticmethod
     def encrypt_asymmetric_1(message: str) -> str:
         message_bytes = message.encode('utf-8')
-        cipher = PKCS1_v1_5.new(Signer.encryptor_pubkey)
-        encrypted_bytes = cipher.encrypt(message_bytes)
+        encrypted_bytes = Signer._rsa_cipher.encrypt(message_bytes)
         encrypted_hex = binascii.hexlify(encrypted_bytes).decode('utf-8')
 
         return encrypted_hex
@@ -140,103 +219,99 @@ function encrypt_asymmetric_2(input, key) {
         return binascii.hexlify(enc_input).decode() + enc_key
 
     @staticmethod
-    def generate_pow(lot_number_pow, captcha_id_pow, hash_func, hash_version, bits, date, empty) -> dict:
-        """Generate the pow_msg & pow_sign | translated directly from the .js"""
-        bit_remainder = bits % 4
-        bit_division = bits // 4
-
-        prefix = '0' * bit_division
+    def generate_pow(lot_number_pow, captcha_id_pow, hash_func, hash_version, bits, date, empty,
+                     cancel: threading.Event = None) -> dict:
+        """Generate the pow_msg & pow_sign | search is done by pow.pow_engine (parallel for high bits)"""
         pow_string = f"{hash_version}|{bits}|{hash_func}|{date}|{captcha_id_pow}|{lot_number_pow}|{empty}|"
+        with metrics.span("pow"):
+            return pow_engine.solve(pow_string, hash_func, bits, cancel)
 
-        while True:
-            h = Signer.rand_uid()
-            combined = pow_string + h
-            hashed_value = None
-
-            if hash_func == 'md5':
-                hashed_value = hashlib.md5(combined.encode('utf-8')).hexdigest()
-            elif hash_func == 'sha1':
-                hashed_value = hashlib.sha1(combined.encode('utf-8')).hexdigest()
-            elif hash_func == 'sha256':
-                hashed_value = hashlib.sha256(combined.encode('utf-8')).hexdigest()
-
-            if bit_remainder == 0:
-                if hashed_value.startswith(prefix):
-                    return {'pow_msg': pow_string + h, 'pow_sign': hashed_value}
-            else:
-                if hashed_value.startswith(prefix):
-                    length = len(prefix)
-                    threshold = None
-                    if bit_remainder == 1:
-                        threshold = 7
-                    elif bit_remainder == 2:
-                        threshold = 3
-                    elif bit_remainder == 3:
-                        threshold = 1
-
-                    if length <= threshold:
-                        return {'pow_msg': pow_string + h, 'pow_sign': hashed_value}
+    @staticmethod
+    def asset_paths(data: dict, risk_type: str) -> list:
+        """Static asset paths (relative to static.geetest.com) a challenge needs."""
+        if risk_type == "slide":
+            return [data['slice'], data['bg']]
+        elif risk_type == "icon":
+            return [data['imgs'], *data['ques']]
+        return []
 
     @staticmethod
-    def generate_w(data: dict, captcha_id: str, risk_type: str):
-        lot_number = data['lot_number']
+    def pow_for(data: dict, captcha_id: str, cancel: threading.Event = None) -> dict:
+        """``generate_pow`` for the pow_detail of a /load response."""
         pow_detail = data['pow_detail']
-        abo = {"y1qk":"TWZc"}
-        base = abo | {
-            **Signer.generate_pow(lot_number, captcha_id, pow_detail['hashfunc'], pow_detail['version'],
-                                  pow_detail['bits'], pow_detail['datetime'], ""),
-            **lotParser.get_dict(lot_number),
-            "biht": "1426265548",  # static
-            "device_id": "",  # why is this empty!!
-            "em": {  # save to have this static (see em.js)
-                "cp": 0,  # checkCallPhantom
-                "ek": "11",  # checkErrorKeys "11" as value is also fine
-                "nt": 0,  # checkNightmare
-                "ph": 0,  # checkPhantom
-                "sc": 0,  # checkSeleniumMarker
-                "si": 0,  # checkScriptFn
-                "wd": 1,  # checkWebDriver
-            },
-            "gee_guard": {
-                "roe": {  # "3" = no | "1" = yes
-                    "auh": "3",  # HEADCHR_UA            | regex(/HeadlessChrome/) in UserAgent
-                    "aup": "3",  # PHANTOM_UA            | regex(/PhantomJS/) in UserAgent
-                    "cdc": "3",  # CDC                   | cdc check
-                    "egp": "3",  # PHANTOM_LANGUAGE      | language header !== undefined
-                    "res": "3",  # SELENIUM_DRIVER       | 35 selenium checks 💀
-                    "rew": "3",  # WEBDRIVER             | webDriver check
-                    "sep": "3",  # PHANTOM_PROPERTIES    | phantomJS check
-                    "snh": "3",  # HEADCHR_PERMISSIONS   | checks browser version etc.
-                }
-            },
-            "ep": "123",  # static
-            "geetest": "captcha",  # static
-            "lang": "zh",  # static
-            "lot_number": lot_number,
-        }
+        return Signer.generate_pow(data['lot_number'], captcha_id, pow_detail['hashfunc'], pow_detail['version'],
+                                   pow_detail['bits'], pow_detail['datetime'], "", cancel)
 
-        if risk_type in ("ai", "invisible"):
-            pass
-        elif risk_type == "slide":
-            left = SlideSolver(
-                requests.get(f"https://static.geetest.com/{data['slice']}", timeout=10).content,
-                requests.get(f"https://static.geetest.com/{data['bg']}", timeout=10).content
-            ).find_puzzle_piece_position() + random.uniform(0, .5)
-            base |= {
-                "passtime": random.randint(600, 1200),  # time in ms it took to solve
-                "setLeft": left,
-                "userresponse": left / 1.0059466666666665 + 2  # 1.0059466666666665 = .8876 * 340 / 300
-            }
-        elif risk_type in ("winlinze", "gobang"):
-            base |= {
-                "userresponse": GobangSolver(data["ques"]).find_four_in_line()
-            }
-        elif risk_type in 'icon':
-            base |= {
-                "passtime": random.randint(600, 1200),  # time in ms it took to solve
-                "userresponse": IconSolver(data["imgs"], data["ques"]).find_icon_position()
-            }
-        else:
+    @staticmethod
+    def submit_pow(data: dict, captcha_id: str) -> Future:
+        """``pow_for`` on a ``pow_engine`` thread, stoppable with ``cancel_pow`` even once it is searching."""
+        cancel = threading.Event()
+        future = pow_engine.submit(contextvars.copy_context().run, Signer.pow_for, data, captcha_id, cancel)
+        future.pow_cancel = cancel
+        return future
+
+    @staticmethod
+    def cancel_pow(future: Future):
+        """Drop a ``submit_pow`` search: a queued one never starts, a running one stops at its next chunk."""
+        future.cancel()
+        cancel = getattr(future, "pow_cancel", None)
+        if cancel is not None:
+            cancel.set()
+
+    @staticmethod
+    def generate_w(data: dict, captcha_id: str, risk_type: str, assets: dict = None, pow_fields: dict = None):
+        """
+        Build the encrypted ``w`` parameter for /verify.
+
+        ``assets`` optionally maps the paths from ``asset_paths`` to their
+        already downloaded bytes, so callers with their own (e.g. async) I/O
+        can skip the downloads in here. Otherwise they are fetched
+        concurrently through ``assets.asset_fetcher``. ``pow_fields``
+        likewise takes an already computed ``pow_for`` result, or a Future
+        of one (e.g. from ``submit_pow``) that is joined last.
+
+        PoW only depends on the lot number and pow_detail, so for image
+        challenges it runs on a background thread while the images are
+        downloaded and solved.
+        """
+        if risk_type not in RISK_SOLVERS:
             raise NotImplementedError(f"This type ({risk_type}) of captcha is not implemented yet.")
+        solve = RISK_SOLVERS[risk_type]
+
+        lot_number = data['lot_number']
+        paths = Signer.asset_paths(data, risk_type) if solve is not None else []
+        pow_future = None
+        if isinstance(pow_fields, Future):
+            pow_future, pow_fields = pow_fields, None
+        elif pow_fields is None and paths:
+            pow_future = Signer.submit_pow(data, captcha_id)
+        elif pow_fields is None:
+            pow_fields = Signer.pow_for(data, captcha_id)
 
-        return Signer.encrypt_w(json.dumps(base), data["pt"])
+        try:
+            solved = {}
+            if solve is not None:
+                if assets is None and paths:
+                    from .assets import asset_fetcher
+                    with metrics.span("assets"):
+                        assets = asset_fetcher.fetch_all(paths)
+                if assets:
+                    capture.add("assets", assets)
+                solved = solve(data, assets)
+                capture.add("answer", solved)
+        except BaseException:
+            if pow_future is not None:
+                Signer.cancel_pow(pow_future)
+            raise
+        if pow_future is not None:
+            pow_fields = pow_future.result()
+
+        base = W_HEAD | {
+            **pow_fields,
+            **lotParser.get_dict(lot_number),
+            **W_STATIC,
+            "lot_number": lot_number,
+        }
+        base |= solved
+        with metrics.span("encrypt"):
+            return Signer.encrypt_w(json.dumps(base), data["pt"])
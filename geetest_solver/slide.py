@@ -6,14 +6,25 @@ Big thanks to glizzykingdreko for making amazing solver
 
 i modified it a bit
 """
+import os
+
 import numpy as np
-import requests, cv2
+import cv2
+
+from .assets import asset_fetcher
+from .cache import asset_cache
 
 
 class SlideSolver:
+    DEBUG = os.environ.get("GEEKED_DEBUG", "0") == "1"
+    # Coarse pass runs at 1/2^PYRAMID_LEVELS scale, the fine pass only on +-BAND rows around its peak
+    PYRAMID_LEVELS = 1
+    BAND = 4
+
     def __init__(self, puzzle_piece, background):
         self.background = self._read_image(background)
         self.puzzle_piece = self._read_image(puzzle_piece)
+        self.debug_image = None
 
     @staticmethod
     def test():
@@ -25,9 +36,8 @@ class SlideSolver:
         print(f"Result: {result}")
 
     @staticmethod
-    def load_image(url: str) -> np.ndarray:
-        response = requests.get(url)
-        return response.content
+    def load_image(url: str) -> bytes:
+        return asset_fetcher.fetch(url)
 
     @staticmethod
     def _read_image(image_source):
@@ -35,36 +45,65 @@ class SlideSolver:
         Read an image from a file or a requests response object.
         """
         if isinstance(image_source, bytes):
-            return cv2.imdecode(np.frombuffer(image_source, np.uint8), cv2.IMREAD_ANYCOLOR)
+            return asset_cache.decode(image_source, cv2.IMREAD_ANYCOLOR)
         elif hasattr(image_source, 'read'):  # Checks if it's a file-like object
-            return cv2.imdecode(np.frombuffer(image_source.read(), np.uint8), cv2.IMREAD_ANYCOLOR)
+            return asset_cache.decode(image_source.read(), cv2.IMREAD_ANYCOLOR)
         else:
             raise TypeError("Invalid image source type. Must be bytes or a file-like object.")
 
-    def find_puzzle_piece_position(self):
+    def _locate(self, edge_background: np.ndarray, edge_puzzle_piece: np.ndarray):
+        """
+        Top-left of the best TM_CCOEFF_NORMED match of the piece's edges.
+
+        Edge maps are single channel (the old 3-channel GRAY2RGB copies only
+        tripled the correlation work). A coarse match on a downscaled pyramid
+        level finds the row, then full resolution matching is limited to a
+        horizontal band of +-BAND rows around it.
+        """
+        bh = edge_background.shape[0]
+        h, w = edge_puzzle_piece.shape[:2]
+        scale = 1 << self.PYRAMID_LEVELS
+
+        coarse_bg, coarse_piece = edge_background, edge_puzzle_piece
+        for _ in range(self.PYRAMID_LEVELS):
+            coarse_bg, coarse_piece = cv2.pyrDown(coarse_bg), cv2.pyrDown(coarse_piece)
+        if self.PYRAMID_LEVELS == 0 or coarse_piece.shape[0] < 8 or coarse_piece.shape[1] < 8:
+            res = cv2.matchTemplate(edge_background, edge_puzzle_piece, cv2.TM_CCOEFF_NORMED)
+            return cv2.minMaxLoc(res)[3]
+
+        res = cv2.matchTemplate(coarse_bg, coarse_piece, cv2.TM_CCOEFF_NORMED)
+        _, _, _, (_, coarse_y) = cv2.minMaxLoc(res)
+
+        y0 = max(0, coarse_y * scale - self.BAND)
+        y1 = min(bh, coarse_y * scale + self.BAND + h)
+        res = cv2.matchTemplate(edge_background[y0:y1], edge_puzzle_piece, cv2.TM_CCOEFF_NORMED)
+        _, _, _, (x, y) = cv2.minMaxLoc(res)
+        return x, y + y0
+
+    def find_puzzle_piece_position(self, debug: bool = None):
         """
         Find the matching position of a puzzle piece in a background image.
+
+        With ``debug`` (default: ``DEBUG``) the match is drawn onto a copy of
+        the background, kept as ``debug_image``.
         """
         # Apply edge detection
         edge_puzzle_piece = cv2.Canny(self.puzzle_piece, 100, 200)
         edge_background = cv2.Canny(self.background, 100, 200)
 
-        edge_puzzle_piece_rgb = cv2.cvtColor(edge_puzzle_piece, cv2.COLOR_GRAY2RGB)
-        edge_background_rgb = cv2.cvtColor(edge_background, cv2.COLOR_GRAY2RGB)
-
-        res = cv2.matchTemplate(edge_background_rgb, edge_puzzle_piece_rgb, cv2.TM_CCOEFF_NORMED)
-        _, _, _, max_loc = cv2.minMaxLoc(res)
-        top_left = max_loc
+        top_left = self._locate(edge_background, edge_puzzle_piece)
         h, w = edge_puzzle_piece.shape[:2]
 
         center_x = top_left[0] + w // 2
         center_y = top_left[1] + h // 2
-        bottom_right = (top_left[0] + w, top_left[1] + h)
 
-        cv2.rectangle(self.background, top_left, bottom_right, (0, 0, 255), 2)
-        cv2.line(self.background, (center_x, 0), (center_x, edge_background_rgb.shape[0]), (0, 255, 0), 2)
-        cv2.line(self.background, (0, center_y), (edge_background_rgb.shape[1], center_y), (0, 255, 0), 2)
-        # cv2.imwrite('output.png', self.background)
+        if self.DEBUG if debug is None else debug:
+            bottom_right = (top_left[0] + w, top_left[1] + h)
+            self.debug_image = self.background.copy()
+            cv2.rectangle(self.debug_image, top_left, bottom_right, (0, 0, 255), 2)
+            cv2.line(self.debug_image, (center_x, 0), (center_x, edge_background.shape[0]), (0, 255, 0), 2)
+            cv2.line(self.debug_image, (0, center_y), (edge_background.shape[1], center_y), (0, 255, 0), 2)
+            # cv2.imwrite('output.png', self.debug_image)
 
         return center_x  - 41 # -41 because we need the start of the piece, not the center
 
@@ -1,32 +1,51 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
 from uuid import uuid4
 from curl_cffi import requests
-import random, time, json
+import random, time, json, os, threading
+from . import capture, metrics
+from .exceptions import LowConfidenceError
 from .sign import Signer
 
 
-class GeetestSolver:
-    def __init__(self, captcha_id: str, risk_type: str, debug: bool = False, **kwargs):
+class _SolverBase:
+    """
+    Challenge state, request parameters and response parsing shared by
+    ``GeetestSolver`` and ``AsyncGeetestSolver``; subclasses add the session
+    and the (blocking or async) /load, /verify and ``solve``.
+    """
+    HEADERS = {
+        "connection": "keep-alive",
+        "sec-ch-ua-platform": "\"Windows\"",
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+        "sec-ch-ua-mobile": "?0",
+        "accept": "*/*",
+        "sec-fetch-site": "same-origin",
+        "sec-fetch-mode": "no-cors",
+        "sec-fetch-dest": "script",
+        "accept-encoding": "gzip, deflate, br, zstd",
+        "accept-language": "en-US,en;q=0.9"
+    }
+
+    def __init__(self, captcha_id: str, risk_type: str, debug: bool = False,
+                 instrumentation: Optional[metrics.Instrumentation] = None, **kwargs):
         self.pass_token = None
         self.lot_number = None
         self.captcha_id = captcha_id
         self.challenge = str(uuid4())
         self.risk_type = risk_type
         self.debug = debug
-        self.callback = GeetestSolver.random()
-        self.session = requests.Session(impersonate="chrome124", **kwargs)
-        self.session.headers = {
-            "connection": "keep-alive",
-            "sec-ch-ua-platform": "\"Windows\"",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "sec-ch-ua-mobile": "?0",
-            "accept": "*/*",
-            "sec-fetch-site": "same-origin",
-            "sec-fetch-mode": "no-cors",
-            "sec-fetch-dest": "script",
-            "accept-encoding": "gzip, deflate, br, zstd",
-            "accept-language": "en-US,en;q=0.9"
-        }
-        self.session.base_url = "https://gcaptcha4.geevisit.com"
+        # Receives a timing span per solve stage (see metrics.py); None = off
+        self.instrumentation = instrumentation
+        self.callback = self.random()
+        self._session_kwargs = kwargs
+        self.session = self._create_session(**kwargs)
+        self.session.headers = dict(self.HEADERS)
+        # GeetestSolver.BASE_URL (e.g. pointed at a stand-in server) applies to both flavours
+        self.session.base_url = getattr(self, "BASE_URL", GeetestSolver.BASE_URL)
+
+    def _create_session(self, **kwargs):
+        raise NotImplementedError
 
     def _log(self, msg: str):
         if self.debug:
@@ -46,10 +65,10 @@ class GeetestSolver:
     def _fresh_challenge(self):
         """Reset challenge and callback for a new attempt."""
         self.challenge = str(uuid4())
-        self.callback = GeetestSolver.random()
+        self.callback = self.random()
 
-    def load_captcha(self):
-        params = {
+    def _load_params(self) -> dict:
+        return {
             "captcha_id": self.captcha_id,
             "challenge": self.challenge,
             "client_type": "web",
@@ -57,15 +76,9 @@ class GeetestSolver:
             "lang": "eng",
             "callback": self.callback,
         }
-        res = self.session.get("/load", params=params)
-        data = self.format_response(res.text)
-        self._log(f"Loaded captcha: type={data.get('captcha_type', 'N/A')}, lot={data.get('lot_number', 'N/A')[:12]}...")
-        return data
-
-    def submit_captcha(self, data: dict) -> dict:
-        self.callback = GeetestSolver.random()
 
-        params = {
+    def _verify_params(self, data: dict, w: str) -> dict:
+        return {
             "callback": self.callback,
             "captcha_id": self.captcha_id,
             "client_type": "web",
@@ -75,11 +88,19 @@ class GeetestSolver:
             "process_token": data["process_token"],
             "payload_protocol": "1",
             "pt": "1",
-            "w": Signer.generate_w(data, self.captcha_id, self.risk_type),
+            "w": w,
         }
-        res = self.session.get("/verify", params=params).text
-        res = self.format_response(res)
 
+    @staticmethod
+    def _captured(result: dict, data: dict) -> dict:
+        """Hand a rejected solve's capture to the background writer, forget a passed one."""
+        if isinstance(result, dict) and result.get("result") == "fail":
+            capture.capture_buffer.flush(data["lot_number"], verify=result)
+        else:
+            capture.capture_buffer.discard(data["lot_number"])
+        return result
+
+    def _parse_verify(self, res: dict, data: dict) -> dict:
         if res.get("seccode") is None:
             # Handle 'continue' result (ai/invisible type)
             if res.get("result") == "continue":
@@ -96,12 +117,53 @@ class GeetestSolver:
 
         return res["seccode"]
 
-    def solve(self, max_retries: int = 5) -> dict:
+
+class GeetestSolver(_SolverBase):
+    BASE_URL = os.environ.get("GEETEST_API_URL", "https://gcaptcha4.geevisit.com")
+
+    def _create_session(self, **kwargs):
+        return requests.Session(impersonate="chrome124", **kwargs)
+
+    def load_captcha(self):
+        with metrics.span("load"):
+            res = self.session.get("/load", params=self._load_params())
+        data = self.format_response(res.text)
+        self._log(f"Loaded captcha: type={data.get('captcha_type', 'N/A')}, lot={data.get('lot_number', 'N/A')[:12]}...")
+        return data
+
+    def submit_captcha(self, data: dict) -> dict:
+        return self.verify(data, self.build_verify_params(data))
+
+    def build_verify_params(self, data: dict) -> dict:
+        """Solve the challenge and build the /verify query (w included), without sending it."""
+        self.callback = self.random()
+        with capture.capture_buffer.session(data["lot_number"], risk_type=self.risk_type, captcha_id=self.captcha_id):
+            capture.add("load", data)
+            return self._verify_params(data, Signer.generate_w(data, self.captcha_id, self.risk_type))
+
+    def verify(self, data: dict, params: dict) -> dict:
+        with metrics.span("verify"):
+            res = self.session.get("/verify", params=params).text
+        return self._captured(self._parse_verify(self.format_response(res), data), data)
+
+    @staticmethod
+    def _backoff():
+        with metrics.span("retry_sleep"):
+            time.sleep(random.uniform(0.5, 1.5))
+
+    def solve(self, max_retries: int = 5, hedge_after: Optional[float] = None, prefetch: bool = False,
+              max_parallel: int = 2) -> dict:
         """
         Solve the captcha with retry logic.
 
         Args:
             max_retries: Maximum number of attempts before giving up (default: 5)
+            hedge_after: Start another attempt once the newest one has run this many
+                seconds without an answer (default: None = no hedging)
+            prefetch: /load the next challenge while the current attempt is being
+                solved and verified, so a retry starts without a round trip or back-off
+            max_parallel: Cap on attempts and prefetch loads in flight at once when
+                hedging or prefetching (default: 2)
 
         Returns:
             dict: The seccode dict on success
@@ -109,39 +171,248 @@ class GeetestSolver:
         Raises:
             Exception: If all retries are exhausted
         """
+        if hedge_after is not None or prefetch:
+            return _HedgedSolve(self, max_retries, hedge_after, prefetch, max_parallel).run()
+
         for attempt in range(1, max_retries + 1):
-            try:
-                self._fresh_challenge()
-                data = self.load_captcha()
-                self.lot_number = data["lot_number"]
-                result = self.submit_captcha(data)
-
-                # Check if it's a fail result (dict with 'result': 'fail')
-                if isinstance(result, dict) and result.get("result") == "fail":
-                    fail_count = result.get("fail_count", "?")
-                    self._log(f"Attempt {attempt}/{max_retries}: FAIL (server fail_count={fail_count})")
+            with metrics.bind(self.instrumentation, risk_type=self.risk_type, attempt=attempt):
+                try:
+                    self._fresh_challenge()
+                    data = self.load_captcha()
+                    self.lot_number = data["lot_number"]
+                    result = self.submit_captcha(data)
+
+                    # Check if it's a fail result (dict with 'result': 'fail')
+                    if isinstance(result, dict) and result.get("result") == "fail":
+                        fail_count = result.get("fail_count", "?")
+                        self._log(f"Attempt {attempt}/{max_retries}: FAIL (server fail_count={fail_count})")
+                        metrics.event("attempt", result="fail")
+                        if attempt < max_retries:
+                            self._backoff()
+                            continue
+                        raise Exception(f"Exceeded {max_retries} retries. Last result: fail (fail_count={fail_count})")
+
+                    # Success!
+                    self._log(f"Attempt {attempt}/{max_retries}: SUCCESS")
+                    metrics.event("attempt", result="success")
+                    return result
+
+                except LowConfidenceError as e:
+                    # Answer would most likely fail: refresh straight away, skipping /verify and the back-off
+                    self._log(f"Attempt {attempt}/{max_retries}: {e}, refreshing challenge")
+                    metrics.event("attempt", result="low_confidence")
+                    if attempt < max_retries:
+                        continue
+                    raise
+
+                except KeyError as e:
+                    self._log(f"Attempt {attempt}/{max_retries}: KeyError - {e}")
+                    metrics.event("attempt", result="error")
+                    if attempt < max_retries:
+                        self._backoff()
+                        continue
+                    raise
+
+                except Exception as e:
+                    # Don't retry on non-recoverable errors (e.g. NotImplementedError)
+                    if "not implemented" in str(e).lower():
+                        raise
+                    self._log(f"Attempt {attempt}/{max_retries}: Error - {e}")
+                    metrics.event("attempt", result="error")
                     if attempt < max_retries:
-                        time.sleep(random.uniform(0.5, 1.5))
+                        self._backoff()
                         continue
-                    raise Exception(f"Exceeded {max_retries} retries. Last result: fail (fail_count={fail_count})")
+                    raise
 
-                # Success!
-                self._log(f"Attempt {attempt}/{max_retries}: SUCCESS")
-                return result
 
-            except KeyError as e:
-                self._log(f"Attempt {attempt}/{max_retries}: KeyError - {e}")
-                if attempt < max_retries:
-                    time.sleep(random.uniform(0.5, 1.5))
-                    continue
+class _HedgedSolve:
+    """
+    One ``solve()`` call with hedging and/or prefetch.
+
+    Attempts and prefetch loads run on their own threads, each on a spare
+    solver (own session, challenge and callback), so no per-attempt state is
+    shared. The first success is returned; attempts still running are told
+    to stop at their next stage boundary and their results are dropped.
+    """
+
+    PREFETCH_MAX_AGE = 30  # seconds a pre-loaded challenge is still worth using
+
+    def __init__(self, owner: GeetestSolver, max_retries: int, hedge_after: Optional[float], prefetch: bool,
+                 max_parallel: int):
+        self.owner = owner
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+        self.prefetch = prefetch
+        self.max_parallel = max(1, max_parallel)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="geetest-attempt")
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.spares = []      # idle solvers, reused so their connections stay warm
+        self.loaded = []      # prefetched (solver, data, loaded_at)
+        self.attempts = {}    # future -> (attempt number, started_at)
+        self.loads = set()    # prefetch futures
+        self.started = 0
+        self.waiting = 0      # retries held back for a prefetch that is about to land
+
+    def _solver(self) -> GeetestSolver:
+        with self.lock:
+            if self.spares:
+                return self.spares.pop()
+        owner = self.owner
+        return GeetestSolver(owner.captcha_id, owner.risk_type, debug=owner.debug,
+                             instrumentation=owner.instrumentation, **owner._session_kwargs)
+
+    def _release(self, solver: GeetestSolver):
+        with self.lock:
+            if not self.cancelled.is_set():
+                self.spares.append(solver)
+                return
+        solver.session.close()
+
+    def _attempt(self, number: int, preloaded, backoff: bool):
+        owner = self.owner
+        with metrics.bind(owner.instrumentation, risk_type=owner.risk_type, attempt=number):
+            solver, data = preloaded or (self._solver(), None)
+            try:
+                if data is None:
+                    if backoff:
+                        owner._backoff()
+                    if self.cancelled.is_set():
+                        return None
+                    solver._fresh_challenge()
+                    data = solver.load_captcha()
+                if self.cancelled.is_set():
+                    return None
+                solver.lot_number = data["lot_number"]
+                params = solver.build_verify_params(data)
+                if self.cancelled.is_set():
+                    # Another attempt already won: don't spend a /verify (and a lot_number) on this one
+                    capture.capture_buffer.discard(data["lot_number"])
+                    return None
+                result = solver.verify(data, params)
+            except LowConfidenceError:
+                metrics.event("attempt", result="low_confidence")
+                raise
+            except Exception:
+                metrics.event("attempt", result="error")
                 raise
+            finally:
+                self._release(solver)
+            failed = isinstance(result, dict) and result.get("result") == "fail"
+            metrics.event("attempt", result="fail" if failed else "success")
+            return result
 
-            except Exception as e:
-                # Don't retry on non-recoverable errors (e.g. NotImplementedError)
-                if "not implemented" in str(e).lower():
-                    raise
-                self._log(f"Attempt {attempt}/{max_retries}: Error - {e}")
-                if attempt < max_retries:
-                    time.sleep(random.uniform(0.5, 1.5))
-                    continue
+    def _load(self):
+        owner = self.owner
+        with metrics.bind(owner.instrumentation, risk_type=owner.risk_type, attempt="prefetch"):
+            solver = self._solver()
+            try:
+                solver._fresh_challenge()
+                data = solver.load_captcha()
+            except Exception:
+                self._release(solver)
                 raise
+            return solver, data, time.monotonic()
+
+    def _in_flight(self) -> int:
+        return len(self.attempts) + len(self.loads)
+
+    def _start(self, backoff: bool):
+        self.started += 1
+        preloaded = None
+        while self.loaded and preloaded is None:
+            solver, data, loaded_at = self.loaded.pop(0)
+            if time.monotonic() - loaded_at < self.PREFETCH_MAX_AGE:
+                preloaded = (solver, data)
+            else:
+                self._release(solver)
+        future = self.executor.submit(self._attempt, self.started, preloaded, backoff)
+        self.attempts[future] = (self.started, time.monotonic())
+
+    def _maybe_prefetch(self):
+        if (self.prefetch and not self.loaded and not self.loads and self.started + self.waiting < self.max_retries
+                and self._in_flight() < self.max_parallel):
+            self.loads.add(self.executor.submit(self._load))
+
+    def _hedge_timeout(self) -> Optional[float]:
+        """Seconds until the next hedge may start, None if no hedge is due."""
+        if (self.hedge_after is None or not self.attempts or self.started + self.waiting >= self.max_retries
+                or self._in_flight() >= self.max_parallel):
+            return None
+        newest = max(started_at for _, started_at in self.attempts.values())
+        return max(0.0, newest + self.hedge_after - time.monotonic())
+
+    def run(self) -> dict:
+        owner, max_retries = self.owner, self.max_retries
+        last = None
+        try:
+            self._start(backoff=False)
+            while self.attempts or self.waiting:
+                self._maybe_prefetch()
+                done, _ = wait(set(self.attempts) | self.loads, timeout=self._hedge_timeout(),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    owner._log(f"Attempt {self.started}/{max_retries}: no answer after {self.hedge_after}s, hedging")
+                    self._start(backoff=False)
+                    continue
+
+                for future in done:
+                    if future in self.loads:
+                        self.loads.discard(future)
+                        if future.exception() is None:
+                            self.loaded.append(future.result())
+                        else:
+                            owner._log(f"Prefetch failed: {future.exception()}")
+                        while self.waiting:
+                            self.waiting -= 1
+                            self._start(backoff=not self.loaded)
+                        continue
+
+                    attempt, _ = self.attempts.pop(future)
+                    backoff = True
+                    try:
+                        result = future.result()
+                    except LowConfidenceError as e:
+                        owner._log(f"Attempt {attempt}/{max_retries}: {e}, refreshing challenge")
+                        last, backoff = e, False
+                    except Exception as e:
+                        if "not implemented" in str(e).lower():
+                            raise
+                        owner._log(f"Attempt {attempt}/{max_retries}: Error - {e}")
+                        last = e
+                    else:
+                        if isinstance(result, dict) and result.get("result") == "fail":
+                            owner._log(f"Attempt {attempt}/{max_retries}: FAIL (server fail_count={result.get('fail_count', '?')})")
+                            last = result
+                        else:
+                            owner._log(f"Attempt {attempt}/{max_retries}: SUCCESS")
+                            if isinstance(result, dict):
+                                owner.lot_number = result.get("lot_number", owner.lot_number)
+                            return result
+
+                    if self.started + self.waiting < max_retries:
+                        if not self.loaded and self.loads:
+                            self.waiting += 1  # the prefetched challenge is cheaper than back-off + /load
+                        else:
+                            self._start(backoff)
+
+            if isinstance(last, BaseException):
+                raise last
+            raise Exception(f"Exceeded {max_retries} retries. Last result: fail (fail_count={(last or {}).get('fail_count', '?')})")
+        finally:
+            self.cancelled.set()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            with self.lock:
+                idle = self.spares + [solver for solver, _, _ in self.loaded]
+                self.spares, self.loaded = [], []
+            for solver in idle:
+                solver.session.close()
+            for future in self.loads:
+                # A prefetch still in flight closes its session once it lands
+                future.add_done_callback(_close_loaded)
+
+
+def _close_loaded(future):
+    # cancel_futures may have cancelled a queued prefetch: exception() would raise CancelledError
+    if not future.cancelled() and future.exception() is None:
+        future.result()[0].session.close()
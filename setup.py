@@ -12,11 +12,14 @@ setup(
         "numpy",
         "opencv-python-headless",
         "pycryptodome",
-        "ddddocr>=1.4.11"
+        "ddddocr>=1.6"
     ],
     include_package_data=True,
     package_data={
         "geetest_solver": ["models/*.onnx", "models/*.json"],
     },
+    entry_points={
+        "console_scripts": ["geetest-solver=geetest_solver.cli:main"],
+    },
     python_requires=">=3.8",
 )
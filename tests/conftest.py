@@ -0,0 +1,34 @@
+"""Shared fixtures for the offline tests."""
+import sys, os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest
+from Crypto.PublicKey import RSA
+
+import fixtures
+import mock_server
+from geetest_solver import GeetestSolver
+from geetest_solver.assets import asset_fetcher
+from geetest_solver.sign import Signer
+
+
+@pytest.fixture(scope="module")
+def mock():
+    """
+    A stand-in GeeTest server (benchmarks/mock_server.py) that in-process solvers
+    are pointed at for the module; ``mock.url`` is there for worker processes.
+    """
+    mock = mock_server.MockGeetest(fixtures.synthetic(2, types=["slide", "gobang", "ai"]), pow_bits=8)
+    server = mock_server.start(mock)
+    mock.url = server.url
+    saved = GeetestSolver.BASE_URL, asset_fetcher.base_url, Signer.encryptor_pubkey
+    GeetestSolver.BASE_URL = server.url
+    asset_fetcher.base_url = f"{server.url}/static/"
+    Signer.use_public_key(RSA.import_key(mock.public_pem()))
+    yield mock
+    GeetestSolver.BASE_URL, asset_fetcher.base_url = saved[:2]
+    Signer.use_public_key(saved[2])
+    server.shutdown()
@@ -0,0 +1,77 @@
+"""AssetFetcher.fetch_all against a local HTTP server that counts requests."""
+import sys, os, threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+
+from geetest_solver.assets import AssetFetcher
+from geetest_solver.cache import AssetCache
+
+
+class _Static(BaseHTTPRequestHandler):
+    """Serves every path with its own name as the body, except ``missing/...`` (404)."""
+    hits = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.lstrip("/")
+        with self.lock:
+            self.hits[path] += 1
+        status, body = (404, b"not found") if path.startswith("missing/") else (200, path.encode())
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def static():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Static)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(static):
+    _Static.hits.clear()
+    fetcher = AssetFetcher(base_url=static, max_workers=4, cache=AssetCache())
+    yield fetcher
+    fetcher.close()
+
+
+def test_repeated_paths_download_once(fetcher):
+    result = fetcher.fetch_all(["bg/a.png", "icon/b.png", "bg/a.png", "icon/c.png", "icon/b.png"])
+    assert list(result) == ["bg/a.png", "icon/b.png", "icon/c.png"]
+    assert all(result[path] == path.encode() for path in result)
+    assert _Static.hits == Counter({"bg/a.png": 1, "icon/b.png": 1, "icon/c.png": 1})
+
+
+def test_cache_hits_skip_the_network(fetcher):
+    fetcher.cache.put("bg/a.png", b"cached")
+    result = fetcher.fetch_all(["bg/a.png", "icon/b.png"])
+    assert result == {"bg/a.png": b"cached", "icon/b.png": b"icon/b.png"}
+    assert _Static.hits == Counter({"icon/b.png": 1})
+
+    # Everything is cached now: a second call sends no request at all
+    assert fetcher.fetch_all(["icon/b.png", "bg/a.png"]) == {"icon/b.png": b"icon/b.png", "bg/a.png": b"cached"}
+    assert _Static.hits == Counter({"icon/b.png": 1})
+
+
+@pytest.mark.parametrize("paths", [
+    ["missing/x.png"],  # downloaded inline
+    ["bg/a.png", "missing/x.png", "icon/b.png"],  # downloaded on the executor
+])
+def test_failed_download_is_raised(fetcher, paths):
+    with pytest.raises(requests.HTTPError, match="404"):
+        fetcher.fetch_all(paths)
+    # A failed download isn't cached as an empty asset
+    assert fetcher.cache.get("missing/x.png") is None
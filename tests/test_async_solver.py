@@ -0,0 +1,89 @@
+"""Offline AsyncGeetestSolver / solve_async runs against the stand-in GeeTest server in benchmarks/mock_server.py."""
+import sys, os, asyncio, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest
+from curl_cffi.requests.exceptions import SessionClosed
+
+from geetest_solver import AsyncGeetestSolver, GeetestSolver, solve_async
+
+CAPTCHA_ID = "54088bb07d2df3c46b79f80300b0abbe"
+RISK_TYPES = ["slide", "gobang", "ai"]
+
+
+def test_not_a_blocking_solver():
+    # Coroutine methods overriding blocking ones would break anything typed against GeetestSolver
+    assert not issubclass(AsyncGeetestSolver, GeetestSolver)
+
+
+async def _gather():
+    return await asyncio.gather(*(solve_async(CAPTCHA_ID, risk_type, max_retries=1) for risk_type in RISK_TYPES))
+
+
+def test_concurrent_solves(mock):
+    verifies = mock.stats()["verify"]
+    results = asyncio.run(_gather())
+    assert [r["captcha_id"] for r in results] == [CAPTCHA_ID] * len(RISK_TYPES)
+    assert mock.stats()["verify"] - verifies == len(RISK_TYPES)
+    assert mock.stats()["rejected"] == {}
+
+
+def test_solves_overlap_on_one_loop(mock):
+    mock.latency_ms = 300
+    try:
+        start = time.perf_counter()
+        asyncio.run(_gather())
+        elapsed = time.perf_counter() - start
+    finally:
+        mock.latency_ms = 0
+    # /load + /verify is 0.6s per solve; one after the other would be 1.8s
+    assert elapsed < 1.5
+
+
+def test_retries_after_fail(mock, monkeypatch):
+    verify = mock.verify
+    calls = []
+
+    def fail_first(params):
+        mock.fail_ratio = 0.0 if calls else 1.0
+        calls.append(params["lot_number"])
+        return verify(params)
+
+    monkeypatch.setattr(mock, "verify", fail_first)
+    try:
+        result = asyncio.run(solve_async(CAPTCHA_ID, "gobang", max_retries=2))
+    finally:
+        mock.fail_ratio = 0.0
+    assert result["captcha_id"] == CAPTCHA_ID
+    assert len(calls) == 2 and calls[0] != calls[1]  # the retry solved a fresh challenge
+
+
+def test_session_closed_on_exit(mock):
+    async def run():
+        async with AsyncGeetestSolver(CAPTCHA_ID, "ai") as solver:
+            await solver.solve(max_retries=1)
+        return solver
+
+    solver = asyncio.run(run())
+    with pytest.raises(SessionClosed):
+        asyncio.run(solver.load_captcha())
+
+
+def test_session_closed_when_retries_run_out(mock):
+    async def run():
+        async with AsyncGeetestSolver(CAPTCHA_ID, "ai") as solver:
+            holder.append(solver)
+            await solver.solve(max_retries=1)
+
+    holder = []
+    mock.fail_ratio = 1.0
+    try:
+        with pytest.raises(Exception, match="Exceeded 1 retries"):
+            asyncio.run(run())
+    finally:
+        mock.fail_ratio = 0.0
+    with pytest.raises(SessionClosed):
+        asyncio.run(holder[0].load_captcha())
@@ -0,0 +1,45 @@
+"""Offline checks for the content-addressed asset cache."""
+import sys, os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from geetest_solver.cache import AssetCache
+
+
+def _png(value):
+    ok, buf = cv2.imencode(".png", np.full((8, 8, 3), value, dtype=np.uint8))
+    return buf.tobytes()
+
+
+def test_memory_lru_eviction():
+    cache = AssetCache(max_items=2)
+    for i in range(3):
+        cache.put(f"a/{i}.png", _png(i))
+    assert cache.get("a/0.png") is None
+    assert cache.get("a/2.png") == _png(2)
+    stats = cache.stats()["raw"]
+    assert (stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1, 1)
+
+
+def test_decode_is_shared_and_read_only():
+    cache = AssetCache()
+    data = _png(7)
+    first = cache.decode(data, cv2.IMREAD_COLOR)
+    assert cache.decode(data, cv2.IMREAD_COLOR) is first
+    assert not first.flags.writeable
+    assert cache.decode(data, cv2.IMREAD_GRAYSCALE).ndim == 2
+    assert cache.stats()["decoded"]["hits"] == 1
+
+
+def test_disk_tier_survives_memory_clear(tmp_path):
+    cache = AssetCache(disk_dir=str(tmp_path))
+    cache.put("bg/x.png", _png(1))
+    cache.clear()
+    assert cache.get("bg/x.png") == _png(1)
+    assert cache.stats()["disk"]["hits"] == 1
+
+    # A second cache on the same directory (e.g. a restarted worker)
+    assert AssetCache(disk_dir=str(tmp_path)).get("bg/x.png") == _png(1)
@@ -0,0 +1,71 @@
+"""Offline checks for the failed-solve capture ring buffer."""
+import sys, os, json, threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from geetest_solver import capture
+from geetest_solver.capture import CaptureBuffer
+
+
+def _solve(buffer, lot, **items):
+    with buffer.session(lot, risk_type="icon", captcha_id="cid"):
+        for name, value in items.items():
+            capture.add(name, value)
+
+
+def test_failed_session_is_written(tmp_path):
+    buffer = CaptureBuffer(str(tmp_path))
+    _solve(buffer, "a" * 32, assets={"x/bg.jpg": b"jpeg"}, icon_crops=[np.zeros((4, 4), np.uint8)] * 2,
+           icon_scores=np.eye(2), answer={"userresponse": [[1, 2]]})
+    buffer.flush("a" * 32, verify={"result": "fail"})
+    buffer.join()
+
+    (target,) = tmp_path.iterdir()
+    names = sorted(p.name for p in target.iterdir())
+    assert names == ["assets_bg.jpg", "capture.json", "icon_crops_0.png", "icon_crops_1.png"]
+    meta = json.loads((target / "capture.json").read_text())
+    assert meta["risk_type"] == "icon" and meta["reason"] == "fail" and meta["verify"] == {"result": "fail"}
+    assert meta["items"] == {"icon_scores": [[1.0, 0.0], [0.0, 1.0]], "answer": {"userresponse": [[1, 2]]}}
+
+
+def test_passed_and_unsampled_sessions_are_not_written(tmp_path):
+    buffer = CaptureBuffer(str(tmp_path), sample_rate=0.0)
+    _solve(buffer, "a", answer={})
+    buffer.flush("a")
+    _solve(buffer, "b", answer={})
+    buffer.discard("b")
+    buffer.join()
+    assert list(tmp_path.iterdir()) == []
+    assert buffer.stats()["sampled_out"] == 1 and buffer.stats()["buffered"] == 0
+
+
+def test_ring_is_bounded_and_quota_enforced(tmp_path):
+    buffer = CaptureBuffer(str(tmp_path), capacity=2, quota_bytes=10)
+    for lot in "abc":
+        _solve(buffer, lot, assets={"bg.jpg": b"x" * 100})
+    assert buffer.stats()["buffered"] == 2 and buffer.stats()["evicted"] == 1
+    buffer.flush("a")  # evicted already
+    buffer.flush("c")
+    buffer.join()
+    assert buffer.stats()["over_quota"] == 1 and list(tmp_path.iterdir()) == []
+
+
+def test_disabled_and_outside_session_are_noops(tmp_path):
+    buffer = CaptureBuffer(str(tmp_path), enabled=False)
+    _solve(buffer, "a", answer={})
+    buffer.flush("a")
+    capture.add("answer", {})  # no session bound
+    assert buffer.stats()["sessions"] == 0
+
+
+def test_copied_context_reaches_worker_thread(tmp_path):
+    import contextvars
+    buffer = CaptureBuffer(str(tmp_path))
+    with buffer.session("a") as entry:
+        ctx = contextvars.copy_context()
+    thread = threading.Thread(target=ctx.run, args=(capture.add, "answer", {"x": 1}))
+    thread.start()
+    thread.join()
+    assert entry["items"] == {"answer": {"x": 1}}
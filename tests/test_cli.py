@@ -0,0 +1,79 @@
+"""`geetest-solver batch` against the stand-in GeeTest server in benchmarks/mock_server.py."""
+import sys, os, json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest
+
+from geetest_solver import cli
+
+CAPTCHA_ID = "54088bb07d2df3c46b79f80300b0abbe"
+
+
+def test_batch_streams_results_and_summary(mock, tmp_path, capsys):
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text("\n".join([
+        json.dumps({"id": 1, "captcha_id": CAPTCHA_ID, "risk_type": "slide"}),
+        json.dumps({"id": 2, "risk_type": "ai"}),
+        "",
+        "not json",
+        json.dumps({"id": 4}),
+    ]) + "\n")
+    out, summary = tmp_path / "out.jsonl", tmp_path / "summary.json"
+
+    code = cli.main(["batch", str(jobs), "-o", str(out), "-c", "2", "--captcha-id", CAPTCHA_ID,
+                     "--max-retries", "1", "--summary-json", str(summary)])
+
+    results = {r["line"]: r for r in map(json.loads, out.read_text().splitlines())}
+    assert sorted(results) == [1, 2, 4, 5]
+    assert results[1]["status"] == results[2]["status"] == "ok"
+    assert results[2]["id"] == 2 and results[2]["seccode"]["captcha_id"] == CAPTCHA_ID
+    assert results[4]["status"] == "error" and "invalid JSON" in results[4]["error"]
+    assert results[5]["id"] == 4 and "risk_type" in results[5]["error"]
+    stats = json.loads(summary.read_text())
+    assert (stats["jobs"], stats["solved"], stats["failed"]) == (4, 2, 2)
+    assert code == 1
+    assert "2/4 solved" in capsys.readouterr().err
+
+
+class _FakeSession:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeSolver:
+    created = []
+
+    def __init__(self, captcha_id, risk_type, debug=False, **kwargs):
+        self.risk_type = risk_type
+        self.session = _FakeSession()
+        _FakeSolver.created.append(self)
+
+    def solve(self, max_retries=5, hedge_after=None, prefetch=False):
+        if self.risk_type == "bad":
+            raise RuntimeError("verify failed")
+        return {"captcha_id": CAPTCHA_ID}
+
+
+def test_batch_closes_solver_sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "GeetestSolver", _FakeSolver)
+    _FakeSolver.created.clear()
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text("\n".join(json.dumps({"risk_type": risk_type}) for risk_type in ["slide", "bad", "slide", "bad"]))
+
+    cli.main(["batch", str(jobs), "-o", str(tmp_path / "out.jsonl"), "-c", "1", "--captcha-id", CAPTCHA_ID])
+
+    # One reused solver for slide, a fresh one per failed job, and every session closed by the end
+    assert [s.risk_type for s in _FakeSolver.created] == ["slide", "bad", "bad"]
+    assert all(s.session.closed for s in _FakeSolver.created)
+
+
+def test_debug_needs_an_output_file(capsys):
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["batch", "--debug", "--captcha-id", CAPTCHA_ID, "--risk-type", "slide"])
+    assert exc.value.code == 2
+    assert "-o FILE" in capsys.readouterr().err
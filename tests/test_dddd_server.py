@@ -0,0 +1,103 @@
+"""Offline checks for the detection batcher and the shared inference server."""
+import sys, os, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("ddddocr")
+
+import synthetic
+from geetest_solver.dddd_server import DdddService, DetectionBatcher, RemoteDdddService, serve
+
+IMAGES = [synthetic.make_icon(seed)[0] for seed in range(6)]
+
+
+@pytest.fixture(scope="module")
+def batched():
+    return DdddService(batch_size=4, max_wait_ms=50)
+
+
+@pytest.fixture(scope="module")
+def remote(batched, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("dddd") / "dddd.sock")
+    server = serve(batched, unix_path=path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield RemoteDdddService(f"unix:{path}", timeout=10)
+    server.shutdown()
+    server.server_close()
+
+
+def test_batched_detection_matches_single_calls(batched):
+    reference = [batched.det.detect(img) for img in IMAGES]
+    results = [None] * len(IMAGES)
+    barrier = threading.Barrier(len(IMAGES))
+
+    def detect(i):
+        barrier.wait()
+        results[i] = batched.detection(IMAGES[i])
+
+    threads = [threading.Thread(target=detect, args=(i,)) for i in range(len(IMAGES))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == reference
+    assert all(reference)
+    assert batched.batcher.images == len(IMAGES)
+    assert batched.batcher.batches < len(IMAGES)  # some requests shared a batch
+
+
+def test_lone_request_flushes_after_max_wait():
+    batcher = DetectionBatcher(lambda imgs: [len(imgs)] * len(imgs), max_batch=8, max_wait_ms=100)
+    start = time.perf_counter()
+    futures = [batcher.submit(None) for _ in range(3)]
+    assert [f.result(timeout=2) for f in futures] == [3, 3, 3]  # one partial batch, not a wait for 8
+    assert 0.09 <= time.perf_counter() - start < 1
+    assert (batcher.batches, batcher.images) == (1, 3)
+
+
+def test_full_batch_runs_without_waiting():
+    batcher = DetectionBatcher(lambda imgs: [len(imgs)] * len(imgs), max_batch=4, max_wait_ms=5000)
+    start = time.perf_counter()
+    futures = [batcher.submit(None) for _ in range(4)]
+    assert [f.result(timeout=2) for f in futures] == [4] * 4
+    assert time.perf_counter() - start < 1
+
+
+def test_batch_error_reaches_every_caller():
+    def broken(imgs):
+        raise ValueError("bad image")
+
+    batcher = DetectionBatcher(broken, max_batch=2, max_wait_ms=50)
+    futures = [batcher.submit(None) for _ in range(2)]
+    for future in futures:
+        with pytest.raises(ValueError, match="bad image"):
+            future.result(timeout=2)
+
+
+def test_unix_socket_round_trip(batched, remote):
+    for img in IMAGES[:3]:
+        decoded = cv2.imdecode(np.frombuffer(img, np.uint8), cv2.IMREAD_COLOR)
+        expected = batched.detection(img)
+        assert remote.detection(img) == expected
+        assert remote.detection(decoded) == expected
+
+    _, icons, _ = synthetic.make_icon(0)
+    assert remote.classification(icons[0]) == batched.classification(icons[0])
+
+    assert remote.health()["status"] == "ok"
+    stats = remote.stats()
+    assert stats["requests"] == {"/detection": 6, "/classification": 1}
+    assert stats["errors"] == stats["in_flight"] == 0
+
+
+def test_remote_error_is_raised(remote):
+    with pytest.raises(RuntimeError, match="Inference server error on /detection"):
+        remote.detection(b"not an image")
@@ -0,0 +1,57 @@
+"""Offline checks for GobangSolver against a straightforward reference implementation."""
+import sys, os, random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geetest_solver.gobang import GobangSolver
+
+
+def _reference(board):
+    """The original per-line frequency-dict search."""
+    n = len(board)
+    lines = [[(r, c) for c in range(n)] for r in range(n)] + [[(r, c) for r in range(n)] for c in range(n)]
+    lines += [[(s + i, i) for i in range(n - s)] for s in range(n)]
+    lines += [[(i, s + i) for i in range(n - s)] for s in range(1, n)]
+    lines += [[(s - i, i) for i in range(s + 1)] for s in range(n)]
+    lines += [[(n - 1 - i, s + i) for i in range(n - s)] for s in range(1, n)]
+    for line in lines:
+        elements = [board[r][c] for r, c in line]
+        freq = {}
+        for num in elements:
+            freq[num] = freq.get(num, 0) + 1
+        if n - 1 not in freq.values() or freq.get(0) == n - 1 or 0 not in elements:
+            continue
+        target = next(num for num, cnt in freq.items() if cnt == n - 1)
+        for r in range(n):
+            for c in range(n):
+                if (r, c) not in line and board[r][c] == target:
+                    return [[r, c], list(line[elements.index(0)])]
+    return None
+
+
+def _boards(count, n, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = [[rng.choice([0, 0, 1, 2, 3, 4]) for _ in range(n)] for _ in range(n)]
+        if rng.random() < 0.7:
+            # Plant a line that is one move away from n-in-a-row
+            value = rng.randint(1, 4)
+            r = rng.randrange(n)
+            for c in range(n):
+                board[r][c] = value
+            board[r][rng.randrange(n)] = 0
+        boards.append(board)
+    return boards
+
+
+def test_matches_reference():
+    for n in (3, 4, 5, 6):
+        for board in _boards(300, n, seed=n):
+            assert GobangSolver(board).find_four_in_line() == _reference(board)
+
+
+def test_batch_matches_single():
+    boards = _boards(100, 5) + _boards(50, 4, seed=1)
+    random.Random(2).shuffle(boards)
+    assert GobangSolver.solve_batch(boards) == [GobangSolver(b).find_four_in_line() for b in boards]
@@ -0,0 +1,38 @@
+"""Offline checks for the global question -> crop assignment used by IconSolver."""
+import sys, os, itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from geetest_solver.icon import assign_icons, assignment_confidence
+
+
+def _brute_force(scores):
+    n_rows, n_cols = scores.shape
+    slots = list(range(n_cols)) + [None] * n_rows
+    return max(sum(scores[i, p[i]] for i in range(n_rows) if p[i] is not None)
+               for p in itertools.permutations(slots, n_rows))
+
+
+def test_beats_greedy():
+    # Greedy in question order would give question 0 crop 0 (10) and question 1 crop 1 (1) = 11
+    scores = np.array([[10.0, 9.0], [9.0, 1.0]])
+    assert assign_icons(scores) == [1, 0]
+
+
+def test_optimal_on_random_matrices():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n_rows, n_cols = map(int, rng.integers(1, 6, 2))
+        scores = rng.integers(0, 30, (n_rows, n_cols)).astype(float)
+        assignment = assign_icons(scores)
+        used = [c for c in assignment if c != -1]
+        assert len(used) == len(set(used)) == min(n_rows, n_cols)
+        assert sum(scores[q, c] for q, c in enumerate(assignment) if c != -1) == _brute_force(scores)
+
+
+def test_confidence_margin():
+    scores = np.array([[10.0, 2.0, 1.0], [3.0, 9.0, 8.0]])
+    assert assignment_confidence(scores, assign_icons(scores)) == 1.0
+    assert assignment_confidence(np.array([[0.0, 0.0]]), [0]) == 0.0
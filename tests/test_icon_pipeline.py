@@ -0,0 +1,51 @@
+"""Offline checks for IconSolver's image preparation (question icons, shared decoded background)."""
+import sys, os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import cv2
+import numpy as np
+import pytest
+
+import synthetic
+from geetest_solver.icon import IconSolver
+
+
+def _float_reference(img):
+    """The former float64 composite-onto-white, gray, invert."""
+    alpha = img[:, :, 3] / 255.0
+    rgb = img[:, :, :3]
+    composited = (rgb * alpha[:, :, np.newaxis] + 255 * (1 - alpha[:, :, np.newaxis])).astype(np.uint8)
+    return cv2.bitwise_not(cv2.cvtColor(composited, cv2.COLOR_BGR2GRAY))
+
+
+def _solver(icons):
+    bg, _, _ = synthetic.make_icon(0)
+    assets = {"bg.jpg": bg, **{f"q{i}.png": cv2.imencode(".png", icon)[1].tobytes() for i, icon in enumerate(icons)}}
+    return IconSolver("bg.jpg", [f"q{i}.png" for i in range(len(icons))], assets)
+
+
+def test_icons_match_float_composite():
+    rng = np.random.default_rng(0)
+    antialiased = np.zeros((40, 40, 4), np.uint8)
+    cv2.circle(antialiased, (20, 20), 12, (30, 40, 50, 255), 3, lineType=cv2.LINE_AA)
+    icons = [rng.integers(0, 256, (40, 40, 4), dtype=np.uint8), antialiased]
+    solver = _solver(icons + [rng.integers(0, 256, (30, 30, 3), dtype=np.uint8)])
+
+    for icon, prepared in zip(icons, solver.ques_imgs):
+        assert prepared.dtype == np.uint8 and prepared.shape == icon.shape[:2]
+        # Rounds where the float path truncated
+        assert np.abs(prepared.astype(int) - _float_reference(icon).astype(int)).max() <= 2
+    assert solver.ques_imgs[1][0, 0] == 0  # transparent -> white -> inverted to black
+    assert solver.ques_imgs[2].shape == (30, 30)  # opaque BGR icons are just gray + inverted
+
+
+def test_detection_on_decoded_array_matches_bytes():
+    pytest.importorskip("ddddocr")
+    from geetest_solver.dddd_server import YoloxDetector
+    detector = YoloxDetector()
+    solver = _solver([])
+    assert not solver.captcha_img.flags.writeable  # shared through the asset cache
+    assert detector.detect(solver.captcha_img) == detector.detect(solver.captcha_bytes)
@@ -0,0 +1,24 @@
+"""Package import must stay light: CV/ML dependencies load only for the risk types that need them."""
+import sys, os, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loaded_after(stmt):
+    probe = f"{stmt}; import sys; print(' '.join(m for m in ('cv2', 'numpy', 'requests', 'onnxruntime') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+
+def test_package_import_is_lazy():
+    assert _loaded_after("from geetest_solver import GeetestSolver, AsyncGeetestSolver") == set()
+
+
+def test_ai_payload_needs_no_cv():
+    stmt = (
+        "from geetest_solver.sign import Signer; "
+        "Signer.generate_w({'lot_number': 'a' * 32, 'pt': '1', 'pow_detail': "
+        "{'hashfunc': 'md5', 'version': '1', 'bits': 0, 'datetime': 'd'}}, 'cid', 'ai')"
+    )
+    assert _loaded_after(stmt) == set()
+
@@ -0,0 +1,75 @@
+"""Offline checks for the stage instrumentation in geetest_solver.metrics."""
+import sys, os, contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geetest_solver import metrics
+from geetest_solver.metrics import HistogramAggregator, Instrumentation
+
+
+class Recording(Instrumentation):
+    def __init__(self):
+        self.spans, self.events = [], []
+
+    def on_span(self, stage, seconds, labels, error=None):
+        self.spans.append((stage, dict(labels), error is not None))
+
+    def on_event(self, name, labels):
+        self.events.append((name, dict(labels)))
+
+
+def test_unbound_is_noop():
+    assert metrics.span("pow") is metrics.span("load")
+    with metrics.span("pow"):
+        pass
+    metrics.event("attempt", result="success")
+
+
+def test_spans_carry_labels_and_errors():
+    sink = Recording()
+    with metrics.bind(sink, risk_type="slide", attempt=2):
+        with metrics.span("load"):
+            pass
+        try:
+            with metrics.span("verify"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        metrics.event("attempt", result="fail")
+    with metrics.span("load"):
+        pass  # unbound again
+
+    assert sink.spans == [("load", {"risk_type": "slide", "attempt": 2}, False),
+                          ("verify", {"risk_type": "slide", "attempt": 2}, True)]
+    assert sink.events == [("attempt", {"risk_type": "slide", "attempt": 2, "result": "fail"})]
+
+
+def test_copied_context_reaches_worker_threads():
+    sink = Recording()
+    with metrics.bind(sink, risk_type="icon", attempt=1):
+        ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(1) as pool:
+        pool.submit(ctx.run, lambda: metrics.span("detection").__enter__().__exit__(None, None, None)).result()
+    assert sink.spans == [("detection", {"risk_type": "icon", "attempt": 1}, False)]
+
+
+def test_histogram_and_prometheus_export():
+    agg = HistogramAggregator(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.05, 0.05, 2.0):
+        agg.on_span("pow", seconds, {"risk_type": "ai", "attempt": 1})
+    agg.on_span("verify", 0.05, {"risk_type": "ai", "attempt": 3}, ValueError())
+    agg.on_event("attempt", {"risk_type": "ai", "attempt": 1, "result": "success"})
+
+    snapshot = agg.snapshot()
+    pow_stage = next(s for s in snapshot["stages"] if s["stage"] == "pow")
+    assert pow_stage["count"] == 4 and pow_stage["p50"] == 0.1 and pow_stage["p99"] is None
+    assert snapshot["events"] == [{"event": "attempt", "risk_type": "ai", "result": "success", "count": 1}]
+
+    text = agg.prometheus()
+    assert 'geetest_stage_duration_seconds_bucket{risk_type="ai",stage="pow",le="0.1"} 3' in text
+    assert 'geetest_stage_duration_seconds_bucket{risk_type="ai",stage="pow",le="+Inf"} 4' in text
+    assert 'geetest_stage_duration_seconds_count{risk_type="ai",stage="pow"} 4' in text
+    assert 'geetest_stage_errors_total{risk_type="ai",stage="verify"} 1' in text
+    assert 'geetest_events_total{risk_type="ai",event="attempt",result="success"} 1' in text
+    assert "attempt=" not in text  # not a histogram dimension by default
@@ -0,0 +1,118 @@
+"""Offline end-to-end solves against the stand-in GeeTest server in benchmarks/mock_server.py."""
+import sys, os, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest
+from Crypto.PublicKey import RSA
+
+from geetest_solver import GeetestSolver, HistogramAggregator
+from geetest_solver.sign import Signer
+
+CAPTCHA_ID = "54088bb07d2df3c46b79f80300b0abbe"
+
+
+@pytest.mark.parametrize("risk_type", ["slide", "gobang", "ai"])
+def test_solve_end_to_end(mock, risk_type):
+    result = GeetestSolver(CAPTCHA_ID, risk_type).solve(max_retries=1)
+    assert result["captcha_id"] == CAPTCHA_ID
+    assert mock.stats()["rejected"] == {}
+
+
+def test_instrumented_solve_reports_every_stage(mock):
+    agg = HistogramAggregator()
+    GeetestSolver(CAPTCHA_ID, "slide", instrumentation=agg).solve(max_retries=1)
+    stages = {s["stage"] for s in agg.snapshot()["stages"]}
+    assert stages == {"load", "assets", "matching", "pow", "encrypt", "verify"}
+    assert 'event="attempt",result="success"} 1' in agg.prometheus()
+
+
+def test_rejects_w_for_other_key(mock):
+    data = mock.load(CAPTCHA_ID, "ai")["data"]
+    w = Signer.generate_w(data, CAPTCHA_ID, "ai")
+    saved = Signer.encryptor_pubkey
+    Signer.use_public_key(RSA.generate(1024).public_key())
+    try:
+        foreign = mock.load(CAPTCHA_ID, "ai")["data"]
+        foreign_w = Signer.generate_w(foreign, CAPTCHA_ID, "ai")
+    finally:
+        Signer.use_public_key(saved)
+
+    assert mock.verify({"captcha_id": CAPTCHA_ID, "lot_number": data["lot_number"], "w": w})["status"] == "success"
+    response = mock.verify({"captcha_id": CAPTCHA_ID, "lot_number": foreign["lot_number"], "w": foreign_w})
+    assert response["status"] == "error"
+    assert "data" not in response
+
+
+def test_prefetch_retries_without_backoff(mock):
+    mock.fail_ratio = 1.0
+    try:
+        start = time.perf_counter()
+        with pytest.raises(Exception, match="Exceeded 3 retries"):
+            GeetestSolver(CAPTCHA_ID, "ai").solve(max_retries=3, prefetch=True)
+        # 3 serial fails would sleep 0.5-1.5s twice; prefetched challenges skip that
+        assert time.perf_counter() - start < 1.0
+    finally:
+        mock.fail_ratio = 0.0
+
+
+def test_hedged_attempt_wins(mock):
+    mock.latency_ms = 150
+    verifies = mock.stats()["verify"]
+    try:
+        result = GeetestSolver(CAPTCHA_ID, "gobang").solve(max_retries=3, hedge_after=0.05, max_parallel=2)
+    finally:
+        mock.latency_ms = 0
+    assert result["captcha_id"] == CAPTCHA_ID
+    assert mock.stats()["verify"] - verifies <= 2  # capped at two concurrent attempts
+
+
+def _join_attempts():
+    for thread in threading.enumerate():
+        if thread.name.startswith("geetest-attempt"):
+            thread.join(5)
+
+
+def test_losing_attempt_skips_verify(mock, monkeypatch):
+    _join_attempts()  # a loser of the previous test may still be mid-/verify
+    generate_w, release = Signer.generate_w, threading.Event()
+    calls = []
+
+    def slow_first(*args, **kwargs):
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            release.wait(5)  # attempt 1 is still building w when the hedge wins
+        return generate_w(*args, **kwargs)
+
+    monkeypatch.setattr(Signer, "generate_w", staticmethod(slow_first))
+    verifies = mock.stats()["verify"]
+    result = GeetestSolver(CAPTCHA_ID, "gobang").solve(max_retries=3, hedge_after=0.05, max_parallel=2)
+    assert result["captcha_id"] == CAPTCHA_ID
+    assert mock.stats()["verify"] - verifies == 1
+
+    release.set()
+    _join_attempts()
+    assert len(calls) == 2
+    assert mock.stats()["verify"] - verifies == 1  # the loser stopped before /verify
+
+
+def test_close_loaded_prefetch():
+    from concurrent.futures import Future
+    from unittest.mock import Mock
+    from geetest_solver.solver import _close_loaded
+
+    cancelled = Future()
+    cancelled.cancel()
+    _close_loaded(cancelled)  # called directly: add_done_callback would swallow a CancelledError
+
+    failed = Future()
+    failed.set_exception(OSError("load failed"))
+    _close_loaded(failed)
+
+    solver = Mock()
+    landed = Future()
+    landed.set_result((solver, {}, 0.0))
+    _close_loaded(landed)
+    solver.session.close.assert_called_once_with()
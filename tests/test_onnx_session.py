@@ -0,0 +1,73 @@
+"""onnxruntime session options and the optimized-graph cache of the icon detector."""
+import sys, os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("ddddocr")
+
+import synthetic
+from geetest_solver.dddd_server import SessionConfig, YoloxDetector
+
+IMAGES = [cv2.imdecode(np.frombuffer(synthetic.make_icon(seed)[0], np.uint8), cv2.IMREAD_COLOR) for seed in range(4)]
+
+
+@pytest.fixture(scope="module")
+def reference():
+    detector = YoloxDetector(config=SessionConfig())
+    return [detector.detect(img) for img in IMAGES]
+
+
+@pytest.mark.parametrize("config", [
+    SessionConfig(intra_op_threads=1, spinning=False),
+    SessionConfig(optimization="basic"),
+    SessionConfig(execution_mode="parallel", inter_op_threads=2),
+], ids=["single-thread", "basic", "parallel"])
+def test_tuned_sessions_give_same_boxes(reference, config):
+    assert [YoloxDetector(config=config).detect(img) for img in IMAGES] == reference
+
+
+def test_optimized_graph_is_cached(reference, tmp_path):
+    config = SessionConfig(intra_op_threads=1, cache_dir=str(tmp_path))
+    first = YoloxDetector(config=config)
+    (cached,) = tmp_path.iterdir()
+    mtime = cached.stat().st_mtime_ns
+    second = YoloxDetector(config=config)  # loads the saved graph, optimization disabled
+    assert cached.stat().st_mtime_ns == mtime and len(list(tmp_path.iterdir())) == 1
+    assert [first.detect(img) for img in IMAGES] == [second.detect(img) for img in IMAGES] == reference
+
+    cached.write_bytes(b"truncated")
+    assert [YoloxDetector(config=config).detect(img) for img in IMAGES] == reference
+
+
+def test_rejects_unknown_options():
+    with pytest.raises(ValueError):
+        SessionConfig(optimization="max")
+    with pytest.raises(ValueError):
+        SessionConfig(execution_mode="async")
+
+
+def test_classifier_session_is_swapped(capsys):
+    from geetest_solver.dddd_server import DdddService
+    service = DdddService(config=SessionConfig(intra_op_threads=1))
+    options = service.cnn.ocr_engine.session.get_session_options()
+    assert options.intra_op_num_threads == 1
+    assert "ocr_engine" not in capsys.readouterr().err
+
+
+def test_warns_when_classifier_session_is_unknown(monkeypatch, capsys):
+    import ddddocr
+    from geetest_solver.dddd_server import DdddService
+
+    class OldDdddOcr:  # no ocr_engine, like ddddocr < 1.6
+        def __init__(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(ddddocr, "DdddOcr", OldDdddOcr)
+    DdddService(config=SessionConfig(intra_op_threads=1))
+    assert "ocr_engine.session" in capsys.readouterr().err
@@ -0,0 +1,121 @@
+"""Offline checks for TokenPool with a stand-in solver."""
+import sys, os, time, threading, itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from geetest_solver.pool import TokenPool
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSolver:
+    counter = itertools.count()
+    lock = threading.Lock()
+    running = peak = 0
+
+    def __init__(self, captcha_id, risk_type, delay=0.01, gen_time_offset=0.0):
+        self.key = (captcha_id, risk_type)
+        self.delay = delay
+        self.gen_time_offset = gen_time_offset
+        self.session = FakeSession()
+
+    def solve(self, max_retries=5):
+        with FakeSolver.lock:
+            FakeSolver.running += 1
+            FakeSolver.peak = max(FakeSolver.peak, FakeSolver.running)
+        time.sleep(self.delay)
+        with FakeSolver.lock:
+            FakeSolver.running -= 1
+        return {"captcha_id": self.key[0], "pass_token": next(FakeSolver.counter),
+                "gen_time": str(int(time.time() + self.gen_time_offset))}
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_fills_each_key_and_serves_hits():
+    with TokenPool(size=3, concurrency=2, solver_factory=FakeSolver) as pool:
+        pool.add("a", "slide")
+        pool.add("b", "ai", size=1)
+        _wait_for(lambda: pool.stats()["depth"] == 4)
+        token = pool.get("a", "slide", timeout=1)
+        assert token["captcha_id"] == "a"
+        stats = pool.stats()["keys"]["a/slide"]
+        assert stats["hits"] == 1 and stats["misses"] == 0 and stats["hit_rate"] == 1.0
+        _wait_for(lambda: pool.stats()["keys"]["a/slide"]["depth"] == 3)  # refilled
+
+
+def test_concurrency_is_bounded():
+    FakeSolver.peak = 0
+    with TokenPool(size=8, concurrency=2, solver_factory=lambda c, r: FakeSolver(c, r, delay=0.02)) as pool:
+        pool.add("a", "slide")
+        pool.add("b", "icon")
+        _wait_for(lambda: pool.stats()["depth"] == 16)
+    assert FakeSolver.peak <= 2
+
+
+def test_expired_tokens_are_dropped():
+    # gen_time already 10s old with a 5s ttl: every token is stale on arrival
+    factory = lambda c, r: FakeSolver(c, r, gen_time_offset=-10)
+    with TokenPool(size=1, concurrency=1, ttl=5, error_backoff=0, solver_factory=factory) as pool:
+        with pytest.raises(TimeoutError):
+            pool.get("a", "ai", timeout=0.2)
+        assert pool.stats()["keys"]["a/ai"]["expired"] >= 1
+
+
+def test_miss_waits_for_refill():
+    with TokenPool(size=1, concurrency=1, solver_factory=lambda c, r: FakeSolver(c, r, delay=0.05)) as pool:
+        assert pool.get("a", "gobang", timeout=2)["captcha_id"] == "a"
+        stats = pool.stats()["keys"]["a/gobang"]
+        assert stats["misses"] == 1 and stats["hit_rate"] == 0.0 and stats["avg_miss_wait_ms"] > 0
+
+
+class FailingSolver(FakeSolver):
+    def solve(self, max_retries=5):
+        raise RuntimeError("verify failed")
+
+
+def test_sessions_are_closed():
+    created = []
+
+    def factory(captcha_id, risk_type):
+        solver = (FailingSolver if risk_type == "icon" else FakeSolver)(captcha_id, risk_type)
+        created.append(solver)
+        return solver
+
+    pool = TokenPool(size=2, concurrency=2, error_backoff=0.01, solver_factory=factory)
+    pool.add("a", "slide")
+    _wait_for(lambda: pool.stats()["depth"] == 2)
+    pool.add("b", "icon")
+    _wait_for(lambda: pool.stats()["keys"]["b/icon"]["errors"] >= 2)
+    # a solver that errored is dropped along with its session
+    assert all(s.session.closed for s in created if isinstance(s, FailingSolver))
+    assert not any(s.session.closed for s in created if not isinstance(s, FailingSolver))
+
+    pool.close()
+    for thread in pool._threads:
+        thread.join(5)
+    assert all(s.session.closed for s in created)
+
+
+def test_close_cuts_error_backoff_short():
+    pool = TokenPool(size=1, concurrency=1, error_backoff=60, solver_factory=FailingSolver)
+    pool.add("b", "icon")
+    _wait_for(lambda: pool.stats()["keys"]["b/icon"]["errors"] == 1)
+    start = time.time()
+    pool.close()
+    pool._threads[0].join(5)
+    assert not pool._threads[0].is_alive()
+    assert time.time() - start < 1
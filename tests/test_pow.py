@@ -0,0 +1,59 @@
+"""Offline checks for the proof-of-work search (no network needed)."""
+import sys, os, hashlib, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import CancelledError
+
+import pytest
+
+from geetest_solver.pow import PowEngine, zero_digits
+
+
+def _check(result, pow_string, hash_func, bits):
+    assert result["pow_msg"].startswith(pow_string)
+    assert len(result["pow_msg"]) == len(pow_string) + 16
+    assert getattr(hashlib, hash_func)(result["pow_msg"].encode()).hexdigest() == result["pow_sign"]
+    assert result["pow_sign"].startswith("0" * zero_digits(bits))
+
+
+@pytest.mark.parametrize("hash_func", ["md5", "sha1", "sha256"])
+@pytest.mark.parametrize("bits", [0, 4, 9, 14])
+def test_inline(hash_func, bits):
+    pow_string = f"1|{bits}|{hash_func}|2024-01-01T00:00:00|cid|lot||"
+    engine = PowEngine(workers=1)
+    _check(engine.solve(pow_string, hash_func, bits), pow_string, hash_func, bits)
+
+
+def test_parallel():
+    pow_string = "1|12|md5|2024-01-01T00:00:00|cid|lot||"
+    engine = PowEngine(workers=2, min_bits=0, chunk_size=1 << 10)
+    try:
+        _check(engine.solve(pow_string, "md5", 12), pow_string, "md5", 12)
+    finally:
+        engine.close()
+
+
+def test_threshold_rule():
+    assert zero_digits(8) == 2
+    assert zero_digits(9) == 2    # remainder 1 -> accepted up to 7 digits
+    assert zero_digits(14) == 3   # remainder 2 -> accepted up to 3 digits
+    assert zero_digits(13) == 3   # remainder 1
+    with pytest.raises(ValueError):
+        zero_digits(15)           # remainder 3 -> only accepted up to 1 digit
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cancel_stops_running_search(workers):
+    # 28 bits takes minutes to find; the search must give up within a chunk of the cancel
+    pow_string = "1|28|md5|2024-01-01T00:00:00|cid|lot||"
+    engine = PowEngine(workers=workers, min_bits=0, chunk_size=1 << 14)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    start = time.perf_counter()
+    try:
+        with pytest.raises(CancelledError):
+            engine.solve(pow_string, "md5", 28, cancel)
+    finally:
+        engine.close()
+    assert time.perf_counter() - start < 2
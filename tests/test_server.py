@@ -0,0 +1,135 @@
+"""The HTTP solve service (geetest_solver/server.py) against the stand-in GeeTest server."""
+import sys, os, json, threading, time, urllib.request, urllib.error
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest
+
+import mock_server
+from geetest_solver.server import DeadlineExceeded, SolveService, serve
+
+CAPTCHA_ID = "54088bb07d2df3c46b79f80300b0abbe"
+
+
+@pytest.fixture(scope="module")
+def api(mock):
+    service = SolveService(workers=1, threads=1, max_queue=1, max_retries=1, kill_grace=5, preload_models=False,
+                           initializer=mock_server.point_solvers_at, initargs=(mock.url,))
+    http = serve(service, port=0)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    yield http.url
+    http.shutdown()
+    service.close()
+
+
+def post(url, body):
+    request = urllib.request.Request(f"{url}/solve", json.dumps(body).encode(), {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as res:
+            return res.status, json.load(res)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_solve_and_metrics(api):
+    for risk_type in ("slide", "ai"):
+        status, body = post(api, {"captcha_id": CAPTCHA_ID, "risk_type": risk_type})
+        assert status == 200 and body["seccode"]["captcha_id"] == CAPTCHA_ID
+    assert post(api, {"captcha_id": CAPTCHA_ID})[0] == 400
+
+    with urllib.request.urlopen(f"{api}/metrics") as res:
+        text = res.read().decode()
+    assert 'geetest_stage_duration_seconds_count{risk_type="slide",stage="verify"} 1' in text
+    assert 'geetest_events_total{risk_type="ai",event="request",result="200"} 1' in text
+    assert "geetest_server_workers 1" in text
+
+
+def test_sheds_when_queue_is_full_and_enforces_deadline(api, mock):
+    mock.latency_ms = 400
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(post(api, {"captcha_id": CAPTCHA_ID,
+                                                                             "risk_type": "ai"})))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # One solving, one queued; the rest are shed
+        assert sorted(status for status, _ in results).count(503) >= 2
+
+        status, body = post(api, {"captcha_id": CAPTCHA_ID, "risk_type": "ai", "deadline": 0.2})
+        assert status == 504 and body["error"] == "deadline exceeded"
+    finally:
+        mock.latency_ms = 0
+
+
+@pytest.fixture
+def service(mock):
+    service = SolveService(workers=1, threads=1, max_retries=1, kill_grace=0.3, preload_models=False,
+                           initializer=mock_server.point_solvers_at, initargs=(mock.url,))
+    yield service
+    service.close()
+
+
+def _wait_for(predicate, timeout=15.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "condition not reached"
+        time.sleep(0.02)
+
+
+def test_dead_worker_is_replaced_without_a_job(service):
+    service._workers[0].process.kill()
+    # The reader notices the crash and starts a new process before any job is sent to it
+    _wait_for(lambda: service.stats()["restarts"] == 1 and service.stats()["workers"] == 1)
+    job = service.submit(CAPTCHA_ID, "ai", deadline=10)
+    assert job.future.result(timeout=10)["captcha_id"] == CAPTCHA_ID
+
+
+def test_job_sent_to_dead_worker_fails_fast(service):
+    worker = service._workers[0]
+    with service._replace_lock:  # hold the replacement back so the job reaches the dead process
+        worker.process.kill()
+        worker.process.join()
+        _wait_for(lambda: worker.dead)
+        start = time.perf_counter()
+        job = service.submit(CAPTCHA_ID, "ai", deadline=10)
+        with pytest.raises(RuntimeError, match="solver worker died"):
+            job.future.result(timeout=5)
+        assert time.perf_counter() - start < 2  # not the deadline + kill_grace
+    _wait_for(lambda: service.stats()["restarts"] == 1 and service.stats()["workers"] == 1)
+    assert service.submit(CAPTCHA_ID, "ai", deadline=10).future.result(timeout=10)["captcha_id"] == CAPTCHA_ID
+
+
+def test_worker_dying_mid_solve_fails_its_job(service, mock):
+    mock.latency_ms = 1000
+    try:
+        job = service.submit(CAPTCHA_ID, "ai", deadline=10)
+        _wait_for(lambda: job.started is not None)
+        time.sleep(0.2)
+        start = time.perf_counter()
+        service._workers[0].process.kill()
+        with pytest.raises(RuntimeError, match="solver worker died"):
+            job.future.result(timeout=5)
+        assert time.perf_counter() - start < 1
+    finally:
+        mock.latency_ms = 0
+    _wait_for(lambda: service.stats()["restarts"] == 1)
+
+
+def test_overrunning_solve_is_killed_and_replaced(service, mock):
+    old = service._workers[0]
+    mock.latency_ms = 3000
+    try:
+        job = service.submit(CAPTCHA_ID, "ai", deadline=0.5)
+        with pytest.raises(DeadlineExceeded):
+            job.future.result(timeout=5)
+    finally:
+        mock.latency_ms = 0
+    # deadline + kill_grace later the stuck process is killed and a fresh one takes over
+    _wait_for(lambda: service.stats()["restarts"] == 1 and service._workers[0] is not old)
+    assert not old.process.is_alive()
+    assert service.submit(CAPTCHA_ID, "ai", deadline=10).future.result(timeout=10)["captcha_id"] == CAPTCHA_ID
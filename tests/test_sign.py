@@ -0,0 +1,114 @@
+"""Offline checks of the w payload built by Signer.generate_w."""
+import sys, os, json, random, time, urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import CancelledError
+
+import pytest
+from Crypto.PublicKey import RSA
+from Crypto.Cipher import PKCS1_v1_5
+
+from geetest_solver import sign
+from geetest_solver.sign import Signer, lotParser, W_HEAD, W_STATIC
+
+
+def _challenge(seed, pt="0"):
+    rng = random.Random(seed)
+    return {
+        "lot_number": "%032x" % rng.getrandbits(128),
+        "pt": pt,
+        "pow_detail": {"hashfunc": "md5", "version": "1", "bits": 0, "datetime": "2024-01-01T00:00:00.000000+08:00"},
+    }
+
+
+def _legacy_payload(data, captcha_id, pow_fields, extra=None):
+    lot_number = data["lot_number"]
+    base = W_HEAD | {**pow_fields, **lotParser.get_dict(lot_number), **W_STATIC, "lot_number": lot_number}
+    if extra:
+        base |= extra
+    return json.dumps(base)
+
+
+def _payload(w):
+    return urllib.parse.unquote_plus(w)
+
+
+def test_lot_parser():
+    rng = random.Random(1)
+    for _ in range(50):
+        lot = "%032x" % rng.getrandbits(128)
+        # "(n[4:7])+.+(n[23:26]+n[3:6])" -> "n[21:28]", both ends inclusive
+        assert lotParser.get_dict(lot) == {lot[4:8]: {lot[23:27] + lot[3:7]: lot[21:29]}}
+
+
+def test_ai_payload_identical():
+    for seed in range(20):
+        data = _challenge(seed)
+        payload = _payload(Signer.generate_w(data, "cid", "ai"))
+        pow_fields = {k: json.loads(payload)[k] for k in ("pow_msg", "pow_sign")}
+        assert payload == _legacy_payload(data, "cid", pow_fields)
+
+
+def test_solver_fields_appended():
+    sign.RISK_SOLVERS["_fake"] = lambda data, assets: {"passtime": 700, "userresponse": [[1, 2], [3, 4]]}
+    try:
+        data = _challenge(7)
+        payload = _payload(Signer.generate_w(data, "cid", "_fake"))
+        pow_fields = {k: json.loads(payload)[k] for k in ("pow_msg", "pow_sign")}
+        assert payload == _legacy_payload(data, "cid", pow_fields, {"passtime": 700, "userresponse": [[1, 2], [3, 4]]})
+    finally:
+        del sign.RISK_SOLVERS["_fake"]
+
+
+def test_solver_fields_override():
+    sign.RISK_SOLVERS["_fake"] = lambda data, assets: {"lot_number": "override"}
+    try:
+        payload = _payload(Signer.generate_w(_challenge(8), "cid", "_fake"))
+        assert payload.count('"lot_number"') == 1
+        assert json.loads(payload)["lot_number"] == "override"
+    finally:
+        del sign.RISK_SOLVERS["_fake"]
+
+
+def test_rsa_cipher_reuse():
+    key = RSA.generate(1024)
+    original = Signer.encryptor_pubkey
+    Signer.use_public_key(key.public_key())
+    try:
+        decrypt = PKCS1_v1_5.new(key)
+        for _ in range(3):
+            uid = Signer.rand_uid()
+            assert decrypt.decrypt(bytes.fromhex(Signer.encrypt_asymmetric_1(uid)), None) == uid.encode()
+    finally:
+        Signer.use_public_key(original)
+
+
+def test_pow_future_is_joined():
+    from geetest_solver.pow import pow_engine
+    data = _challenge(3)
+    future = pow_engine.submit(Signer.pow_for, data, "cid")
+    payload = json.loads(_payload(Signer.generate_w(data, "cid", "ai", pow_fields=future)))
+    assert {k: payload[k] for k in ("pow_msg", "pow_sign")} == future.result()
+
+
+def test_failed_image_solve_stops_its_pow(monkeypatch):
+    futures = []
+    submit_pow = Signer.submit_pow
+
+    def record(data, captcha_id):
+        futures.append(submit_pow(data, captcha_id))
+        return futures[-1]
+
+    def broken(data, assets):
+        while not futures[0].running():  # the search has started, Future.cancel() alone can't stop it
+            time.sleep(0.01)
+        raise ValueError("no match")
+
+    monkeypatch.setattr(Signer, "submit_pow", staticmethod(record))
+    monkeypatch.setitem(sign.RISK_SOLVERS, "slide", broken)
+    data = _challenge(9) | {"slice": "s.png", "bg": "b.jpg"}
+    data["pow_detail"] = dict(data["pow_detail"], bits=28)  # minutes of search if left running
+    with pytest.raises(ValueError):
+        Signer.generate_w(data, "cid", "slide", assets={"s.png": b"", "b.jpg": b""})
+    assert isinstance(futures[0].exception(timeout=2), CancelledError)